@@ -0,0 +1,192 @@
+import os
+import threading
+import time
+import logging
+import tempfile
+from collections import deque
+from typing import Callable, Dict, List
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem trava entre processos
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+ARQUIVO_TRAVA = os.environ.get("AGENDADOR_TRAVA", os.path.join(tempfile.gettempdir(), "fluxo_loja_agendador.lock"))
+
+
+def _intervalo(variavel: str, padrao: int) -> int:
+    return int(os.environ.get(variavel, padrao))
+
+
+class Tarefa:
+    """Tarefa periódica com histórico das últimas execuções (duração e resultado)."""
+
+    def __init__(self, nome: str, intervalo: int, funcao: Callable, atraso_inicial: int = 30):
+        self.nome = nome
+        self.intervalo = intervalo
+        self.funcao = funcao
+        self.proxima = time.monotonic() + atraso_inicial
+        self.historico = deque(maxlen=50)
+
+    def executar(self, contexto):
+        inicio = time.time()
+        t0 = time.perf_counter()
+        try:
+            resultado = self.funcao(contexto)
+            registro = {'inicio': inicio, 'duracao': time.perf_counter() - t0, 'ok': True, 'resultado': resultado}
+            logger.info("Tarefa %s concluída em %.2fs: %s", self.nome, registro['duracao'], resultado)
+        except Exception as e:
+            registro = {'inicio': inicio, 'duracao': time.perf_counter() - t0, 'ok': False, 'resultado': f"{type(e).__name__}: {e}"}
+            logger.warning("Tarefa %s falhou em %.2fs: %s", self.nome, registro['duracao'], e)
+        self.historico.append(registro)
+        self.proxima = time.monotonic() + self.intervalo
+        return registro
+
+
+class Agendador:
+    """
+    Executa tarefas de manutenção numa thread própria, fora dos reruns dos usuários.
+    Só um processo por máquina executa as tarefas (trava em arquivo).
+    """
+
+    def __init__(self, tarefas: List[Tarefa], abrir_contexto: Callable):
+        self.tarefas = {t.nome: t for t in tarefas}
+        self._abrir_contexto = abrir_contexto
+        self._contexto = None
+        self._parar = threading.Event()
+        self._trava = None
+        self._thread = threading.Thread(target=self._laco, name="agendador-manutencao", daemon=True)
+
+    def _obter_trava(self) -> bool:
+        if fcntl is None: return True
+        try:
+            self._trava = open(ARQUIVO_TRAVA, "w")
+            fcntl.flock(self._trava, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            return True
+        except OSError:
+            if self._trava: self._trava.close()
+            self._trava = None
+            return False
+
+    def iniciar(self) -> bool:
+        if not self._obter_trava():
+            logger.info("Agendador já está ativo em outro processo; este não executará tarefas")
+            return False
+        self._thread.start()
+        return True
+
+    def parar(self):
+        self._parar.set()
+
+    def _laco(self):
+        while not self._parar.wait(1):
+            for tarefa in self.tarefas.values():
+                if self._parar.is_set(): return
+                if time.monotonic() < tarefa.proxima: continue
+                try:
+                    if self._contexto is None: self._contexto = self._abrir_contexto()
+                except Exception as e:
+                    logger.warning("Agendador sem conexão com a planilha: %s", e)
+                    tarefa.historico.append({'inicio': time.time(), 'duracao': 0.0, 'ok': False, 'resultado': f"sem conexão: {e}"})
+                    tarefa.proxima = time.monotonic() + tarefa.intervalo
+                    continue
+                tarefa.executar(self._contexto)
+
+    def executar_agora(self, nome: str) -> Dict:
+        """Roda uma tarefa imediatamente (na thread de quem chamou)."""
+        if self._contexto is None: self._contexto = self._abrir_contexto()
+        return self.tarefas[nome].executar(self._contexto)
+
+    def resumo(self) -> List[Dict]:
+        agora = time.monotonic()
+        return [
+            {'tarefa': t.nome, 'intervalo_s': t.intervalo, 'proxima_em_s': max(0, int(t.proxima - agora)),
+             'ultima': t.historico[-1] if t.historico else None,
+             'falhas': sum(1 for h in t.historico if not h['ok']), 'execucoes': len(t.historico)}
+            for t in self.tarefas.values()
+        ]
+
+
+# --- Tarefas de manutenção ---
+
+def _limpar_reservas(gsheets):
+    return f"{gsheets.limpar_reservas_antigas(minutos=_intervalo('RESERVAS_PENDENTES_MINUTOS', 1))} reservas removidas"
+
+def _atualizar_cache(gsheets):
+    return "cache recarregado" if gsheets.recarregar_cache() else "adiado (economia de cota)"
+
+def _arquivar(gsheets):
+    from cubo_analitico import cubo_atualizado
+    cubo = cubo_atualizado(gsheets)
+    return f"cubo com {len(cubo)} células até a linha {cubo.linhas_processadas}"
+
+
+def _salvar_snapshot(gsheets):
+    import snapshot_persistente
+    if not snapshot_persistente.ativo(): return "desativado (sem pyarrow ou FLUXO_SNAPSHOT_ARQUIVO vazio)"
+    return "snapshot salvo em disco" if gsheets.salvar_snapshot() else "sem mudanças"
+
+
+def _descartar_memoria(gsheets):
+    from memoria_sessoes import aplicar_politicas
+    descartes = aplicar_politicas()
+    return ", ".join(f"{nome}: {qtd}" for nome, qtd in descartes.items())
+
+
+def _exportar_drive(gsheets):
+    from exportacao_drive import destino_padrao, exportar_incremental
+    destino = destino_padrao()
+    if destino is None: return "desativada (DRIVE_PASTA_ID não definido)"
+    r = exportar_incremental(gsheets, destino)
+    return f"{r['linhas']} linhas novas" + (f" em {', '.join(r['arquivos'])}" if r['arquivos'] else "")
+
+
+def _espelhar_sheets(gsheets):
+    from armazenamento import ESPELHO_SHEETS, ArmazenamentoSQLite, espelhar
+    if not ESPELHO_SHEETS or not isinstance(gsheets.armazenamento, ArmazenamentoSQLite):
+        return "desativado (FLUXO_ESPELHO_SHEETS não ligado com SQLite)"
+    from google_planilha import abrir_planilha
+    from fragmentacao import armazenamento_sheets
+    client, planilha = abrir_planilha()
+    r = espelhar(gsheets.armazenamento, armazenamento_sheets(planilha, gsheets._contar, client))
+    return f"{r['relatorio']} linhas e {r['vendedores']} vendedores enviados à planilha"
+
+
+def _abrir_gsheets():
+    from google_planilha import abrir_gsheets
+    return abrir_gsheets()
+
+
+def tarefas_padrao() -> List[Tarefa]:
+    return [
+        Tarefa("limpar_reservas", _intervalo("AGENDA_LIMPEZA_RESERVAS_S", 300), _limpar_reservas),
+        # Um pouco abaixo do TTL do relatorio, para as telas quase sempre acharem o cache quente
+        Tarefa("atualizar_cache", _intervalo("AGENDA_ATUALIZAR_CACHE_S", 240), _atualizar_cache, atraso_inicial=5),
+        Tarefa("arquivamento", _intervalo("AGENDA_ARQUIVAMENTO_S", 3600), _arquivar, atraso_inicial=120),
+        Tarefa("salvar_snapshot", _intervalo("AGENDA_SALVAR_SNAPSHOT_S", 300), _salvar_snapshot, atraso_inicial=90),
+        Tarefa("descartar_memoria", _intervalo("AGENDA_DESCARTE_MEMORIA_S", 120), _descartar_memoria),
+        Tarefa("exportar_drive", _intervalo("AGENDA_EXPORTACAO_DRIVE_S", 86400), _exportar_drive, atraso_inicial=900),
+        Tarefa("espelhar_sheets", _intervalo("AGENDA_ESPELHO_SHEETS_S", 300), _espelhar_sheets, atraso_inicial=60),
+    ]
+
+
+_agendador = None
+_lock_inicio = threading.Lock()
+
+
+def iniciar_agendador():
+    """Inicia o agendador uma única vez por processo (chamado a cada rerun, é barato)."""
+    global _agendador
+    if _agendador is not None or os.environ.get("AGENDADOR_ATIVO", "1") == "0": return _agendador
+    with _lock_inicio:
+        if _agendador is None:
+            agendador = Agendador(tarefas_padrao(), _abrir_gsheets)
+            agendador.iniciar()
+            _agendador = agendador
+    return _agendador
+
+
+def agendador_atual():
+    return _agendador
@@ -2,10 +2,9 @@
 import sys
 import os
 import base64
-import json
-import bcrypt
 from datetime import datetime
 import importlib
+import time
 import logging
 
 # 🔥 Garante que o diretório do app.py esteja no sys.path
@@ -19,6 +18,10 @@ if 'loja' not in st.session_state: st.session_state.loja = ''
 if 'subtela' not in st.session_state: st.session_state.subtela = ''
 if 'nome_atendente' not in st.session_state: st.session_state.nome_atendente = ''
 if 'horario_entrada' not in st.session_state: st.session_state.horario_entrada = None
+# Usado pelo descarte de memória para saber há quanto tempo a aba está parada
+st.session_state.ultima_atividade = time.time()
+# Número desta execução do script na sessão (avisos que aparecem uma vez por rerun)
+st.session_state.rerun_n = st.session_state.get('rerun_n', 0) + 1
 
 st.set_page_config(page_title="Fluxo de Loja", layout="centered")
 
@@ -26,57 +29,96 @@ def set_fundo_cor_solido():
     st.markdown("<style>.stApp { background-color: #f0f4e2; }</style>", unsafe_allow_html=True)
 set_fundo_cor_solido()
 
+# 🕒 Tarefas de manutenção em segundo plano (inicia uma única vez por servidor)
+from agendador import iniciar_agendador, agendador_atual
+iniciar_agendador()
+
+from autenticacao import verificar_senha, emitir_token, validar_token, revogar_token
+from cadastro_usuarios import cadastro
+from perfil_rerun import perfilador
+
 def garantir_conexao_gsheets():
     if 'gsheets' not in st.session_state:
         from google_planilha import GooglePlanilha
         st.session_state.gsheets = GooglePlanilha()
 
-def tela_login():
-    st.markdown("<h1 style='text-align: center; color: #1f77b4;'>🔐 ACESSO AO SISTEMA</h1>", unsafe_allow_html=True)
+def entrar(nome, token):
+    st.session_state.nome_atendente = nome
+    st.session_state.etapa = 'loja'
+    st.session_state.horario_entrada = datetime.now()
+    st.session_state.token_sessao = token
+
+def retomar_sessao():
+    """
+    Recarregar a página mantém o login enquanto o token da URL for válido (sem refazer o bcrypt).
+    O token fica exposto no histórico e em logs de proxy; ele vale até o fim do turno ou até
+    o usuário sair ou ter a senha trocada (ver autenticacao.py).
+    """
+    token = st.query_params.get("sessao")
+    nome = validar_token(token)
+    if not nome: return
     try:
-        with open("usuarios.json", "r", encoding="utf-8") as f:
-            dados = json.load(f)
-            usuarios = {u["nome"].upper(): u for u in dados["usuarios"]}
-    except:
-        st.error("❌ Erro ao carregar usuários.")
-        return
+        if not cadastro().existe(nome): return
+    except: return
+    entrar(nome, token)
 
+def tela_login():
+    st.markdown("<h1 style='text-align: center; color: #1f77b4;'>🔐 ACESSO AO SISTEMA</h1>", unsafe_allow_html=True)
     nome = st.text_input("Usuário").upper()
     senha = st.text_input("Senha", type="password")
 
     if st.button("✅ ENTRAR NO SISTEMA", use_container_width=True):
-        if nome in usuarios and bcrypt.checkpw(senha.encode(), usuarios[nome]["senha_hash"].encode()):
-            st.session_state.nome_atendente = nome
-            st.session_state.etapa = 'loja'
-            st.session_state.horario_entrada = datetime.now()
+        try:
+            usuario = cadastro().buscar(nome) if nome.strip() else None
+        except:
+            st.error("❌ Erro ao carregar usuários.")
+            return
+        with st.spinner("Verificando..."):
+            ok, mensagem = verificar_senha(nome, senha, (usuario or {}).get("senha_hash"))
+        if ok:
+            try: token = emitir_token(nome)
+            except Exception:
+                st.error("❌ Não foi possível abrir a sessão. Tente novamente.")
+                return
+            st.query_params["sessao"] = token
+            entrar(nome, token)
             st.rerun()
         else:
-            st.error("❌ Usuário ou senha incorretos.")
+            st.error(mensagem)
 
 # --- Navegação ---
 if st.session_state.etapa == 'login':
-    tela_login()
+    retomar_sessao()
 
-elif st.session_state.etapa == 'loja':
-    garantir_conexao_gsheets()
-    from selecionar_loja import tela_selecao_loja
-    tela_selecao_loja()
+def navegar():
+    if st.session_state.etapa == 'login':
+        tela_login()
 
-elif st.session_state.etapa == 'atendimento':
-    garantir_conexao_gsheets()
-    from tela_atendimento import tela_atendimento_principal
-    tela_atendimento_principal()
+    elif st.session_state.etapa == 'loja':
+        garantir_conexao_gsheets()
+        from selecionar_loja import tela_selecao_loja
+        tela_selecao_loja()
 
-elif st.session_state.etapa == 'subtela':
-    garantir_conexao_gsheets()
-    nome_modulo = f"tela_{st.session_state.subtela}"
-    try:
-        module = importlib.import_module(nome_modulo)
-        func = getattr(module, 'mostrar', None) or getattr(module, nome_modulo, None)
-        if func: func()
-        else: st.error(f"❌ Erro no módulo {nome_modulo}")
-    except Exception as e:
-        st.error(f"❌ Erro ao carregar {nome_modulo}: {e}")
+    elif st.session_state.etapa == 'atendimento':
+        garantir_conexao_gsheets()
+        from tela_atendimento import tela_atendimento_principal
+        tela_atendimento_principal()
+
+    elif st.session_state.etapa == 'subtela':
+        garantir_conexao_gsheets()
+        nome_modulo = f"tela_{st.session_state.subtela}"
+        try:
+            module = importlib.import_module(nome_modulo)
+            func = getattr(module, 'mostrar', None) or getattr(module, nome_modulo, None)
+            if func: func()
+            else: st.error(f"❌ Erro no módulo {nome_modulo}")
+        except Exception as e:
+            st.error(f"❌ Erro ao carregar {nome_modulo}: {e}")
+
+tela_atual = st.session_state.subtela if st.session_state.etapa == 'subtela' else st.session_state.etapa
+# Perfil opcional (PERFIL_RERUNS=1 ou pela tela de perfis); desligado não custa nada
+with perfilador.perfilar(tela_atual, st.session_state.loja, st.session_state.nome_atendente):
+    navegar()
 
 # Sidebar
 if st.session_state.nome_atendente:
@@ -95,6 +137,36 @@ if st.session_state.nome_atendente:
             st.session_state.subtela = 'cadastro_vendedor'
             st.rerun()
 
+        if st.sidebar.button("🧠 Memória das Sessões", use_container_width=True):
+            st.session_state.etapa = 'subtela'
+            st.session_state.subtela = 'memoria_sessoes'
+            st.rerun()
+
+        if st.sidebar.button("⏱️ Perfis de Execução", use_container_width=True):
+            st.session_state.etapa = 'subtela'
+            st.session_state.subtela = 'perfis'
+            st.rerun()
+
+        # Uso da cota do Google Sheets no último minuto (processo e esta sessão)
+        if 'gsheets' in st.session_state:
+            orc = st.session_state.gsheets.resumo_orcamento()
+            st.sidebar.caption(
+                f"📶 Cota Sheets/min — leituras {orc['leitura']['processo']}/{orc['leitura']['limite']}, "
+                f"escritas {orc['escrita']['processo']}/{orc['escrita']['limite']} "
+                f"(sessão: {orc['leitura']['sessao']}L/{orc['escrita']['sessao']}E)"
+            )
+
+        if agendador_atual():
+            with st.sidebar.expander("🕒 Tarefas de manutenção"):
+                for t in agendador_atual().resumo():
+                    ultima = t['ultima']
+                    situacao = "—" if not ultima else f"{'✅' if ultima['ok'] else '❌'} {ultima['duracao']:.1f}s · {ultima['resultado']}"
+                    st.caption(f"**{t['tarefa']}** (a cada {t['intervalo_s']}s, próxima em {t['proxima_em_s']}s): {situacao}")
+
     if st.sidebar.button("🚪 Sair", use_container_width=True):
+        from aquecimento import cancelar_aquecimento
+        cancelar_aquecimento()
+        revogar_token(st.session_state.get('token_sessao'))
+        st.query_params.clear()
         st.session_state.clear()
         st.rerun()
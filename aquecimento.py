@@ -0,0 +1,90 @@
+import threading
+import time
+import logging
+import streamlit as st
+from relatorio_vendedor import COLUNAS_RELATORIO_VENDEDOR
+
+logger = logging.getLogger(__name__)
+
+# Depois deste tempo (segundos) nenhuma etapa nova começa; a que já está rodando vai até o fim
+TIMEOUT_AQUECIMENTO = 45
+
+
+class Aquecimento:
+    """
+    Carrega em segundo plano os dados da loja (vendedores ativos, registros de hoje
+    e saldo de reservas) no cache compartilhado, enquanto o atendente ainda está
+    na tela de atendimento.
+
+    `timeout` e `cancelar()` só são conferidos entre as etapas: as leituras do gspread
+    não podem ser interrompidas, então uma etapa lenta (a planilha inteira esperando a
+    cota) termina mesmo passando do prazo ou depois de cancelada.
+    """
+
+    def __init__(self, gsheets, loja: str, timeout: float = TIMEOUT_AQUECIMENTO):
+        self.gsheets = gsheets
+        self.loja = loja
+        self.timeout = timeout
+        self.concluido = False
+        self.erro = None
+        self._cancelado = threading.Event()
+        self._thread = threading.Thread(target=self._executar, name=f"aquecimento-{loja}", daemon=True)
+
+    def iniciar(self):
+        self._thread.start()
+        return self
+
+    def cancelar(self):
+        self._cancelado.set()
+
+    @property
+    def ativo(self) -> bool:
+        return self._thread.is_alive()
+
+    def aguardar(self, timeout: float = None) -> bool:
+        """Espera a thread terminar (scripts e testes). True se terminou."""
+        self._thread.join(timeout)
+        return not self.ativo
+
+    def _executar(self):
+        prazo = time.monotonic() + self.timeout
+        etapas = [
+            ("vendedores", lambda: self.gsheets.get_vendedores_por_loja(self.loja)),
+            # O snapshot completo primeiro: com ele no processo as telas não leem a planilha
+            ("relatorio", lambda: self.gsheets.get_snapshot_relatorio(self.loja)),
+            ("hoje", lambda: self.gsheets.get_registros_hoje(self.loja, colunas=COLUNAS_RELATORIO_VENDEDOR)),
+            ("reservas", lambda: self.gsheets.get_reservas_ativas(self.loja)),
+        ]
+        inicio = time.monotonic()
+        for nome, etapa in etapas:
+            if self._cancelado.is_set():
+                logger.info("Aquecimento de %s cancelado antes de '%s'", self.loja, nome)
+                return
+            if time.monotonic() > prazo:
+                logger.warning("Aquecimento de %s excedeu %ss em '%s'", self.loja, self.timeout, nome)
+                return
+            try:
+                etapa()
+            except Exception as e:
+                self.erro = e
+                logger.warning("Falha no aquecimento de %s (%s): %s", self.loja, nome, e)
+                return
+            if time.monotonic() > prazo:
+                logger.warning("Etapa '%s' do aquecimento de %s terminou depois do prazo de %ss",
+                               nome, self.loja, self.timeout)
+        self.concluido = True
+        logger.info("Aquecimento de %s concluído em %.2fs", self.loja, time.monotonic() - inicio)
+
+
+def iniciar_aquecimento(gsheets, loja: str):
+    """Dispara o aquecimento da loja para a sessão atual, cancelando o anterior."""
+    cancelar_aquecimento()
+    if gsheets is None or not gsheets.conectado: return
+    st.session_state.aquecimento = Aquecimento(gsheets, loja).iniciar()
+
+
+def cancelar_aquecimento():
+    anterior = st.session_state.get('aquecimento')
+    if anterior is not None:
+        anterior.cancelar()
+        del st.session_state['aquecimento']
@@ -0,0 +1,680 @@
+"""
+Onde o GooglePlanilha guarda os dados: Google Sheets ou um banco SQLite local.
+
+As regras de negócio (validação, cache compartilhado, índice de vendedores por loja)
+ficam no GooglePlanilha; aqui ficam só as leituras e gravações de cada armazenamento.
+O armazenamento é escolhido por FLUXO_ARMAZENAMENTO ("sheets", padrão, ou "sqlite").
+Com SQLite, a tarefa "espelhar_sheets" do agendador pode copiar as novidades para a
+planilha de tempos em tempos, para os gerentes continuarem consultando por lá.
+
+Uso:
+    python armazenamento.py migrar sheets sqlite        # copia a planilha para dados/fluxo.db
+    python armazenamento.py migrar sqlite sheets        # o caminho de volta
+    python armazenamento.py espelhar                    # envia ao Sheets o que falta do SQLite
+"""
+import os
+import re
+import sys
+import json
+import sqlite3
+import logging
+import argparse
+import threading
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+from zoneinfo import ZoneInfo
+
+from dateutil import parser
+from gspread.utils import rowcol_to_a1
+
+from cache_compartilhado import cache
+from sincronizacao_blocos import Alteracoes, SincronizadorBlocos
+
+logger = logging.getLogger(__name__)
+
+ARMAZENAMENTO = os.environ.get("FLUXO_ARMAZENAMENTO", "sheets").strip().lower()
+ARQUIVO_BANCO = os.environ.get("FLUXO_BANCO", os.path.join("dados", "fluxo.db"))
+ESPELHO_SHEETS = os.environ.get("FLUXO_ESPELHO_SHEETS", "0") == "1"
+
+COLUNAS_RELATORIO = [
+    'LOJA', 'DATA', 'HORA', 'VENDEDOR', 'CLIENTE', 'ATENDIMENTOS', 'RECEITAS',
+    'PERDAS', 'VENDAS', 'RESERVAS', 'PESQUISAS', 'EXAME DE VISTA', 'GOOGLE'
+]
+CABECALHO_VENDEDORES = ["VENDEDOR", "STATUS", "LOJAS"]
+
+
+def chave_loja(loja: str) -> str:
+    """Forma canônica do nome da loja para índices ("Loja 01" e "LOJA01" -> "LOJA01")."""
+    return re.sub(r"\s+", "", str(loja)).upper()
+
+def separar_lojas(texto: str) -> List[str]:
+    return [l.strip().upper() for l in str(texto).split(",") if l.strip()]
+
+def _primeira_linha_gravada(resposta) -> int:
+    """Linha inicial do updatedRange devolvido por append_rows (None se a resposta não trouxer)."""
+    try: return int(re.search(r"![A-Z]+(\d+)", resposta["updates"]["updatedRange"]).group(1))
+    except Exception: return None
+
+
+class Armazenamento:
+    """
+    Operações que o GooglePlanilha usa. Vendedores são dicts {"VENDEDOR", "STATUS",
+    "LOJAS", "row"}; `row` identifica o vendedor nas alterações (linha na planilha,
+    chave no banco). Linhas do relatorio seguem a ordem de COLUNAS_RELATORIO.
+    """
+    nome = ""
+    usa_cota = False   # leituras e gravações contam na cota por minuto do Google
+
+    @property
+    def disponivel(self) -> bool:
+        return True
+
+    @property
+    def identificador(self) -> str:
+        """De onde vêm os dados (um snapshot salvo só é reaproveitado na mesma origem)."""
+        return self.nome
+
+    def nomes_fragmentos(self) -> List[str]:
+        """Partes em que o relatorio está dividido (ver fragmentacao). "" é o relatorio principal."""
+        return [""]
+
+    def fragmento_da_loja(self, loja: str) -> str:
+        return ""
+
+    def fragmento(self, nome: str) -> "Armazenamento":
+        """Armazenamento que lê e grava só o relatorio daquele fragmento."""
+        return self
+
+    def marca_relatorio(self) -> Optional[Dict]:
+        """Até onde o relatorio foi sincronizado, além do tamanho do snapshot (None: o tamanho basta)."""
+        return None
+
+    def restaurar_marca_relatorio(self, marca: Dict):
+        pass
+
+    def sincronizar_relatorio(self, linhas_no_snapshot: Optional[int]) -> Alteracoes:
+        """Novidades desde que o snapshot tinha `linhas_no_snapshot` linhas (None: tudo)."""
+        raise NotImplementedError
+
+    def acrescentar_relatorio(self, linhas: List[List[str]]) -> Dict[str, Optional[int]]:
+        """
+        Grava as linhas no fim do relatorio. Devolve, por fragmento ("" sem fragmentação), o
+        índice da primeira linha gravada (0 é a primeira depois do cabeçalho; None se não der
+        para saber): outra gravação pode ter caído antes, entre a última leitura e esta.
+        """
+        raise NotImplementedError
+
+    def ler_colunas_relatorio(self, colunas: List[str], inicio: int = 0, fim: Optional[int] = None) -> List[List[str]]:
+        """
+        Só as `colunas` (nomes do cabeçalho, nessa ordem) das linhas [inicio, fim) do
+        relatorio, sem o cabeçalho (0 é a primeira linha de dados).
+        """
+        raise NotImplementedError
+
+    def total_relatorio(self) -> int:
+        """Quantas linhas o relatorio tem, sem o cabeçalho."""
+        raise NotImplementedError
+
+    def tem_relatorio(self) -> bool:
+        raise NotImplementedError
+
+    def ler_vendedores(self, so_se_mudou: bool = False) -> Optional[List[Dict]]:
+        """Lista de vendedores; com `so_se_mudou`, None quando nada mudou desde a última leitura."""
+        raise NotImplementedError
+
+    def atualizar_vendedores(self, alteracoes: Dict[int, Dict]):
+        """Grava STATUS e LOJAS de vários vendedores de uma vez."""
+        raise NotImplementedError
+
+    def inserir_vendedores(self, novos: List[Dict]) -> Optional[int]:
+        """Acrescenta vendedores e devolve o `row` do primeiro (None se não der para saber)."""
+        raise NotImplementedError
+
+    def substituir_vendedores(self, vendedores: List[Dict]):
+        """Troca o cadastro inteiro (migração e espelho)."""
+        raise NotImplementedError
+
+    def ler_reservas(self) -> List[List[str]]:
+        raise NotImplementedError
+
+    def acrescentar_reservas(self, linhas: List[List[str]]):
+        raise NotImplementedError
+
+    def remover_reservas_pendentes(self, minutos: float, pode_continuar: Callable[[], bool]) -> int:
+        """Apaga reservas PENDENTE criadas há mais de `minutos`. Retorna quantas saíram."""
+        raise NotImplementedError
+
+
+# --- Google Sheets ---
+
+class ArmazenamentoSheets(Armazenamento):
+    """Abas relatorio, vendedor e reservas da planilha; cada chamada à API passa por `contar`."""
+    nome = "sheets"
+    usa_cota = True
+
+    def __init__(self, planilha, contar: Callable = None, aba_relatorio: str = "relatorio", so_relatorio: bool = False):
+        """`aba_relatorio` e `so_relatorio` servem aos fragmentos do relatorio (ver fragmentacao)."""
+        self.planilha = planilha
+        self._contar = contar or (lambda tipo, quantidade=1: None)
+        self.nome_aba_relatorio = aba_relatorio
+        self.aba_vendedores = None if so_relatorio else self._aba("vendedor")
+        self.aba_relatorio = self._aba(aba_relatorio)
+        self._chave_sinc = ('sinc', 'relatorio', self.identificador)
+
+    def _aba(self, nome: str):
+        try:
+            self._contar('leitura')
+            return self.planilha.worksheet(nome)
+        except: return None
+
+    @property
+    def disponivel(self) -> bool:
+        return self.aba_relatorio is not None
+
+    @property
+    def identificador(self) -> str:
+        extra = "" if self.nome_aba_relatorio == "relatorio" else f"/{self.nome_aba_relatorio}"
+        return f"sheets:{self.planilha.id}{extra}"
+
+    def verificar_estrutura(self):
+        # Aba vendedor: garante o cabeçalho da coluna C (lojas do vendedor)
+        if self.aba_vendedores:
+            try:
+                self._contar('leitura')
+                cab_vend = [c.strip().upper() for c in self.aba_vendedores.row_values(1)]
+                if cab_vend[:1] == ["VENDEDOR"] and len(cab_vend) < 3:
+                    self._contar('escrita')
+                    self.aba_vendedores.update("A1", [CABECALHO_VENDEDORES])
+            except: pass
+
+        if not self.aba_relatorio: return
+        try:
+            self._contar('leitura')
+            cabecalhos = [c.strip() for c in self.aba_relatorio.row_values(1)]
+            # Ajuste para renomear se for GOOGLE1
+            if "GOOGLE1" in cabecalhos:
+                idx = cabecalhos.index("GOOGLE1")
+                self._contar('escrita')
+                self.aba_relatorio.update_cell(1, idx + 1, "GOOGLE")
+                cabecalhos[idx] = "GOOGLE"
+
+            if len(cabecalhos) < len(COLUNAS_RELATORIO) or cabecalhos[:len(COLUNAS_RELATORIO)] != COLUNAS_RELATORIO:
+                self._contar('escrita')
+                self.aba_relatorio.update("A1", [COLUNAS_RELATORIO])
+        except: pass
+
+    # --- Relatorio ---
+
+    def sincronizar_relatorio(self, linhas_no_snapshot: Optional[int]) -> Alteracoes:
+        # Os hashes por bloco são do processo, como o snapshot (ver sincronizacao_blocos)
+        sinc = cache.obter_ou_carregar(self._chave_sinc, lambda: SincronizadorBlocos("Z"))
+        if linhas_no_snapshot is None or not len(sinc):
+            alteracoes = sinc.carregar(self.aba_relatorio)
+        else:
+            if len(sinc) > linhas_no_snapshot + 1:
+                # O snapshot foi trocado sem passar por aqui: as linhas que faltam voltam como acréscimo
+                sinc.esquecer_a_partir(linhas_no_snapshot + 1)
+            alteracoes = sinc.sincronizar(self.aba_relatorio)
+        self._contar('leitura', alteracoes.leituras)
+        return alteracoes
+
+    def marca_relatorio(self) -> Optional[Dict]:
+        sinc = cache.obter(self._chave_sinc)
+        return sinc.estado() if sinc is not None and len(sinc) else None
+
+    def restaurar_marca_relatorio(self, marca: Dict):
+        sinc = SincronizadorBlocos("Z")
+        sinc.restaurar(marca["hashes"], marca["cabecalho"])
+        cache.definir(self._chave_sinc, sinc)
+
+    def acrescentar_relatorio(self, linhas: List[List[str]]) -> Dict[str, Optional[int]]:
+        self._contar('escrita')
+        primeira = _primeira_linha_gravada(self.aba_relatorio.append_rows(linhas, value_input_option='USER_ENTERED'))
+        return {"": None if primeira is None else primeira - 2}
+
+    def total_relatorio(self) -> int:
+        # Pela coluna A só: toda linha gravada tem LOJA
+        if not self.aba_relatorio: return 0
+        self._contar('leitura')
+        return max(0, len(self.aba_relatorio.col_values(1)) - 1)
+
+    def tem_relatorio(self) -> bool:
+        self._contar('leitura')
+        return bool(self.aba_relatorio.row_values(2))
+
+    def ler_colunas_relatorio(self, colunas: List[str], inicio: int = 0, fim: Optional[int] = None) -> List[List[str]]:
+        # Colunas achadas pelo cabeçalho (o da sincronização, se já houver) e baixadas num único batch_get,
+        # uma faixa por grupo de colunas vizinhas
+        if not self.aba_relatorio: return []
+        sinc = cache.obter(self._chave_sinc)
+        cabecalho = sinc.cabecalho if sinc is not None and sinc.cabecalho else None
+        if cabecalho is None:
+            self._contar('leitura')
+            cabecalho = self.aba_relatorio.row_values(1)
+        posicoes = {}
+        for i, nome in enumerate(cabecalho):
+            nome = str(nome).strip().upper()
+            posicoes.setdefault("GOOGLE" if nome == "GOOGLE1" else nome, i)
+        faltando = [c for c in colunas if c not in posicoes]
+        if faltando: raise ValueError(f"Colunas fora do relatorio: {', '.join(faltando)}")
+
+        grupos = []
+        for i in sorted({posicoes[c] for c in colunas}):
+            if grupos and grupos[-1][-1] == i - 1: grupos[-1].append(i)
+            else: grupos.append([i])
+        letra = lambda i: re.sub(r"\d", "", rowcol_to_a1(1, i + 1))
+        ate = "" if fim is None else fim + 1
+        faixas = [f"{letra(g[0])}{inicio + 2}:{letra(g[-1])}{ate}" for g in grupos]
+        self._contar('leitura')
+        respostas = self.aba_relatorio.batch_get(faixas)
+
+        # A API corta células vazias à direita e linhas vazias no fim de cada faixa
+        total = max((len(r) for r in respostas), default=0)
+        onde = {i: (n, i - g[0]) for n, g in enumerate(grupos) for i in g}
+        valores = []
+        for coluna in colunas:
+            n, j = onde[posicoes[coluna]]
+            faixa = respostas[n]
+            valores.append([l[j] if j < len(l) else "" for l in faixa] + [""] * (total - len(faixa)))
+        return [list(linha) for linha in zip(*valores)]
+
+    # --- Vendedores ---
+
+    def ler_vendedores(self, so_se_mudou: bool = False) -> Optional[List[Dict]]:
+        """
+        Aba vendedor: A nome, B status, C lojas separadas por vírgula. A aba é pequena,
+        mas a sondagem por blocos evita reindexar (e invalidar) quando nada mudou.
+        """
+        if not self.aba_vendedores: return []
+        sinc = cache.obter_ou_carregar(('sinc', 'vendedor'), lambda: SincronizadorBlocos("C", manter_linhas=True))
+        alteracoes = sinc.sincronizar(self.aba_vendedores)
+        self._contar('leitura', alteracoes.leituras)
+        if so_se_mudou and not alteracoes.mudou: return None
+
+        vendedores = []
+        for i, linha in enumerate(sinc.linhas):
+            if not linha: continue
+            nome = linha[0].strip()
+            if not nome or nome.upper() == "VENDEDOR": continue
+
+            status = "ATIVO"
+            if len(linha) > 1:
+                status = linha[1].strip().upper() or "ATIVO"
+            lojas = separar_lojas(linha[2]) if len(linha) > 2 else []
+
+            vendedores.append({"VENDEDOR": nome, "STATUS": status, "LOJAS": lojas, "row": i + 1})
+        return vendedores
+
+    def atualizar_vendedores(self, alteracoes: Dict[int, Dict]):
+        self._contar('escrita')
+        self.aba_vendedores.batch_update([
+            {'range': f"B{row}:C{row}", 'values': [[a["STATUS"], ", ".join(a["LOJAS"])]]}
+            for row, a in sorted(alteracoes.items())
+        ])
+
+    def inserir_vendedores(self, novos: List[Dict]) -> Optional[int]:
+        self._contar('escrita')
+        resposta = self.aba_vendedores.append_rows([[n["VENDEDOR"], n["STATUS"], ", ".join(n["LOJAS"])] for n in novos])
+        return _primeira_linha_gravada(resposta)
+
+    def substituir_vendedores(self, vendedores: List[Dict]):
+        self._contar('leitura')
+        sobra = max(0, len(self.aba_vendedores.get_all_values()) - len(vendedores) - 1)
+        linhas = [[v["VENDEDOR"], v["STATUS"], ", ".join(v["LOJAS"])] for v in vendedores]
+        self._contar('escrita')
+        self.aba_vendedores.update("A1", [CABECALHO_VENDEDORES] + linhas + [["", "", ""]] * sobra)
+        cache.remover(('sinc', 'vendedor'))
+
+    # --- Reservas ---
+
+    def ler_reservas(self) -> List[List[str]]:
+        aba = self._aba("reservas")
+        if not aba: return []
+        self._contar('leitura')
+        return aba.get_all_values()[1:]
+
+    def acrescentar_reservas(self, linhas: List[List[str]]):
+        aba = self._aba("reservas")
+        if not aba or not linhas: return
+        self._contar('escrita')
+        aba.append_rows(linhas, value_input_option='USER_ENTERED')
+
+    def remover_reservas_pendentes(self, minutos: float, pode_continuar: Callable[[], bool]) -> int:
+        aba_reservas = self._aba("reservas")
+        if not aba_reservas: return 0
+        try:
+            self._contar('leitura')
+            dados = aba_reservas.get_all_values()
+            if len(dados) < 2: return 0
+            agora = datetime.now(ZoneInfo("America/Sao_Paulo"))
+            count = 0
+            for i in range(len(dados)-1, 0, -1):
+                linha = dados[i]
+                if len(linha) > 5 and linha[5].strip().upper() == "PENDENTE":
+                    try:
+                        criacao = parser.parse(linha[0], dayfirst=True).replace(tzinfo=ZoneInfo("America/Sao_Paulo"))
+                        if (agora - criacao).total_seconds() > minutos * 60:
+                            if not pode_continuar(): return count
+                            self._contar('escrita')
+                            aba_reservas.delete_rows(i + 1)
+                            count += 1
+                    except: continue
+            return count
+        except: return 0
+
+
+# --- SQLite ---
+
+_COLUNAS_SQL = [re.sub(r"\W+", "_", c.lower()) for c in COLUNAS_RELATORIO]
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS relatorio (
+    id             INTEGER PRIMARY KEY,
+    loja           TEXT NOT NULL,
+    data           TEXT NOT NULL,
+    hora           TEXT NOT NULL,
+    vendedor       TEXT NOT NULL,
+    cliente        TEXT NOT NULL,
+    atendimentos   INTEGER,
+    receitas       INTEGER,
+    perdas         INTEGER,
+    vendas         INTEGER,
+    reservas       INTEGER,
+    pesquisas      INTEGER,
+    exame_de_vista INTEGER,
+    google         INTEGER,
+    dia            TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_relatorio_loja_dia ON relatorio (loja, dia);
+CREATE INDEX IF NOT EXISTS idx_relatorio_loja_vendedor ON relatorio (loja, vendedor, dia);
+CREATE TABLE IF NOT EXISTS vendedores (
+    id     INTEGER PRIMARY KEY,
+    nome   TEXT NOT NULL UNIQUE,
+    status TEXT NOT NULL DEFAULT 'ATIVO',
+    lojas  TEXT NOT NULL DEFAULT ''
+);
+CREATE TABLE IF NOT EXISTS reservas (
+    id        INTEGER PRIMARY KEY,
+    criado_em TEXT NOT NULL,
+    status    TEXT NOT NULL,
+    linha     TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reservas_status ON reservas (status, criado_em);
+CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT);
+"""
+
+
+def _dia_iso(data: str) -> str:
+    """dd/mm/aaaa -> aaaa-mm-dd ('' quando inválida), para o índice por período."""
+    try: return datetime.strptime(str(data).strip(), "%d/%m/%Y").strftime("%Y-%m-%d")
+    except ValueError: return ""
+
+def _texto(valor) -> str:
+    return "" if valor is None else str(valor)
+
+
+class ArmazenamentoSQLite(Armazenamento):
+    """
+    Banco local com tabelas indexadas. O relatorio só recebe acréscimos, então o `id`
+    de cada linha é a sua posição (1, 2, ...) e as novidades são `id > linhas no snapshot`.
+    As gravações em lote são uma única transação. O SQL evita recursos próprios do
+    SQLite (fora os PRAGMAs), para poder ser levado ao PostgreSQL.
+    """
+    nome = "sqlite"
+
+    def __init__(self, caminho: str = ARQUIVO_BANCO):
+        self.caminho = caminho
+        pasta = os.path.dirname(caminho)
+        if pasta: os.makedirs(pasta, exist_ok=True)
+        self._local = threading.local()
+        self._versao_vendedores_lida = None   # nenhuma leitura ainda: a primeira vem completa
+        with self._conexao() as con:
+            con.executescript(ESQUEMA)
+
+    @property
+    def identificador(self) -> str:
+        return f"sqlite:{os.path.abspath(self.caminho)}"
+
+    def _conexao(self) -> sqlite3.Connection:
+        # Uma conexão por thread (cada sessão do Streamlit roda na sua)
+        con = getattr(self._local, 'con', None)
+        if con is None:
+            con = sqlite3.connect(self.caminho, timeout=10)
+            con.execute("PRAGMA journal_mode=WAL")
+            con.execute("PRAGMA synchronous=NORMAL")
+            self._local.con = con
+        return con
+
+    def meta(self, chave: str) -> Optional[str]:
+        linha = self._conexao().execute("SELECT valor FROM meta WHERE chave = ?", (chave,)).fetchone()
+        return linha[0] if linha else None
+
+    def definir_meta(self, chave: str, valor, con: sqlite3.Connection = None):
+        (con or self._conexao()).execute(
+            "INSERT INTO meta (chave, valor) VALUES (?, ?) ON CONFLICT (chave) DO UPDATE SET valor = excluded.valor",
+            (chave, str(valor))
+        )
+        if con is None: self._conexao().commit()
+
+    def _nova_versao_vendedores(self, con: sqlite3.Connection):
+        # Marca a mudança para o espelho saber que precisa regravar a aba vendedor
+        self.definir_meta('vendedores_versao', int(self.meta('vendedores_versao') or 0) + 1, con)
+
+    # --- Relatorio ---
+
+    def linhas_relatorio(self, depois_de: int = 0) -> List[List[str]]:
+        cursor = self._conexao().execute(
+            f"SELECT {', '.join(_COLUNAS_SQL)} FROM relatorio WHERE id > ? ORDER BY id", (depois_de,)
+        )
+        return [[_texto(v) for v in linha] for linha in cursor]
+
+    def total_relatorio(self) -> int:
+        return self._conexao().execute("SELECT COALESCE(MAX(id), 0) FROM relatorio").fetchone()[0]
+
+    def sincronizar_relatorio(self, linhas_no_snapshot: Optional[int]) -> Alteracoes:
+        if linhas_no_snapshot is None:
+            linhas = self.linhas_relatorio()
+            return Alteracoes(total=len(linhas) + 1, completo=[COLUNAS_RELATORIO] + linhas,
+                              so_acrescimo=False, cabecalho=COLUNAS_RELATORIO)
+        novas = self.linhas_relatorio(linhas_no_snapshot)
+        return Alteracoes(total=linhas_no_snapshot + len(novas) + 1, cabecalho=COLUNAS_RELATORIO,
+                          blocos={linhas_no_snapshot + 1: novas} if novas else {})
+
+    def acrescentar_relatorio(self, linhas: List[List[str]]) -> Dict[str, Optional[int]]:
+        registros = [
+            [str(v).strip() for v in (list(l) + [""] * len(COLUNAS_RELATORIO))[:len(COLUNAS_RELATORIO)]]
+            for l in linhas
+        ]
+        con = self._conexao()
+        with con:
+            con.executemany(
+                f"INSERT INTO relatorio ({', '.join(_COLUNAS_SQL)}, dia) VALUES ({', '.join('?' * (len(_COLUNAS_SQL) + 1))})",
+                [r + [_dia_iso(r[1])] for r in registros]
+            )
+            # Dentro da transação ninguém grava entre as nossas linhas: elas terminam no maior id
+            ultimo = con.execute("SELECT MAX(id) FROM relatorio").fetchone()[0]
+        return {"": ultimo - len(registros)}
+
+    def tem_relatorio(self) -> bool:
+        return self._conexao().execute("SELECT 1 FROM relatorio LIMIT 1").fetchone() is not None
+
+    def ler_colunas_relatorio(self, colunas: List[str], inicio: int = 0, fim: Optional[int] = None) -> List[List[str]]:
+        sql = dict(zip(COLUNAS_RELATORIO, _COLUNAS_SQL))
+        faltando = [c for c in colunas if c not in sql]
+        if faltando: raise ValueError(f"Colunas fora do relatorio: {', '.join(faltando)}")
+        # O id é a posição da linha (ver docstring da classe)
+        cursor = self._conexao().execute(
+            f"SELECT {', '.join(sql[c] for c in colunas)} FROM relatorio WHERE id > ? AND id <= ? ORDER BY id",
+            (inicio, fim if fim is not None else 2 ** 62)
+        )
+        return [[_texto(v) for v in linha] for linha in cursor]
+
+    # --- Vendedores ---
+
+    def ler_vendedores(self, so_se_mudou: bool = False) -> Optional[List[Dict]]:
+        # vendedores_versao muda a cada gravação no cadastro, deste processo ou de outro;
+        # lida antes das linhas, uma mudança no meio só faz a próxima leitura vir completa
+        versao = self.meta('vendedores_versao')
+        if so_se_mudou and versao == self._versao_vendedores_lida: return None
+        vendedores = [
+            {"VENDEDOR": nome, "STATUS": status, "LOJAS": separar_lojas(lojas), "row": id_}
+            for id_, nome, status, lojas in self._conexao().execute(
+                "SELECT id, nome, status, lojas FROM vendedores ORDER BY id"
+            )
+        ]
+        self._versao_vendedores_lida = versao
+        return vendedores
+
+    def atualizar_vendedores(self, alteracoes: Dict[int, Dict]):
+        con = self._conexao()
+        with con:
+            con.executemany("UPDATE vendedores SET status = ?, lojas = ? WHERE id = ?",
+                            [(a["STATUS"], ", ".join(a["LOJAS"]), row) for row, a in sorted(alteracoes.items())])
+            self._nova_versao_vendedores(con)
+
+    def inserir_vendedores(self, novos: List[Dict]) -> Optional[int]:
+        con = self._conexao()
+        with con:
+            ids = [
+                con.execute("INSERT INTO vendedores (nome, status, lojas) VALUES (?, ?, ?)",
+                            (n["VENDEDOR"], n["STATUS"], ", ".join(n["LOJAS"]))).lastrowid
+                for n in novos
+            ]
+            self._nova_versao_vendedores(con)
+        return ids[0] if ids else None
+
+    def substituir_vendedores(self, vendedores: List[Dict]):
+        con = self._conexao()
+        with con:
+            con.execute("DELETE FROM vendedores")
+            con.executemany("INSERT INTO vendedores (nome, status, lojas) VALUES (?, ?, ?)",
+                            [(v["VENDEDOR"], v["STATUS"], ", ".join(v["LOJAS"])) for v in vendedores])
+            self._nova_versao_vendedores(con)
+
+    # --- Reservas ---
+
+    def ler_reservas(self) -> List[List[str]]:
+        return [json.loads(l) for (l,) in self._conexao().execute("SELECT linha FROM reservas ORDER BY id")]
+
+    def acrescentar_reservas(self, linhas: List[List[str]]):
+        registros = []
+        for linha in linhas:
+            try: criado = parser.parse(linha[0], dayfirst=True).strftime("%Y-%m-%d %H:%M:%S")
+            except Exception: criado = ""
+            status = linha[5].strip().upper() if len(linha) > 5 else ""
+            registros.append((criado, status, json.dumps(list(linha), ensure_ascii=False)))
+        con = self._conexao()
+        with con:
+            con.executemany("INSERT INTO reservas (criado_em, status, linha) VALUES (?, ?, ?)", registros)
+
+    def remover_reservas_pendentes(self, minutos: float, pode_continuar: Callable[[], bool]) -> int:
+        limite = datetime.now(ZoneInfo("America/Sao_Paulo")) - timedelta(minutes=minutos)
+        con = self._conexao()
+        with con:
+            return con.execute(
+                "DELETE FROM reservas WHERE status = 'PENDENTE' AND criado_em <> '' AND criado_em < ?",
+                (limite.strftime("%Y-%m-%d %H:%M:%S"),)
+            ).rowcount
+
+
+_local = None
+_lock_local = threading.Lock()
+
+def armazenamento_local() -> ArmazenamentoSQLite:
+    """Banco do processo (as conexões são por thread, o objeto é um só)."""
+    global _local
+    with _lock_local:
+        if _local is None: _local = ArmazenamentoSQLite()
+        return _local
+
+
+# --- Migração e espelho ---
+
+def migrar(origem: Armazenamento, destino: Armazenamento, lote: int = 5000, acrescentar: bool = False,
+           ao_gravar: Callable[[int, int], None] = None) -> Dict:
+    """Copia relatorio, vendedores e reservas de um armazenamento para outro."""
+    from google_planilha import GooglePlanilha
+    from importar_historico import enviar
+
+    if destino.tem_relatorio() and not acrescentar:
+        raise ValueError("o destino já tem registros no relatorio (use --acrescentar para somar)")
+    linhas = origem.sincronizar_relatorio(None).completo[1:]
+    # Mesmo envio em lotes da importação: espera a cota e repete em caso de 429
+    gravadas = enviar(GooglePlanilha(armazenamento=destino), linhas, 0, lote,
+                      lambda n: ao_gravar and ao_gravar(n, len(linhas)))
+    vendedores = origem.ler_vendedores()
+    destino.substituir_vendedores(vendedores)
+    reservas = origem.ler_reservas()
+    destino.acrescentar_reservas(reservas)
+
+    # O que acabou de ser copiado já está dos dois lados: o espelho começa daqui
+    local = destino if isinstance(destino, ArmazenamentoSQLite) else origem
+    if isinstance(local, ArmazenamentoSQLite):
+        local.definir_meta('espelho_relatorio', local.total_relatorio())
+        local.definir_meta('espelho_vendedores', local.meta('vendedores_versao') or 0)
+    return {"relatorio": gravadas, "vendedores": len(vendedores), "reservas": len(reservas)}
+
+
+def espelhar(local: ArmazenamentoSQLite, sheets: ArmazenamentoSheets, lote: int = 5000) -> Dict:
+    """Envia à planilha as linhas do relatorio ainda não espelhadas e, se mudou, o cadastro de vendedores."""
+    marca = int(local.meta('espelho_relatorio') or 0)
+    linhas = local.linhas_relatorio(marca)
+    for inicio in range(0, len(linhas), lote):
+        bloco = linhas[inicio:inicio + lote]
+        sheets.acrescentar_relatorio(bloco)
+        marca += len(bloco)
+        local.definir_meta('espelho_relatorio', marca)   # uma queda no meio não reenvia o que já foi
+
+    versao = local.meta('vendedores_versao') or "0"
+    vendedores = 0
+    if versao != (local.meta('espelho_vendedores') or "0"):
+        lista = local.ler_vendedores()
+        sheets.substituir_vendedores(lista)
+        local.definir_meta('espelho_vendedores', versao)
+        vendedores = len(lista)
+    return {"relatorio": len(linhas), "vendedores": vendedores}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Migração entre Google Sheets e o banco local.")
+    sub = ap.add_subparsers(dest="comando", required=True)
+    mig = sub.add_parser("migrar")
+    mig.add_argument("origem", choices=["sheets", "sqlite"])
+    mig.add_argument("destino", choices=["sheets", "sqlite"])
+    mig.add_argument("--lote", type=int, default=5000)
+    mig.add_argument("--acrescentar", action="store_true", help="Aceita destino com registros")
+    esp = sub.add_parser("espelhar")
+    esp.add_argument("--lote", type=int, default=5000)
+    for p in (mig, esp): p.add_argument("--banco", default=ARQUIVO_BANCO)
+    args = ap.parse_args(argv)
+
+    from google_planilha import abrir_planilha, orcamento_processo
+    from fragmentacao import armazenamento_sheets
+
+    def abrir(tipo):
+        if tipo == "sqlite": return ArmazenamentoSQLite(args.banco)
+        # Com a aba roteamento, cada loja vai para o seu fragmento (ver fragmentacao)
+        client, planilha = abrir_planilha()
+        sheets = armazenamento_sheets(planilha, lambda tipo, n=1: [orcamento_processo.registrar(tipo) for _ in range(n)], client)
+        if not sheets.disponivel: raise SystemExit("❌ Aba relatorio não encontrada.")
+        return sheets
+
+    if args.comando == "espelhar":
+        r = espelhar(ArmazenamentoSQLite(args.banco), abrir("sheets"), args.lote)
+        print(f"✅ {r['relatorio']} linhas e {r['vendedores']} vendedores enviados à planilha")
+        return 0
+
+    if args.origem == args.destino:
+        print("❌ Origem e destino iguais.")
+        return 1
+    try:
+        r = migrar(abrir(args.origem), abrir(args.destino), args.lote, args.acrescentar)
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    print(f"✅ {r['relatorio']} linhas, {r['vendedores']} vendedores e {r['reservas']} reservas copiados")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
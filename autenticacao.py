@@ -0,0 +1,165 @@
+import os
+import hmac
+import time
+import base64
+import hashlib
+import logging
+import secrets
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import bcrypt
+
+from cadastro_usuarios import cadastro
+
+logger = logging.getLogger(__name__)
+
+# bcrypt libera o GIL: poucas threads bastam para tirar o hash da thread do script
+# sem deixar uma troca de turno ocupar todos os núcleos
+TRABALHADORES_LOGIN = int(os.environ.get("LOGIN_TRABALHADORES", max(1, min(2, os.cpu_count() or 1))))
+FILA_MAXIMA_LOGIN = int(os.environ.get("LOGIN_FILA_MAXIMA", TRABALHADORES_LOGIN * 8))
+TIMEOUT_LOGIN = 15
+
+TENTATIVAS_MAXIMAS = int(os.environ.get("LOGIN_TENTATIVAS_MAXIMAS", 5))
+JANELA_TENTATIVAS_S = int(os.environ.get("LOGIN_JANELA_S", 900))
+# Um turno: o token fica no histórico do navegador, então não deve durar além dele
+VALIDADE_SESSAO_S = int(os.environ.get("SESSAO_VALIDADE_H", 8)) * 3600
+
+_pool = ThreadPoolExecutor(max_workers=TRABALHADORES_LOGIN, thread_name_prefix="login-bcrypt")
+_vagas = threading.BoundedSemaphore(FILA_MAXIMA_LOGIN)
+
+
+class LimitadorTentativas:
+    """Conta falhas de senha por usuário; depois de TENTATIVAS_MAXIMAS a conta espera a janela passar."""
+
+    def __init__(self, maximo: int = TENTATIVAS_MAXIMAS, janela: int = JANELA_TENTATIVAS_S):
+        self.maximo = maximo
+        self.janela = janela
+        self._falhas = {}
+        self._lock = threading.Lock()
+
+    def espera(self, nome: str) -> int:
+        """Segundos até o usuário poder tentar de novo (0 = liberado)."""
+        agora = time.time()
+        with self._lock:
+            falhas = [t for t in self._falhas.get(nome, []) if agora - t < self.janela]
+            self._falhas[nome] = falhas
+            if len(falhas) < self.maximo: return 0
+            return int(falhas[0] + self.janela - agora) + 1
+
+    def falhou(self, nome: str):
+        with self._lock:
+            self._falhas.setdefault(nome, []).append(time.time())
+
+    def liberar(self, nome: str):
+        with self._lock:
+            self._falhas.pop(nome, None)
+
+
+limitador = LimitadorTentativas()
+# Hash de comparação para nomes inexistentes (mesmo custo de um usuário real)
+_HASH_FICTICIO = bcrypt.hashpw(b"fluxo-de-loja", bcrypt.gensalt(12)).decode()
+
+
+def verificar_senha(nome: str, senha: str, senha_hash: Optional[str]) -> Tuple[bool, str]:
+    """
+    Confere a senha num trabalhador do pool. Retorna (ok, mensagem de erro).
+    Usuário inexistente também gasta um hash, para não revelar quais nomes existem.
+    """
+    espera = limitador.espera(nome)
+    if espera:
+        return False, f"🔒 Muitas tentativas para {nome}. Tente novamente em {espera // 60 + 1} min."
+    if not _vagas.acquire(blocking=False):
+        return False, "⏳ Muitos acessos ao mesmo tempo. Tente novamente em instantes."
+    try:
+        alvo = (senha_hash or _HASH_FICTICIO).encode()
+        ok = _pool.submit(bcrypt.checkpw, senha.encode(), alvo).result(timeout=TIMEOUT_LOGIN) and bool(senha_hash)
+    except Exception as e:
+        logger.warning("Falha ao verificar senha de %s: %s", nome, e)
+        return False, "❌ Não foi possível verificar a senha. Tente novamente."
+    finally:
+        _vagas.release()
+
+    if ok:
+        limitador.liberar(nome)
+        return True, ""
+    limitador.falhou(nome)
+    return False, "❌ Usuário ou senha incorretos."
+
+
+# --- Token de sessão ---
+#
+# O token vai em ?sessao= na URL (o Streamlit não grava cookies), então aparece no
+# histórico do navegador e nos logs de acesso de qualquer proxy no caminho. Por isso
+# a assinatura sozinha não basta: cada token aponta para uma linha da tabela `sessoes`
+# do cadastro, conferida a cada validação. Sair ou trocar a senha apaga a linha e o
+# token deixa de valer em todos os processos, inclusive depois de um reinício.
+
+_SEGREDO_PROCESSO = None
+
+
+def _segredo() -> bytes:
+    global _SEGREDO_PROCESSO
+    segredo = os.environ.get("FLUXO_SEGREDO_SESSAO")
+    if not segredo:
+        try:
+            import streamlit as st
+            segredo = st.secrets.get("segredo_sessao")
+        except Exception:
+            segredo = None
+    if not segredo:
+        # Sem segredo configurado os tokens valem só enquanto o processo estiver no ar
+        if _SEGREDO_PROCESSO is None:
+            logger.warning("FLUXO_SEGREDO_SESSAO não definido; tokens de sessão não sobrevivem a reinícios")
+            _SEGREDO_PROCESSO = secrets.token_hex(32)
+        segredo = _SEGREDO_PROCESSO
+    return str(segredo).encode()
+
+
+def _assinar(conteudo: str) -> str:
+    return hmac.new(_segredo(), conteudo.encode(), hashlib.sha256).hexdigest()[:32]
+
+
+def emitir_token(nome: str, validade: int = VALIDADE_SESSAO_S) -> str:
+    """Abre a sessão no cadastro e devolve o token que aponta para ela."""
+    expira = int(time.time()) + validade
+    sessao_id = secrets.token_hex(16)
+    cadastro().abrir_sessao(sessao_id, nome, expira)
+    conteudo = f"{nome}|{expira}|{sessao_id}"
+    bruto = f"{conteudo}|{_assinar(conteudo)}".encode()
+    return base64.urlsafe_b64encode(bruto).decode().rstrip("=")
+
+
+def _ler_token(token: str) -> Optional[Tuple[str, str]]:
+    """(nome, id da sessão) de um token bem assinado e no prazo; None caso contrário."""
+    if not token: return None
+    try:
+        bruto = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+        nome, expira, sessao_id, assinatura = bruto.split("|")
+    except Exception:
+        return None
+    if not hmac.compare_digest(assinatura, _assinar(f"{nome}|{expira}|{sessao_id}")): return None
+    if int(expira) < time.time(): return None
+    return nome, sessao_id
+
+
+def validar_token(token: str) -> Optional[str]:
+    """Nome do usuário do token, ou None se for inválido, expirado ou se a sessão foi encerrada."""
+    lido = _ler_token(token)
+    if lido is None: return None
+    nome, sessao_id = lido
+    try:
+        return nome if cadastro().sessao_ativa(sessao_id, nome) else None
+    except Exception as e:
+        logger.warning("Falha ao conferir a sessão de %s: %s", nome, e)
+        return None
+
+
+def revogar_token(token: str):
+    lido = _ler_token(token)
+    if lido is None: return
+    try:
+        cadastro().encerrar_sessao(lido[1])
+    except Exception as e:
+        logger.warning("Falha ao encerrar a sessão de %s: %s", lido[0], e)
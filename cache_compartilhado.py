@@ -0,0 +1,85 @@
+import threading
+import time
+
+
+class CacheCompartilhado:
+    """
+    Cache em memória compartilhado por todas as sessões do servidor.
+    Cada entrada guarda o valor e o instante em que foi carregada.
+    """
+
+    def __init__(self):
+        self._dados = {}
+        self._lock = threading.Lock()
+        self._locks_chave = {}   # chave -> [lock, quantos esperam ou carregam]; sai quando ninguém usa
+
+    def obter(self, chave, ttl: float = None):
+        with self._lock:
+            item = self._dados.get(chave)
+        if item is None: return None
+        valor, carregado_em = item
+        if ttl is not None and time.time() - carregado_em > ttl: return None
+        return valor
+
+    def idade(self, chave):
+        """Segundos desde o carregamento da entrada (None se não existir)."""
+        with self._lock:
+            item = self._dados.get(chave)
+        return None if item is None else time.time() - item[1]
+
+    def definir(self, chave, valor):
+        with self._lock:
+            self._dados[chave] = (valor, time.time())
+
+    def atualizar(self, chave, funcao):
+        """
+        Substitui o valor por `funcao(valor_atual)` mantendo o instante de carregamento,
+        para que a entrada continue expirando no TTL original. Não faz nada se a chave não existir.
+        """
+        with self._lock:
+            item = self._dados.get(chave)
+            if item is not None:
+                self._dados[chave] = (funcao(item[0]), item[1])
+
+    def remover(self, chave):
+        with self._lock:
+            self._dados.pop(chave, None)
+
+    def remover_prefixo(self, prefixo: tuple):
+        """Remove todas as chaves (tuplas) que começam com o prefixo informado."""
+        with self._lock:
+            for chave in [c for c in self._dados if isinstance(c, tuple) and c[:len(prefixo)] == prefixo]:
+                del self._dados[chave]
+
+    def limpar(self):
+        with self._lock:
+            self._dados.clear()
+
+    def obter_ou_carregar(self, chave, carregar, ttl: float = None):
+        """
+        Retorna o valor em cache ou executa `carregar()` uma única vez,
+        mesmo que várias sessões (ou o aquecimento) peçam a mesma chave ao mesmo tempo.
+        """
+        valor = self.obter(chave, ttl)
+        if valor is not None: return valor
+
+        with self._lock:
+            entrada = self._locks_chave.setdefault(chave, [threading.Lock(), 0])
+            entrada[1] += 1
+        try:
+            with entrada[0]:
+                # Outra thread pode ter carregado enquanto esperávamos
+                valor = self.obter(chave, ttl)
+                if valor is not None: return valor
+                valor = carregar()
+                if valor is not None: self.definir(chave, valor)
+                return valor
+        finally:
+            # Chaves com dia e loja não param de surgir: o lock não fica depois da carga
+            with self._lock:
+                entrada[1] -= 1
+                if not entrada[1]: del self._locks_chave[chave]
+
+
+# Instância única do processo (módulos importados sobrevivem aos reruns do Streamlit)
+cache = CacheCompartilhado()
@@ -0,0 +1,181 @@
+"""
+Cadastro de acessos (usuários e lojas) em SQLite.
+
+Substitui a regravação do usuarios.json inteiro: cada inclusão ou troca de senha é uma
+única instrução atômica, e o login consulta pela chave primária. Na primeira abertura,
+se o banco estiver vazio, os acessos do usuarios.json são importados.
+
+As sessões abertas no login também ficam aqui: o token da URL só vale enquanto a
+sessão dele existir, então sair ou trocar a senha derruba o token em qualquer processo.
+
+Uso (migração manual):
+    python cadastro_usuarios.py migrar [usuarios.json]
+"""
+import os
+import sys
+import json
+import sqlite3
+import logging
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+ARQUIVO_BANCO = os.environ.get("FLUXO_USUARIOS_DB", os.path.join("dados", "usuarios.db"))
+ARQUIVO_JSON = "usuarios.json"
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS usuarios (
+    nome        TEXT PRIMARY KEY,
+    senha_hash  TEXT NOT NULL,
+    tipo        TEXT NOT NULL CHECK (tipo IN ('usuario', 'loja')),
+    criado_em   TEXT NOT NULL,
+    alterado_em TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_usuarios_tipo ON usuarios (tipo, nome);
+CREATE TABLE IF NOT EXISTS meta (chave TEXT PRIMARY KEY, valor TEXT);
+CREATE TABLE IF NOT EXISTS sessoes (
+    id        TEXT PRIMARY KEY,
+    nome      TEXT NOT NULL,
+    expira_em REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessoes_nome ON sessoes (nome);
+"""
+
+
+def tipo_acesso(nome: str) -> str:
+    """Acessos "LOJAxx" são lojas; o resto são pessoas (mesma regra do usuarios.json)."""
+    return 'loja' if nome.upper().startswith("LOJA") else 'usuario'
+
+
+class CadastroUsuarios:
+    def __init__(self, caminho: str = ARQUIVO_BANCO):
+        self.caminho = caminho
+        pasta = os.path.dirname(caminho)
+        if pasta: os.makedirs(pasta, exist_ok=True)
+        self._local = threading.local()
+        with self._conexao() as con:
+            con.executescript(ESQUEMA)
+
+    def _conexao(self) -> sqlite3.Connection:
+        # Uma conexão por thread (cada sessão do Streamlit roda na sua)
+        con = getattr(self._local, 'con', None)
+        if con is None:
+            con = sqlite3.connect(self.caminho, timeout=10)
+            con.row_factory = sqlite3.Row
+            con.execute("PRAGMA journal_mode=WAL")
+            self._local.con = con
+        return con
+
+    # --- Consultas ---
+
+    def buscar(self, nome: str) -> Optional[Dict]:
+        linha = self._conexao().execute(
+            "SELECT nome, senha_hash, tipo FROM usuarios WHERE nome = ?", (nome.strip().upper(),)
+        ).fetchone()
+        return dict(linha) if linha else None
+
+    def existe(self, nome: str) -> bool:
+        return self._conexao().execute(
+            "SELECT 1 FROM usuarios WHERE nome = ?", (nome.strip().upper(),)
+        ).fetchone() is not None
+
+    def listar(self, tipo: str = None) -> List[str]:
+        if tipo:
+            linhas = self._conexao().execute("SELECT nome FROM usuarios WHERE tipo = ? ORDER BY nome", (tipo,))
+        else:
+            linhas = self._conexao().execute("SELECT nome FROM usuarios ORDER BY nome")
+        return [l['nome'] for l in linhas]
+
+    def listar_lojas(self) -> List[str]:
+        return self.listar('loja')
+
+    # --- Alterações ---
+
+    def inserir(self, nome: str, senha_hash: str) -> bool:
+        """Cadastra o acesso. Retorna False se o nome já existir."""
+        nome = nome.strip().upper()
+        agora = datetime.now().isoformat(timespec="seconds")
+        try:
+            with self._conexao() as con:
+                con.execute("INSERT INTO usuarios VALUES (?, ?, ?, ?, ?)",
+                            (nome, senha_hash, tipo_acesso(nome), agora, agora))
+            return True
+        except sqlite3.IntegrityError:
+            return False
+
+    def alterar_senha(self, nome: str, senha_hash: str) -> bool:
+        """Troca a senha e encerra as sessões abertas com a senha antiga."""
+        nome = nome.strip().upper()
+        with self._conexao() as con:
+            cursor = con.execute("UPDATE usuarios SET senha_hash = ?, alterado_em = ? WHERE nome = ?",
+                                 (senha_hash, datetime.now().isoformat(timespec="seconds"), nome))
+            con.execute("DELETE FROM sessoes WHERE nome = ?", (nome,))
+        return cursor.rowcount == 1
+
+    # --- Sessões ---
+
+    def abrir_sessao(self, sessao_id: str, nome: str, expira_em: float):
+        with self._conexao() as con:
+            # Aproveita a escrita para tirar as vencidas (a tabela não cresce sem limite)
+            con.execute("DELETE FROM sessoes WHERE expira_em < ?", (time.time(),))
+            con.execute("INSERT INTO sessoes VALUES (?, ?, ?)", (sessao_id, nome.strip().upper(), expira_em))
+
+    def sessao_ativa(self, sessao_id: str, nome: str) -> bool:
+        return self._conexao().execute(
+            "SELECT 1 FROM sessoes WHERE id = ? AND nome = ? AND expira_em >= ?",
+            (sessao_id, nome.strip().upper(), time.time())
+        ).fetchone() is not None
+
+    def encerrar_sessao(self, sessao_id: str):
+        with self._conexao() as con:
+            con.execute("DELETE FROM sessoes WHERE id = ?", (sessao_id,))
+
+    # --- Migração ---
+
+    def migrar_de_json(self, caminho: str = ARQUIVO_JSON, forcar: bool = False) -> int:
+        """Importa os acessos do usuarios.json uma única vez. Retorna quantos entraram."""
+        con = self._conexao()
+        if not forcar and con.execute("SELECT 1 FROM meta WHERE chave = 'migrado_de_json'").fetchone():
+            return 0
+        if not os.path.exists(caminho): return 0
+        with open(caminho, "r", encoding="utf-8") as f:
+            usuarios = json.load(f).get("usuarios", [])
+
+        agora = datetime.now().isoformat(timespec="seconds")
+        with con:
+            antes = con.total_changes
+            con.executemany(
+                "INSERT OR IGNORE INTO usuarios VALUES (?, ?, ?, ?, ?)",
+                [(u["nome"].strip().upper(), u["senha_hash"], tipo_acesso(u["nome"]), agora, agora) for u in usuarios]
+            )
+            importados = con.total_changes - antes
+            con.execute("INSERT OR REPLACE INTO meta VALUES ('migrado_de_json', ?)", (agora,))
+        logger.info("%s acessos importados de %s", importados, caminho)
+        return importados
+
+
+_cadastro = None
+_lock = threading.Lock()
+
+
+def cadastro() -> CadastroUsuarios:
+    """Cadastro do processo; na primeira chamada aplica a migração do usuarios.json."""
+    global _cadastro
+    if _cadastro is None:
+        with _lock:
+            if _cadastro is None:
+                novo = CadastroUsuarios()
+                novo.migrar_de_json()
+                _cadastro = novo
+    return _cadastro
+
+
+if __name__ == "__main__":
+    if len(sys.argv) >= 2 and sys.argv[1] == "migrar":
+        total = CadastroUsuarios().migrar_de_json(sys.argv[2] if len(sys.argv) > 2 else ARQUIVO_JSON, forcar=True)
+        print(f"✅ {total} acessos importados para {ARQUIVO_BANCO}")
+    else:
+        print(__doc__)
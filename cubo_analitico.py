@@ -0,0 +1,190 @@
+import os
+import threading
+import logging
+from datetime import date
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+from cache_compartilhado import cache
+from snapshot_relatorio import COLUNAS_METRICAS
+
+logger = logging.getLogger(__name__)
+
+ARQUIVO_CUBO = os.environ.get("FLUXO_CUBO_ARQUIVO", os.path.join("dados", "cubo_relatorio.npz"))
+_EPOCA_ORDINAL = date(1970, 1, 1).toordinal()
+
+
+def _nome_arquivo(metrica: str) -> str:
+    return "m_" + metrica.replace(" ", "_")
+
+
+class CuboAnalitico:
+    """
+    Cubo (LOJA, VENDEDOR, DATA) x métricas do relatorio, guardado só com as células
+    preenchidas. É atualizado de forma incremental a partir do snapshot: `linhas_processadas`
+    marca até qual linha do relatorio já foi somada.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.edicao = 0   # edição do snapshot já processada (ver SnapshotRelatorio.com_blocos)
+        self._zerar()
+
+    def _zerar(self):
+        self.categorias = {'LOJA': [], 'VENDEDOR': []}
+        self._indices = {'LOJA': {}, 'VENDEDOR': {}}
+        self.loja = np.array([], dtype=np.uint16)
+        self.vendedor = np.array([], dtype=np.uint16)
+        self.dia = np.array([], dtype=np.int32)
+        self.metricas = {m: np.array([], dtype=np.int32) for m in COLUNAS_METRICAS}
+        self.linhas_processadas = 0
+
+    def __len__(self):
+        return len(self.dia)
+
+    def _codigo(self, dimensao: str, valor: str) -> int:
+        valor = str(valor).strip().upper()
+        indice = self._indices[dimensao]
+        if valor not in indice:
+            indice[valor] = len(indice)
+            self.categorias[dimensao].append(valor)
+        return indice[valor]
+
+    # --- Atualização ---
+
+    def atualizar(self, snap) -> int:
+        """Soma ao cubo as linhas do snapshot ainda não processadas. Retorna quantas entraram."""
+        with self._lock:
+            total = len(snap)
+            if total < self.linhas_processadas:
+                # Linhas apagadas na planilha: o marcador não vale mais, refaz do zero
+                logger.warning("Relatorio encolheu (%s < %s); recalculando o cubo", total, self.linhas_processadas)
+                self._zerar()
+            elif snap.edicao != self.edicao:
+                logger.info("Linhas do relatorio editadas na planilha; recalculando o cubo")
+                self._zerar()
+            self.edicao = snap.edicao
+            inicio = self.linhas_processadas
+            if total == inicio: return 0
+
+            sel = np.arange(inicio, total)
+            sel = sel[snap.data[sel] > 0]
+            mapa_loja = np.array([self._codigo('LOJA', v) for v in snap.categorias['LOJA']], dtype=np.int64)
+            mapa_vend = np.array([self._codigo('VENDEDOR', v) for v in snap.categorias['VENDEDOR']], dtype=np.int64)
+
+            if len(sel):
+                novos = pd.DataFrame({
+                    'loja': mapa_loja[snap.codigos['LOJA'][sel]],
+                    'vendedor': mapa_vend[snap.codigos['VENDEDOR'][sel]],
+                    'dia': snap.data[sel],
+                    **{m: snap.metricas[m][sel].astype(np.int32) for m in COLUNAS_METRICAS},
+                })
+                celulas = pd.concat([self._celulas(), novos], ignore_index=True)
+                celulas = celulas.groupby(['dia', 'loja', 'vendedor'], sort=True).sum().reset_index()
+                self._definir(celulas)
+
+            self.linhas_processadas = total
+            return total - inicio
+
+    def _celulas(self) -> pd.DataFrame:
+        return pd.DataFrame({
+            'loja': self.loja.astype(np.int64), 'vendedor': self.vendedor.astype(np.int64), 'dia': self.dia,
+            **self.metricas,
+        })
+
+    def _definir(self, celulas: pd.DataFrame):
+        self.loja = celulas['loja'].to_numpy(np.uint16)
+        self.vendedor = celulas['vendedor'].to_numpy(np.uint16)
+        self.dia = celulas['dia'].to_numpy(np.int32)
+        self.metricas = {m: celulas[m].to_numpy(np.int32) for m in COLUNAS_METRICAS}
+
+    # --- Arquivo colunar ---
+
+    def salvar(self, caminho: str = ARQUIVO_CUBO):
+        with self._lock:
+            pasta = os.path.dirname(caminho)
+            if pasta: os.makedirs(pasta, exist_ok=True)
+            temporario = caminho + ".tmp.npz"
+            np.savez_compressed(
+                temporario,
+                loja=self.loja, vendedor=self.vendedor, dia=self.dia,
+                categorias_loja=np.array(self.categorias['LOJA'], dtype=str),
+                categorias_vendedor=np.array(self.categorias['VENDEDOR'], dtype=str),
+                linhas_processadas=np.array([self.linhas_processadas], dtype=np.int64),
+                **{_nome_arquivo(m): arr for m, arr in self.metricas.items()},
+            )
+            os.replace(temporario, caminho)
+
+    @classmethod
+    def carregar(cls, caminho: str = ARQUIVO_CUBO) -> "CuboAnalitico":
+        cubo = cls()
+        if not os.path.exists(caminho): return cubo
+        try:
+            with np.load(caminho) as dados:
+                for dimensao, chave in (('LOJA', 'categorias_loja'), ('VENDEDOR', 'categorias_vendedor')):
+                    for valor in dados[chave].tolist(): cubo._codigo(dimensao, valor)
+                cubo.loja, cubo.vendedor, cubo.dia = dados['loja'], dados['vendedor'], dados['dia']
+                cubo.metricas = {m: dados[_nome_arquivo(m)] for m in COLUNAS_METRICAS}
+                cubo.linhas_processadas = int(dados['linhas_processadas'][0])
+        except Exception as e:
+            logger.warning("Cubo em %s ilegível (%s); será recalculado", caminho, e)
+            cubo = cls()
+        return cubo
+
+    # --- Consultas ---
+
+    def _mascara(self, loja: str = None, vendedor: str = None, inicio: date = None, fim: date = None) -> np.ndarray:
+        mascara = np.ones(len(self), dtype=bool)
+        for dimensao, valor, coluna in (('LOJA', loja, self.loja), ('VENDEDOR', vendedor, self.vendedor)):
+            if valor:
+                codigo = self._indices[dimensao].get(str(valor).strip().upper(), -1)
+                mascara &= coluna == codigo
+        if inicio: mascara &= self.dia >= inicio.toordinal()
+        if fim: mascara &= self.dia <= fim.toordinal()
+        return mascara
+
+    def agregar(self, periodo: str = 'dia', por: List[str] = (), loja: str = None, vendedor: str = None,
+                inicio: date = None, fim: date = None) -> pd.DataFrame:
+        """
+        Totais por período ('dia', 'semana' ou 'mes') e pelas dimensões em `por`
+        ('LOJA' e/ou 'VENDEDOR'). A coluna PERIODO traz a data de início do período.
+        """
+        with self._lock:
+            m = self._mascara(loja, vendedor, inicio, fim)
+            dias = (self.dia[m].astype(np.int64) - _EPOCA_ORDINAL).astype('datetime64[D]')
+            if periodo == 'semana':
+                # Ordinal 1 (01/01/0001) é segunda-feira: volta até a segunda da semana
+                dias = dias - ((self.dia[m] + 6) % 7).astype('timedelta64[D]')
+            elif periodo == 'mes':
+                dias = dias.astype('datetime64[M]').astype('datetime64[D]')
+            df = pd.DataFrame({'PERIODO': dias, **{k: v[m] for k, v in self.metricas.items()}})
+            for dimensao in por:
+                codigos = (self.loja if dimensao == 'LOJA' else self.vendedor)[m]
+                df[dimensao] = np.asarray(self.categorias[dimensao], dtype=object)[codigos] if len(codigos) else []
+        return df.groupby(['PERIODO', *por], sort=True).sum().reset_index()
+
+    def totais(self, inicio: date, fim: date, loja: str = None, vendedor: str = None) -> Dict[str, int]:
+        with self._lock:
+            m = self._mascara(loja, vendedor, inicio, fim)
+            return {k: int(v[m].sum()) for k, v in self.metricas.items()}
+
+    def comparar_periodos(self, periodo_a: tuple, periodo_b: tuple, loja: str = None,
+                          vendedor: str = None) -> pd.DataFrame:
+        """Totais de dois intervalos (inicio, fim) lado a lado, com a variação percentual de B sobre A."""
+        a = self.totais(*periodo_a, loja=loja, vendedor=vendedor)
+        b = self.totais(*periodo_b, loja=loja, vendedor=vendedor)
+        return pd.DataFrame([
+            {'MÉTRICA': k, 'PERÍODO A': a[k], 'PERÍODO B': b[k],
+             'VARIAÇÃO %': round((b[k] - a[k]) / abs(a[k]) * 100, 1) if a[k] else None}
+            for k in COLUNAS_METRICAS
+        ])
+
+
+def cubo_atualizado(gsheets) -> CuboAnalitico:
+    """Cubo do processo (carregado do arquivo uma vez), com as linhas novas do relatorio somadas."""
+    cubo = cache.obter_ou_carregar(('cubo',), CuboAnalitico.carregar)
+    if cubo.atualizar(gsheets.get_snapshot_relatorio()):
+        try: cubo.salvar()
+        except OSError as e: logger.warning("Não foi possível gravar o cubo: %s", e)
+    return cubo
@@ -0,0 +1,162 @@
+"""
+Eventos de mudança gravados pelo GooglePlanilha, para o resto do processo não precisar reler a planilha.
+
+Cada gravação bem-sucedida publica um `Evento` no `barramento`:
+  - ATENDIMENTOS: linhas acrescentadas ao relatorio (na ordem de COLUNAS_RELATORIO);
+  - VENDEDORES: cadastro alterado ({"row", "STATUS", "LOJAS"}) e vendedores novos;
+  - RESERVAS_LIMPAS: quantas reservas pendentes antigas foram apagadas.
+
+O evento vai primeiro para o log em disco (JSON por linha, só acréscimos) e depois para
+uma fila limitada, entregue aos assinantes numa thread própria. Quem publica nunca espera:
+com a fila cheia o evento fica só no log e o assinante, ao ver o salto em `seq`, recupera
+o que faltou com `reproduzir(desde=...)`. `seq` cresce por processo, continuando do log.
+"""
+import os
+import sys
+import json
+import time
+import queue
+import logging
+import argparse
+import threading
+from dataclasses import asdict, dataclass, field
+from typing import Callable, Dict, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Vazio desativa o log (os assinantes continuam recebendo)
+ARQUIVO_EVENTOS = os.environ.get("FLUXO_EVENTOS_ARQUIVO", os.path.join("dados", "eventos.jsonl"))
+TAMANHO_FILA = int(os.environ.get("FLUXO_EVENTOS_FILA", 1000))
+
+ATENDIMENTOS = "atendimentos"
+VENDEDORES = "vendedores"
+RESERVAS_LIMPAS = "reservas_limpas"
+TIPOS = (ATENDIMENTOS, VENDEDORES, RESERVAS_LIMPAS)
+
+
+@dataclass(frozen=True)
+class Evento:
+    seq: int
+    tipo: str
+    dados: Dict
+    instante: float = field(default_factory=time.time)
+
+
+@dataclass(eq=False)   # cancelar tira esta assinatura, não outra igual
+class _Assinatura:
+    funcao: Callable[[Evento], None]
+    tipos: Optional[frozenset]
+
+
+class BarramentoEventos:
+    """Fila limitada com assinantes e log de eventos em disco."""
+
+    def __init__(self, arquivo: str = ARQUIVO_EVENTOS, tamanho_fila: int = TAMANHO_FILA):
+        self.arquivo = arquivo
+        self._fila = queue.Queue(maxsize=tamanho_fila)
+        self._assinaturas: List[_Assinatura] = []
+        self._lock = threading.Lock()
+        self._seq = None          # lido do fim do log na primeira publicação
+        self._linha_aberta = False   # o log terminou no meio de uma linha (queda durante a gravação)
+        self._thread = None
+        self.descartados = 0      # eventos que não couberam na fila (estão no log)
+
+    # --- Publicação ---
+
+    def _ultimo_seq(self) -> int:
+        if not self.arquivo or not os.path.exists(self.arquivo): return 0
+        with open(self.arquivo, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 65536))
+            fim = f.read()
+            self._linha_aberta = bool(fim) and not fim.endswith(b"\n")
+            for linha in reversed(fim.splitlines()):
+                try: return int(json.loads(linha)["seq"])
+                except (ValueError, KeyError): continue   # linha cortada por uma queda no meio da gravação
+        return 0
+
+    def publicar(self, tipo: str, dados: Dict) -> Evento:
+        if tipo not in TIPOS: raise ValueError(f"Tipo de evento desconhecido: {tipo}")
+        with self._lock:   # seq e ordem no log andam juntos
+            if self._seq is None: self._seq = self._ultimo_seq()
+            self._seq += 1
+            evento = Evento(self._seq, tipo, dados)
+            if self.arquivo:
+                try:
+                    pasta = os.path.dirname(self.arquivo)
+                    if pasta: os.makedirs(pasta, exist_ok=True)
+                    with open(self.arquivo, "a", encoding="utf-8") as f:
+                        if self._linha_aberta: f.write("\n")
+                        f.write(json.dumps(asdict(evento), ensure_ascii=False) + "\n")
+                    self._linha_aberta = False
+                except OSError as e:
+                    logger.warning("Não foi possível gravar o evento %s no log: %s", evento.seq, e)
+            if not self._assinaturas: return evento
+            try:
+                self._fila.put_nowait(evento)   # ainda dentro do lock: a fila fica na ordem de seq
+            except queue.Full:
+                self.descartados += 1
+                logger.warning("Fila de eventos cheia; evento %s só no log", evento.seq)
+        return evento
+
+    # --- Assinantes ---
+
+    def assinar(self, funcao: Callable[[Evento], None], tipos: List[str] = None) -> Callable[[], None]:
+        """Chama `funcao(evento)` (na thread de entrega) a cada evento; devolve a função que cancela."""
+        assinatura = _Assinatura(funcao, frozenset(tipos) if tipos else None)
+        with self._lock:
+            self._assinaturas.append(assinatura)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._entregar, name="eventos", daemon=True)
+                self._thread.start()
+
+        def cancelar():
+            with self._lock:
+                if assinatura in self._assinaturas: self._assinaturas.remove(assinatura)
+        return cancelar
+
+    def _entregar(self):
+        while True:
+            evento = self._fila.get()
+            with self._lock: assinaturas = list(self._assinaturas)
+            for a in assinaturas:
+                if a.tipos is not None and evento.tipo not in a.tipos: continue
+                try: a.funcao(evento)
+                except Exception as e: logger.warning("Assinante de eventos falhou no %s: %s", evento.seq, e)
+            self._fila.task_done()
+
+    def aguardar(self):
+        """Espera a entrega de tudo o que está na fila (scripts e testes)."""
+        self._fila.join()
+
+    # --- Log ---
+
+    def reproduzir(self, desde: int = 0, tipos: List[str] = None) -> Iterator[Evento]:
+        """Eventos do log com `seq` maior que `desde`, na ordem em que foram publicados."""
+        if not self.arquivo or not os.path.exists(self.arquivo): return
+        with open(self.arquivo, encoding="utf-8") as f:
+            for linha in f:
+                try: evento = Evento(**json.loads(linha))
+                except (ValueError, TypeError): continue
+                if evento.seq <= desde or (tipos and evento.tipo not in tipos): continue
+                yield evento
+
+
+barramento = BarramentoEventos()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Mostra os eventos do log.")
+    ap.add_argument("--desde", type=int, default=0, help="Só eventos com seq maior que este")
+    ap.add_argument("--tipos", help="Tipos separados por vírgula (padrão: todos)")
+    ap.add_argument("--arquivo", default=ARQUIVO_EVENTOS)
+    args = ap.parse_args(argv)
+
+    tipos = [t.strip() for t in args.tipos.split(",")] if args.tipos else None
+    for evento in BarramentoEventos(args.arquivo).reproduzir(args.desde, tipos):
+        print(json.dumps(asdict(evento), ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
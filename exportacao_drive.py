@@ -0,0 +1,320 @@
+"""
+Exportação incremental do relatorio para o Google Drive (Parquet compactado).
+
+A cada execução só as linhas novas desde a última exportação viram um arquivo
+"relatorio_g<geração>_<linha inicial>-<linha final>.parquet" na pasta do Drive, enviado
+em partes (upload resumível), com as células como estão na planilha. Com o relatorio
+fragmentado há um arquivo por fragmento ("relatorio_g<geração>_<fragmento>_...") e a
+coluna FRAGMENTO; LINHA é sempre a linha na aba de origem. O manifesto.json da pasta
+guarda a marca d'água de cada fragmento e a lista de arquivos; análises offline leem
+esses arquivos em vez da planilha (sem gastar cota).
+
+A marca d'água só conta posições. Quando as linhas já exportadas deixam de valer (aba
+encolheu, snapshot editado, última linha exportada mudou ou fragmentos redistribuídos),
+a exportação começa uma geração nova, do zero; `ler_exportacao` lê só a mais recente.
+
+Uso:
+    python exportacao_drive.py exportar                 # pasta DRIVE_PASTA_ID
+    python exportacao_drive.py exportar --local backup  # pasta local no lugar do Drive
+    python exportacao_drive.py baixar copia_local       # espelha o Drive numa pasta local
+    python exportacao_drive.py resumo copia_local       # lê a cópia local offline
+"""
+import io
+import os
+import sys
+import re
+import json
+import time
+import uuid
+import hashlib
+import logging
+import argparse
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from armazenamento import COLUNAS_RELATORIO
+from sincronizacao_blocos import hash_linha
+
+logger = logging.getLogger(__name__)
+
+MANIFESTO = "manifesto.json"
+MIME_PARQUET = "application/vnd.apache.parquet"
+TAMANHO_PARTE = int(os.environ.get("DRIVE_PARTE_MB", 5)) * 1024 * 1024   # múltiplo de 256 KB
+TENTATIVAS_PARTE = 5
+_PROCESSO = uuid.uuid4().hex   # a `edicao` dos snapshots só se compara dentro do mesmo processo
+
+
+class DriveGoogle:
+    """Pasta do Google Drive acessada com a conta de serviço do app (pydrive2)."""
+
+    def __init__(self, pasta_id: str, tamanho_parte: int = TAMANHO_PARTE):
+        from pydrive2.auth import GoogleAuth
+        from pydrive2.drive import GoogleDrive
+        from google_planilha import credenciais_servico
+
+        auth = GoogleAuth(settings={
+            "client_config_backend": "service",
+            "service_config": {"client_json_dict": dict(credenciais_servico())},
+        })
+        auth.ServiceAuth()
+        self.drive = GoogleDrive(auth)
+        self.pasta_id = pasta_id
+        self.tamanho_parte = tamanho_parte
+
+    def _arquivo(self, nome: str):
+        consulta = f"'{self.pasta_id}' in parents and title = '{nome}' and trashed = false"
+        achados = self.drive.ListFile({"q": consulta, "supportsAllDrives": True,
+                                       "includeItemsFromAllDrives": True}).GetList()
+        return achados[0] if achados else None
+
+    def listar(self) -> List[str]:
+        consulta = f"'{self.pasta_id}' in parents and trashed = false"
+        return sorted(f["title"] for f in self.drive.ListFile({"q": consulta, "supportsAllDrives": True,
+                                                                "includeItemsFromAllDrives": True}).GetList())
+
+    def ler(self, nome: str) -> Optional[bytes]:
+        arquivo = self._arquivo(nome)
+        if arquivo is None: return None
+        return arquivo.GetContentIOBuffer().read()
+
+    def gravar(self, nome: str, dados: bytes, mimetype: str, progresso: Callable = None):
+        """Upload resumível em partes de `tamanho_parte`; cada parte é reenviada se falhar."""
+        from googleapiclient.http import MediaIoBaseUpload
+
+        if self.drive.auth.service is None: self.drive.auth.Authorize()
+        arquivos = self.drive.auth.service.files()
+        midia = MediaIoBaseUpload(io.BytesIO(dados), mimetype, chunksize=self.tamanho_parte, resumable=True)
+        existente = self._arquivo(nome)
+        if existente:
+            # Reexportação do mesmo intervalo (ex.: execução anterior interrompida): substitui
+            pedido = arquivos.update(fileId=existente["id"], media_body=midia, supportsAllDrives=True)
+        else:
+            pedido = arquivos.insert(body={"title": nome, "parents": [{"id": self.pasta_id}], "mimeType": mimetype},
+                                     media_body=midia, supportsAllDrives=True)
+        resposta = None
+        while resposta is None:
+            status, resposta = pedido.next_chunk(num_retries=TENTATIVAS_PARTE)
+            if status and progresso: progresso(status.resumable_progress, len(dados))
+        if progresso: progresso(len(dados), len(dados))
+
+
+class DriveLocal:
+    """
+    Substituto local do Drive (uma pasta), com o mesmo envio em partes. Serve para
+    testes, para ler a cópia baixada offline e como destino quando não há Drive.
+    `falhar_na_parte` simula uma queda no meio do upload.
+    """
+
+    def __init__(self, pasta: str, tamanho_parte: int = TAMANHO_PARTE, falhar_na_parte: int = None):
+        self.pasta = pasta
+        self.tamanho_parte = tamanho_parte
+        self.falhar_na_parte = falhar_na_parte
+        os.makedirs(pasta, exist_ok=True)
+
+    def listar(self) -> List[str]:
+        return sorted(n for n in os.listdir(self.pasta) if not n.endswith(".parcial"))
+
+    def ler(self, nome: str) -> Optional[bytes]:
+        caminho = os.path.join(self.pasta, nome)
+        if not os.path.exists(caminho): return None
+        with open(caminho, "rb") as f: return f.read()
+
+    def gravar(self, nome: str, dados: bytes, mimetype: str, progresso: Callable = None):
+        parcial = os.path.join(self.pasta, nome + ".parcial")
+        # Retoma de onde o envio anterior parou, se o começo do arquivo for o mesmo
+        enviado = os.path.getsize(parcial) if os.path.exists(parcial) else 0
+        if enviado:
+            with open(parcial, "rb") as f:
+                if f.read() != dados[:enviado]: enviado = 0
+        with open(parcial, "r+b" if enviado else "wb") as f:
+            f.seek(enviado)
+            f.truncate()
+            parte = enviado // self.tamanho_parte
+            while enviado < len(dados):
+                if self.falhar_na_parte is not None and parte == self.falhar_na_parte:
+                    self.falhar_na_parte = None
+                    raise ConnectionError(f"queda simulada na parte {parte}")
+                f.write(dados[enviado:enviado + self.tamanho_parte])
+                f.flush()
+                enviado = min(len(dados), enviado + self.tamanho_parte)
+                parte += 1
+                if progresso: progresso(enviado, len(dados))
+        os.replace(parcial, os.path.join(self.pasta, nome))
+
+
+def destino_padrao():
+    """Drive se DRIVE_PASTA_ID estiver definido; senão a pasta EXPORTACAO_LOCAL; senão nenhum."""
+    if os.environ.get("DRIVE_PASTA_ID"): return DriveGoogle(os.environ["DRIVE_PASTA_ID"])
+    if os.environ.get("EXPORTACAO_LOCAL"): return DriveLocal(os.environ["EXPORTACAO_LOCAL"])
+    return None
+
+
+# --- Manifesto ---
+
+def ler_manifesto(destino) -> Dict:
+    bruto = destino.ler(MANIFESTO)
+    if not bruto: return {"geracao": 1, "fragmentos": {}, "partes": []}
+    return json.loads(bruto.decode("utf-8"))
+
+
+def _gravar_manifesto(destino, manifesto: Dict):
+    destino.gravar(MANIFESTO, json.dumps(manifesto, indent=2, ensure_ascii=False).encode("utf-8"), "application/json")
+
+
+# --- Exportação ---
+
+def _rotulo(nome: str) -> str:
+    return re.sub(r"[^\w.-]+", "-", nome).strip("-") or "principal"
+
+
+def _ler_linhas(armazenamento, inicio: int, fim: int) -> List[List[str]]:
+    # Células como estão na planilha: o snapshot corta métricas, zera datas inválidas etc.
+    if fim <= inicio: return []
+    return armazenamento.ler_colunas_relatorio(COLUNAS_RELATORIO, inicio, fim)
+
+
+def _motivo_nova_geracao(manifesto: Dict, snaps: Dict, ler: Callable) -> Optional[str]:
+    """Por que as linhas já exportadas deixaram de valer (None se continuam valendo)."""
+    marcas = manifesto.get("fragmentos")
+    if not marcas: return "manifesto sem marca por fragmento" if manifesto["partes"] else None
+    if set(marcas) != set(snaps): return "fragmentos do relatorio mudaram"
+    for nome, snap in snaps.items():
+        marca, inicio = marcas[nome], marcas[nome]["linhas_exportadas"]
+        if len(snap) < inicio: return f"fragmento '{nome}' encolheu ({len(snap)} < {inicio})"
+        # `edicao` é contada por processo: de outro processo vale só a conferência da última linha
+        if marca.get("processo") == _PROCESSO and marca.get("edicao") != snap.edicao:
+            return f"fragmento '{nome}' foi editado"
+        if inicio and str(hash_linha(next(iter(ler(nome, inicio - 1, inicio)), []))) != marca.get("ultima_linha"):
+            return f"linhas já exportadas do fragmento '{nome}' mudaram de lugar"
+    return None
+
+
+def exportar_incremental(gsheets, destino) -> Dict:
+    """Envia as linhas do relatorio ainda não exportadas. Retorna o resumo da execução."""
+    t0 = time.perf_counter()
+    gsheets.recarregar_cache()   # tamanho e edição atuais de cada fragmento
+    fragmentado = gsheets.fragmentado
+    snaps = {nome: gsheets.get_snapshot_fragmento(nome) for nome in gsheets.armazenamento.nomes_fragmentos()}
+    ler = lambda nome, inicio, fim: _ler_linhas(gsheets.armazenamento.fragmento(nome), inicio, fim)
+    manifesto = ler_manifesto(destino)
+    motivo = _motivo_nova_geracao(manifesto, snaps, ler)
+    if motivo:
+        logger.warning("Exportação recomeça na geração %s: %s", manifesto["geracao"] + 1, motivo)
+        manifesto = {"geracao": manifesto["geracao"] + 1, "fragmentos": {}, "partes": manifesto["partes"]}
+    marcas_antes = manifesto.get("fragmentos") or {}
+
+    marcas, arquivos, linhas_enviadas, enviados = {}, [], 0, 0
+    for nome, snap in snaps.items():
+        inicio = marcas_antes.get(nome, {}).get("linhas_exportadas", 0)
+        linhas = ler(nome, inicio, len(snap))
+        total = inicio + len(linhas)
+        marcas[nome] = {"linhas_exportadas": total, "edicao": snap.edicao, "processo": _PROCESSO,
+                        "ultima_linha": str(hash_linha(linhas[-1])) if linhas else marcas_antes.get(nome, {}).get("ultima_linha")}
+        if not linhas: continue
+
+        df = pd.DataFrame(linhas, columns=COLUNAS_RELATORIO)
+        df.insert(0, "LINHA", np.arange(inicio + 2, total + 2, dtype=np.int32))  # linha na aba (1 = cabeçalho)
+        if fragmentado: df.insert(1, "FRAGMENTO", nome)
+        buffer = io.BytesIO()
+        df.to_parquet(buffer, index=False, compression="zstd")
+        dados = buffer.getvalue()
+
+        rotulo = f"_{_rotulo(nome)}" if fragmentado else ""
+        arquivo = f"relatorio_g{manifesto['geracao']}{rotulo}_{inicio + 2:08d}-{total + 1:08d}.parquet"
+        destino.gravar(arquivo, dados, MIME_PARQUET)
+        manifesto["partes"].append({
+            "arquivo": arquivo, "geracao": manifesto["geracao"], "fragmento": nome, "linhas": [inicio, total],
+            "bytes": len(dados), "sha256": hashlib.sha256(dados).hexdigest(),
+            "exportado_em": datetime.now().isoformat(timespec="seconds"),
+        })
+        arquivos.append(arquivo)
+        linhas_enviadas += len(linhas)
+        enviados += len(dados)
+
+    if marcas != manifesto.get("fragmentos"):
+        manifesto["fragmentos"] = marcas
+        manifesto.pop("linhas_exportadas", None)   # formato anterior, de uma marca só
+        _gravar_manifesto(destino, manifesto)
+    return {"linhas": linhas_enviadas, "arquivos": arquivos, "bytes": enviados, "geracao": manifesto["geracao"],
+            "segundos": time.perf_counter() - t0}
+
+
+# --- Leitura offline ---
+
+def ler_exportacao(destino, geracao: int = None) -> pd.DataFrame:
+    """Todas as linhas exportadas (da geração atual, por padrão), na ordem da planilha."""
+    manifesto = ler_manifesto(destino)
+    geracao = geracao or manifesto["geracao"]
+    partes = []
+    for parte in manifesto["partes"]:
+        if parte["geracao"] != geracao: continue
+        dados = destino.ler(parte["arquivo"])
+        if dados is None: raise FileNotFoundError(parte["arquivo"])
+        if hashlib.sha256(dados).hexdigest() != parte["sha256"]:
+            raise ValueError(f"{parte['arquivo']} está corrompido (sha256 não confere)")
+        partes.append(pd.read_parquet(io.BytesIO(dados)))
+    if not partes: return pd.DataFrame()
+    df = pd.concat(partes, ignore_index=True)
+    for col in ("LOJA", "VENDEDOR", "CLIENTE"):
+        if col in df.columns: df[col] = df[col].astype(str).astype("category")
+    return df
+
+
+def snapshot_offline(destino):
+    """SnapshotRelatorio montado da exportação, para reutilizar cubo e relatórios sem a planilha."""
+    from google_planilha import GooglePlanilha
+    from snapshot_relatorio import SnapshotRelatorio
+    df = ler_exportacao(destino)
+    if df.empty: return SnapshotRelatorio.vazio()
+    colunas = GooglePlanilha.COLUNAS_RELATORIO
+    return SnapshotRelatorio.de_linhas(df[colunas].astype(str).values.tolist(), colunas)
+
+
+def baixar(destino, pasta_local: str) -> int:
+    """Copia manifesto e arquivos para uma pasta local (só o que ainda não estiver lá)."""
+    local = DriveLocal(pasta_local)
+    manifesto = ler_manifesto(destino)
+    copiados = 0
+    for parte in manifesto["partes"]:
+        if local.ler(parte["arquivo"]) is None:
+            local.gravar(parte["arquivo"], destino.ler(parte["arquivo"]), MIME_PARQUET)
+            copiados += 1
+    _gravar_manifesto(local, manifesto)
+    return copiados
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Exportação incremental do relatorio para o Drive.")
+    sub = ap.add_subparsers(dest="comando", required=True)
+    exp = sub.add_parser("exportar")
+    exp.add_argument("--local", help="Pasta local no lugar do Drive")
+    sub.add_parser("baixar").add_argument("pasta")
+    sub.add_parser("resumo").add_argument("pasta")
+    args = ap.parse_args(argv)
+
+    if args.comando == "resumo":
+        df = ler_exportacao(DriveLocal(args.pasta))
+        print(f"📄 {len(df)} linhas exportadas")
+        if not df.empty: print(df.groupby("LOJA", observed=True).size().to_string())
+        return 0
+
+    destino = DriveLocal(args.local) if getattr(args, "local", None) else destino_padrao()
+    if destino is None:
+        print("❌ Defina DRIVE_PASTA_ID (ou use --local).")
+        return 1
+    if args.comando == "baixar":
+        print(f"✅ {baixar(destino, args.pasta)} arquivos copiados para {args.pasta}")
+        return 0
+
+    from google_planilha import abrir_gsheets
+    resultado = exportar_incremental(abrir_gsheets(), destino)
+    print(f"✅ {resultado['linhas']} linhas exportadas" +
+          (f" em {', '.join(resultado['arquivos'])} ({resultado['bytes'] / 1024:.0f} KB)" if resultado['arquivos'] else ""))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,68 @@
+"""
+Peças comuns das telas de registro (venda, pesquisa, reservas, retorno, exame, Google).
+
+Os campos ficam dentro de um st.form: digitar ou trocar o vendedor não reexecuta o script.
+O envio roda num callback (`on_click`), antes do rerun que o próprio clique provoca: o
+callback valida, grava e troca a etapa, e esse único rerun já desenha a próxima tela.
+Erros de validação ficam guardados e aparecem na mesma tela nesse rerun.
+"""
+from typing import Dict, List
+import streamlit as st
+
+# Campos gravados por tipo de atendimento (os mesmos das telas de registro individuais)
+CAMPOS_POR_TIPO = {
+    "VENDA": {'atendimento': '1', 'receita': '1', 'venda': '1'},
+    "PERDA": {'atendimento': '1', 'receita': '1', 'perda': '1'},
+    "RESERVA": {'atendimento': '1', 'receita': '1', 'reserva': '1'},
+    "PESQUISA": {'atendimento': '1', 'pesquisa': '1'},
+    "EXAME": {'atendimento': '1', 'consulta': '1'},
+    "GOOGLE": {'atendimento': '1', 'google': '1'},
+}
+
+
+def vendedores_da_loja() -> List[str]:
+    if 'gsheets' not in st.session_state:
+        from google_planilha import GooglePlanilha
+        st.session_state.gsheets = GooglePlanilha()
+    vendedores = st.session_state.gsheets.get_vendedores_por_loja(st.session_state.loja)
+    return [v['VENDEDOR'] for v in vendedores] if vendedores else []
+
+
+def ir_para(etapa: str, limpar: tuple = ()):
+    """Callback dos botões de navegação: troca a etapa sem precisar de um st.rerun a mais."""
+    for chave in limpar: st.session_state.pop(chave, None)
+    st.session_state.etapa = etapa
+
+
+def botao_voltar(rotulo: str = "↩️ VOLTAR", etapa: str = 'atendimento', limpar: tuple = (), **kwargs):
+    st.button(rotulo, use_container_width=True, on_click=ir_para, args=(etapa, limpar), **kwargs)
+
+
+def avisar(mensagem: str):
+    st.session_state.aviso_formulario = mensagem
+
+
+def mostrar_aviso():
+    mensagem = st.session_state.pop('aviso_formulario', None)
+    if mensagem: st.error(mensagem)
+
+
+def valor(chave: str) -> str:
+    """Texto de um campo do formulário, sem espaços nas pontas e em maiúsculas."""
+    return str(st.session_state.get(chave) or "").strip().upper()
+
+
+def registrar(dados: Dict, sucesso: str, destino: str = 'loja') -> bool:
+    """Grava o atendimento (chamado de dentro do callback) e, se deu certo, segue para `destino`."""
+    try:
+        ok = st.session_state.gsheets.registrar_atendimento(dados)
+    except Exception as e:
+        avisar(f"❌ Erro ao salvar: {e}")
+        return False
+    if not ok:
+        avisar("❌ Erro ao salvar.")
+        return False
+    st.toast(sucesso)
+    st.balloons()
+    st.session_state.etapa = destino
+    return True
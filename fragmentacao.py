@@ -0,0 +1,277 @@
+"""
+Relatorio dividido por loja em fragmentos (outras abas ou outras planilhas).
+
+A tabela de roteamento é a aba "roteamento" da planilha principal:
+
+    LOJA | PLANILHA_ID | ABA
+
+Cada loja listada grava e lê o relatorio no seu fragmento: a aba ABA (padrão
+"relatorio") da planilha PLANILHA_ID (vazio: a própria planilha principal). Lojas fora
+da tabela continuam na aba relatorio da principal, o fragmento "". Vendedores e
+reservas ficam sempre na principal. Sem a aba roteamento nada muda.
+
+Depois de mudar a tabela, `python fragmentacao.py rebalancear --executar` leva as linhas
+já gravadas para o fragmento certo. Os processos em execução releem a tabela em até
+TTL_ROTEAMENTO segundos; o que gravarem nesse meio-tempo sai na próxima rodada.
+"""
+import sys
+import logging
+import argparse
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, List, Optional, Tuple
+
+from gspread.exceptions import APIError, WorksheetNotFound
+
+from cache_compartilhado import cache
+from sincronizacao_blocos import Alteracoes, hash_linha
+from armazenamento import COLUNAS_RELATORIO, ArmazenamentoSheets, chave_loja
+
+logger = logging.getLogger(__name__)
+
+ABA_ROTEAMENTO = "roteamento"
+CABECALHO_ROTEAMENTO = ["LOJA", "PLANILHA_ID", "ABA"]
+TTL_ROTEAMENTO = 600
+
+
+def em_paralelo(funcao: Callable, itens: List) -> List:
+    """`funcao` aplicada a cada item, em threads (uma chamada à API por fragmento ao mesmo tempo)."""
+    itens = list(itens)
+    if len(itens) <= 1: return [funcao(i) for i in itens]
+    with ThreadPoolExecutor(max_workers=min(8, len(itens)), thread_name_prefix="fragmento") as executor:
+        return list(executor.map(funcao, itens))
+
+
+def nome_fragmento(planilha_id: str, aba: str) -> str:
+    if not planilha_id: return "" if aba == "relatorio" else aba
+    return f"{planilha_id}/{aba}"
+
+
+def _separar_nome(nome: str) -> Tuple[str, str]:
+    planilha_id, _, aba = nome.rpartition("/")
+    return planilha_id, aba or "relatorio"
+
+
+def ler_roteamento(planilha, contar: Callable = None) -> Dict[str, Tuple[str, str]]:
+    """chave_loja -> (PLANILHA_ID, ABA); vazio se a aba roteamento não existir."""
+    contar = contar or (lambda tipo, quantidade=1: None)
+    try:
+        contar('leitura')
+        aba = planilha.worksheet(ABA_ROTEAMENTO)
+    except WorksheetNotFound:
+        return {}
+    contar('leitura')
+    rotas = {}
+    for linha in aba.get_all_values()[1:]:
+        loja, planilha_id, nome_aba = ([c.strip() for c in linha] + ["", "", ""])[:3]
+        if not loja: continue
+        rotas[chave_loja(loja)] = ("" if planilha_id == planilha.id else planilha_id, nome_aba or "relatorio")
+    return rotas
+
+
+def roteamento(planilha, contar: Callable = None) -> Dict[str, Tuple[str, str]]:
+    # Uma leitura por processo a cada TTL_ROTEAMENTO, não uma por sessão
+    return cache.obter_ou_carregar(('roteamento', planilha.id), lambda: ler_roteamento(planilha, contar), TTL_ROTEAMENTO)
+
+
+def _garantir_aba(fragmento: ArmazenamentoSheets):
+    """Cria a aba do fragmento (com o cabeçalho) se ela ainda não existir."""
+    if fragmento.aba_relatorio is not None: return
+    try:
+        fragmento._contar('escrita')
+        aba = fragmento.planilha.add_worksheet(fragmento.nome_aba_relatorio, rows=1000, cols=len(COLUNAS_RELATORIO))
+    except APIError:
+        # Outra sessão criou primeiro
+        fragmento._contar('leitura')
+        fragmento.aba_relatorio = fragmento.planilha.worksheet(fragmento.nome_aba_relatorio)
+        return
+    fragmento._contar('escrita')
+    aba.update("A1", [COLUNAS_RELATORIO])
+    fragmento.aba_relatorio = aba
+
+
+class ArmazenamentoFragmentado(ArmazenamentoSheets):
+    """
+    Planilha principal (vendedores, reservas, relatorio das lojas sem rota) mais os
+    fragmentos do relatorio. Cada gravação vai para o fragmento da loja da linha; a
+    leitura completa (`sincronizar_relatorio(None)`) junta todos, em paralelo.
+    """
+
+    def __init__(self, planilha, contar: Callable = None, rotas: Dict[str, Tuple[str, str]] = None,
+                 abrir: Callable[[str], object] = None):
+        super().__init__(planilha, contar)
+        self.rotas = rotas or {}
+        self._abrir = abrir   # PLANILHA_ID -> planilha (client.open_by_key)
+        self._fragmentos: Dict[str, ArmazenamentoSheets] = {}
+        self._lock_fragmentos = threading.Lock()
+
+    def nomes_fragmentos(self) -> List[str]:
+        return sorted({""} | {nome_fragmento(*rota) for rota in self.rotas.values()})
+
+    def fragmento_da_loja(self, loja: str) -> str:
+        rota = self.rotas.get(chave_loja(loja))
+        return nome_fragmento(*rota) if rota else ""
+
+    def fragmento(self, nome: str) -> ArmazenamentoSheets:
+        with self._lock_fragmentos:
+            if nome not in self._fragmentos:
+                planilha_id, aba = _separar_nome(nome)
+                if planilha_id and self._abrir is None:
+                    raise RuntimeError(f"Sem cliente do Google para abrir a planilha do fragmento {nome}")
+                self._contar('leitura', 1 if planilha_id else 0)
+                planilha = self._abrir(planilha_id) if planilha_id else self.planilha
+                self._fragmentos[nome] = ArmazenamentoSheets(planilha, self._contar, aba, so_relatorio=True)
+            return self._fragmentos[nome]
+
+    @property
+    def identificador(self) -> str:
+        return f"sheets:{self.planilha.id}+fragmentos"
+
+    def marca_relatorio(self) -> Optional[Dict]:
+        return None   # cada fragmento tem a sua; o snapshot geral não é salvo em disco
+
+    def sincronizar_relatorio(self, linhas_no_snapshot: Optional[int]) -> Alteracoes:
+        if linhas_no_snapshot is not None:
+            raise NotImplementedError("relatorio fragmentado: sincronize cada fragmento")
+        partes = em_paralelo(lambda nome: self.fragmento(nome).sincronizar_relatorio(None), self.nomes_fragmentos())
+        completo = [COLUNAS_RELATORIO] + [linha for parte in partes for linha in (parte.completo or [])[1:]]
+        return Alteracoes(total=len(completo), completo=completo, so_acrescimo=False, cabecalho=COLUNAS_RELATORIO)
+
+    def acrescentar_relatorio(self, linhas: List[List[str]]) -> Dict[str, Optional[int]]:
+        grupos = {}
+        for linha in linhas: grupos.setdefault(self.fragmento_da_loja(linha[0]), []).append(linha)
+        def gravar(item):
+            fragmento = self.fragmento(item[0])
+            _garantir_aba(fragmento)   # loja nova na tabela de roteamento
+            return item[0], fragmento.acrescentar_relatorio(item[1])[""]
+        return dict(em_paralelo(gravar, grupos.items()))
+
+    def ler_colunas_relatorio(self, colunas: List[str], inicio: int = 0, fim: Optional[int] = None) -> List[List[str]]:
+        """
+        Posições na ordem de `nomes_fragmentos` (por nome, não pela ordem da tabela de
+        roteamento), cada fragmento na ordem da sua aba. Fragmentos novos ou rebalanceados
+        mudam as posições: para ler de novo as mesmas linhas, leia o fragmento.
+        """
+        nomes = self.nomes_fragmentos()
+        if not inicio and fim is None:
+            partes = em_paralelo(lambda nome: self.fragmento(nome).ler_colunas_relatorio(colunas), nomes)
+            return [linha for parte in partes for linha in parte]
+        # Janela: o tamanho de cada fragmento (só a coluna A) diz quais faixas entram
+        totais = em_paralelo(lambda nome: self.fragmento(nome).total_relatorio(), nomes)
+        faixas, deslocamento = [], 0
+        for nome, total in zip(nomes, totais):
+            de, ate = max(0, inicio - deslocamento), total if fim is None else min(total, fim - deslocamento)
+            if de < ate: faixas.append((nome, de, ate))
+            deslocamento += total
+        partes = em_paralelo(lambda f: self.fragmento(f[0]).ler_colunas_relatorio(colunas, f[1], f[2]), faixas)
+        return [linha for parte in partes for linha in parte]
+
+    def total_relatorio(self) -> int:
+        return sum(em_paralelo(lambda nome: self.fragmento(nome).total_relatorio(), self.nomes_fragmentos()))
+
+    def tem_relatorio(self) -> bool:
+        return any(em_paralelo(lambda nome: self.fragmento(nome).tem_relatorio(), self.nomes_fragmentos()))
+
+
+def armazenamento_sheets(planilha, contar: Callable = None, cliente=None) -> ArmazenamentoSheets:
+    """ArmazenamentoSheets da planilha principal, fragmentado se ela tiver a aba roteamento com rotas."""
+    try: rotas = roteamento(planilha, contar)
+    except Exception as e:
+        logger.warning("Tabela de roteamento ilegível (%s); usando só a planilha principal", e)
+        rotas = {}
+    if not rotas: return ArmazenamentoSheets(planilha, contar)
+    return ArmazenamentoFragmentado(planilha, contar, rotas, cliente.open_by_key if cliente is not None else None)
+
+
+# --- Rebalanceamento ---
+
+def rebalancear(armazenamento: ArmazenamentoFragmentado, executar: bool = False, lote: int = 5000) -> Dict:
+    """
+    Leva cada linha do relatorio para o fragmento da sua loja. Sem `executar`, só conta.
+    Primeiro copia para o destino, depois apaga da origem apenas as linhas lidas aqui
+    (o que for gravado durante a cópia fica onde está). Linhas que o destino já tem
+    (de uma rodada interrompida) não são copiadas de novo.
+    """
+    nomes = armazenamento.nomes_fragmentos()
+    fragmentos = {nome: armazenamento.fragmento(nome) for nome in nomes}
+
+    def ler(nome):
+        aba = fragmentos[nome].aba_relatorio
+        if aba is None: return []
+        fragmentos[nome]._contar('leitura')
+        return aba.get_all_values()
+    lidas = dict(zip(nomes, em_paralelo(ler, nomes)))
+
+    ficam, saem, movidas = {}, {}, Counter()
+    for origem, valores in lidas.items():
+        cabecalho = [c.strip().upper() for c in valores[0]] if valores else []
+        coluna_loja = cabecalho.index("LOJA") if "LOJA" in cabecalho else 0
+        ficam[origem] = []
+        for linha in valores[1:]:
+            destino = armazenamento.fragmento_da_loja(linha[coluna_loja] if coluna_loja < len(linha) else "")
+            if destino == origem: ficam[origem].append(linha)
+            else:
+                saem.setdefault(destino, []).append(linha)
+                movidas[(origem, destino)] += 1
+    resumo = {"movidas": {f"{o or 'principal'} -> {d or 'principal'}": n for (o, d), n in movidas.items()}, "executado": executar}
+    if not executar or not movidas: return resumo
+
+    for destino, linhas in saem.items():
+        fragmento = fragmentos[destino]
+        _garantir_aba(fragmento)
+        ja_tem = Counter(hash_linha(l) for l in lidas.get(destino, [])[1:])
+        novas = []
+        for linha in linhas:
+            h = hash_linha(linha)
+            if ja_tem[h] > 0: ja_tem[h] -= 1
+            else: novas.append(linha)
+        for inicio in range(0, len(novas), lote):
+            fragmento.acrescentar_relatorio(novas[inicio:inicio + lote])
+        logger.info("Fragmento %s: %s linhas recebidas", destino or "principal", len(novas))
+
+    for origem, valores in lidas.items():
+        lidas_aqui, restantes = max(0, len(valores) - 1), ficam[origem]
+        if len(restantes) == lidas_aqui: continue
+        aba = fragmentos[origem].aba_relatorio
+        fragmentos[origem]._contar('escrita', 2)
+        # get_all_values corta as células vazias à direita: completa para não sobrar valor da linha de antes
+        largura = max(len(l) for l in valores)
+        if restantes: aba.update("A2", [l + [""] * (largura - len(l)) for l in restantes], value_input_option='USER_ENTERED')
+        aba.delete_rows(len(restantes) + 2, lidas_aqui + 1)
+        logger.info("Fragmento %s: %s linhas removidas", origem or "principal", lidas_aqui - len(restantes))
+    return resumo
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Fragmentação do relatorio por loja.")
+    sub = ap.add_subparsers(dest="comando", required=True)
+    sub.add_parser("rotas", help="Mostra a tabela de roteamento")
+    reb = sub.add_parser("rebalancear", help="Move as linhas para o fragmento da sua loja")
+    reb.add_argument("--executar", action="store_true", help="Sem isso só mostra o que seria movido")
+    reb.add_argument("--lote", type=int, default=5000)
+    args = ap.parse_args(argv)
+
+    from google_planilha import abrir_planilha, orcamento_processo
+    cliente, planilha = abrir_planilha()
+    contar = lambda tipo, n=1: [orcamento_processo.registrar(tipo) for _ in range(n)]
+    rotas = ler_roteamento(planilha, contar)
+    if not rotas:
+        print("ℹ️ Sem aba roteamento (ou vazia): todo o relatorio fica na planilha principal.")
+        return 0
+    armazenamento = ArmazenamentoFragmentado(planilha, contar, rotas, cliente.open_by_key)
+
+    if args.comando == "rotas":
+        for loja, rota in sorted(rotas.items()):
+            print(f"{loja:<20} -> {nome_fragmento(*rota) or 'principal'}")
+        return 0
+
+    r = rebalancear(armazenamento, executar=args.executar, lote=args.lote)
+    for trecho, n in r["movidas"].items(): print(f"{trecho}: {n} linhas")
+    if not r["movidas"]: print("✅ Todas as linhas já estão no fragmento certo.")
+    elif not args.executar: print("ℹ️ Nada foi alterado (use --executar).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
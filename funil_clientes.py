@@ -0,0 +1,192 @@
+import threading
+import logging
+from collections import defaultdict, deque
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+
+from cache_compartilhado import cache
+from google_planilha import chave_loja
+
+logger = logging.getLogger(__name__)
+
+# Tipos de evento, deduzidos das métricas gravadas por cada tela
+OUTRO, VENDA, PERDA, RESERVA, CONVERSAO, DESISTENCIA, RETORNO = range(7)
+NOMES_EVENTOS = {OUTRO: "ATENDIMENTO", VENDA: "VENDA", PERDA: "PERDA", RESERVA: "RESERVA",
+                 CONVERSAO: "CONVERSÃO", DESISTENCIA: "DESISTÊNCIA", RETORNO: "RETORNO"}
+_JORNADA = (PERDA, RESERVA, CONVERSAO, DESISTENCIA, RETORNO)
+
+
+def classificar(reservas: np.ndarray, vendas: np.ndarray, perdas: np.ndarray) -> np.ndarray:
+    """
+    venda_receita grava RESERVAS=1 (reserva) ou PERDAS=1; tela_reservas grava RESERVAS=-1 com
+    VENDAS=1 (conversão) ou PERDAS=1 (desistência); sem_receita grava PERDAS=-1 (retorno).
+    """
+    tipo = np.full(len(reservas), OUTRO, dtype=np.int8)
+    tipo[(vendas == 1) & (reservas == 0)] = VENDA
+    tipo[(perdas == 1) & (reservas == 0)] = PERDA
+    tipo[perdas == -1] = RETORNO
+    tipo[reservas == 1] = RESERVA
+    tipo[(reservas == -1) & (vendas == 1)] = CONVERSAO
+    tipo[(reservas == -1) & (perdas == 1)] = DESISTENCIA
+    return tipo
+
+
+def normalizar_cliente(nome: str) -> str:
+    return " ".join(str(nome).split()).upper()
+
+
+def _novo_placar() -> Dict:
+    return {"reservas": 0, "conversoes": 0, "desistencias": 0, "perdas": 0, "retornos": 0,
+            "conversoes_sem_reserva": 0, "dias_conversao": [], "dias_retorno": []}
+
+
+class FunilClientes:
+    """
+    Jornada de cada cliente (loja + nome normalizado): reserva -> conversão/desistência e
+    perda -> retorno. É alimentado de forma incremental pelo snapshot do relatorio
+    (`linhas_processadas`), e os placares por loja/vendedor ficam prontos para consulta.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.edicao = 0   # edição do snapshot já processada (ver SnapshotRelatorio.com_blocos)
+        self._zerar()
+
+    def _zerar(self):
+        self._abertas = defaultdict(deque)   # cliente -> reservas em aberto (instante, vendedor), mais antiga primeiro
+        self._perdidos = {}                   # cliente -> última perda sem retorno (instante, vendedor)
+        self._placar = defaultdict(_novo_placar)   # (loja, vendedor) -> contadores
+        self.linhas_processadas = 0
+
+    # --- Atualização ---
+
+    def atualizar(self, snap) -> int:
+        """Processa as linhas do snapshot ainda não vistas. Retorna quantas entraram."""
+        with self._lock:
+            total = len(snap)
+            if total < self.linhas_processadas:
+                logger.warning("Relatorio encolheu (%s < %s); recalculando o funil", total, self.linhas_processadas)
+                self._zerar()
+            elif snap.edicao != self.edicao:
+                logger.info("Linhas do relatorio editadas na planilha; recalculando o funil")
+                self._zerar()
+            self.edicao = snap.edicao
+            inicio = self.linhas_processadas
+            if total == inicio: return 0
+
+            sel = np.arange(inicio, total)
+            tipos = classificar(snap.metricas['RESERVAS'][sel], snap.metricas['VENDAS'][sel], snap.metricas['PERDAS'][sel])
+            sel, tipos = sel[np.isin(tipos, _JORNADA)], tipos[np.isin(tipos, _JORNADA)]
+
+            lojas = [chave_loja(l) for l in snap.categorias['LOJA']]
+            clientes = [normalizar_cliente(c) for c in snap.categorias['CLIENTE']]
+            vendedores = snap.categorias['VENDEDOR']
+            # Segundos desde a época ordinal: dia e hora juntos, para a duração em dias fracionados
+            instantes = snap.data[sel].astype(np.int64) * 86400 + np.maximum(snap.hora[sel], 0)
+            instantes = [t if d else None for t, d in zip(instantes.tolist(), snap.data[sel].tolist())]
+            codigos = zip(snap.codigos['LOJA'][sel], snap.codigos['CLIENTE'][sel], snap.codigos['VENDEDOR'][sel])
+
+            for tipo, instante, (l, c, v) in zip(tipos.tolist(), instantes, codigos):
+                self._evento(tipo, lojas[l], clientes[c], vendedores[v], instante)
+
+            self.linhas_processadas = total
+            return total - inicio
+
+    def _evento(self, tipo: int, loja: str, cliente: str, vendedor: str, instante: Optional[int]):
+        # Sem nome do cliente não há como ligar os eventos: conta, mas não abre jornada
+        chave = (loja, cliente) if cliente else None
+        if tipo == RESERVA:
+            if chave: self._abertas[chave].append((instante, vendedor))
+            self._placar[(loja, vendedor)]["reservas"] += 1
+        elif tipo in (CONVERSAO, DESISTENCIA):
+            abertas = self._abertas.get(chave) if chave else None
+            ligada = bool(abertas)
+            if ligada:
+                inicio, dono = abertas.popleft()
+                if not abertas: del self._abertas[chave]
+            else:
+                inicio, dono = None, vendedor   # reserva anterior ao histórico (ou nome digitado diferente)
+            placar = self._placar[(loja, dono)]
+            if tipo == CONVERSAO:
+                if not ligada: placar["conversoes_sem_reserva"] += 1
+                else:
+                    placar["conversoes"] += 1
+                    if inicio is not None and instante is not None:
+                        placar["dias_conversao"].append((instante - inicio) / 86400)
+            else:
+                placar["desistencias"] += 1
+                if chave: self._perdidos[chave] = (instante, dono)
+        elif tipo == PERDA:
+            self._placar[(loja, vendedor)]["perdas"] += 1
+            if chave: self._perdidos[chave] = (instante, vendedor)
+        elif tipo == RETORNO:
+            perda = self._perdidos.pop(chave, None) if chave else None
+            if perda:
+                placar = self._placar[(loja, perda[1])]
+                placar["retornos"] += 1
+                if perda[0] is not None and instante is not None:
+                    placar["dias_retorno"].append((instante - perda[0]) / 86400)
+
+    # --- Consultas ---
+
+    def por_vendedor(self, loja: str = None) -> pd.DataFrame:
+        """Funil por vendedor (da loja informada ou somando todas)."""
+        with self._lock:
+            alvo = chave_loja(loja) if loja else None
+            agregado = defaultdict(_novo_placar)
+            for (l, vendedor), placar in self._placar.items():
+                if alvo and l != alvo: continue
+                destino = agregado[vendedor]
+                for campo, valor in placar.items():
+                    destino[campo] = destino[campo] + valor
+            em_aberto = defaultdict(int)
+            for (l, _), abertas in self._abertas.items():
+                if alvo and l != alvo: continue
+                for _, vendedor in abertas: em_aberto[vendedor] += 1
+
+        linhas = []
+        for vendedor, p in sorted(agregado.items()):
+            fechadas = p["conversoes"] + p["desistencias"]
+            perdas = p["perdas"] + p["desistencias"]
+            linhas.append({
+                "VENDEDOR": vendedor,
+                "RESERVAS": p["reservas"],
+                "CONVERSÕES": p["conversoes"],
+                "DESISTÊNCIAS": p["desistencias"],
+                "EM ABERTO": em_aberto.get(vendedor, 0),
+                "CONVERSÕES SEM RESERVA": p["conversoes_sem_reserva"],
+                "CONVERSÃO %": round(p["conversoes"] / fechadas * 100, 1) if fechadas else None,
+                "DESISTÊNCIA %": round(p["desistencias"] / fechadas * 100, 1) if fechadas else None,
+                "DIAS ATÉ CONVERTER (mediana)": round(float(np.median(p["dias_conversao"])), 1) if p["dias_conversao"] else None,
+                "PERDAS": perdas,
+                "RETORNOS": p["retornos"],
+                "RETORNO %": round(p["retornos"] / perdas * 100, 1) if perdas else None,
+                "DIAS ATÉ RETORNAR (mediana)": round(float(np.median(p["dias_retorno"])), 1) if p["dias_retorno"] else None,
+            })
+        return pd.DataFrame(linhas)
+
+    def reservas_em_aberto(self, loja: str = None) -> int:
+        with self._lock:
+            alvo = chave_loja(loja) if loja else None
+            return sum(len(a) for (l, _), a in self._abertas.items() if not alvo or l == alvo)
+
+
+def jornada(snap, loja: str, cliente: str) -> List[Dict]:
+    """Eventos de um cliente na loja, em ordem (recorte do snapshot, sem reprocessar o funil)."""
+    alvo = normalizar_cliente(cliente)
+    clientes = [i for i, c in enumerate(snap.categorias['CLIENTE']) if normalizar_cliente(c) == alvo]
+    lojas = [i for i, l in enumerate(snap.categorias['LOJA']) if chave_loja(l) == chave_loja(loja)]
+    idx = np.flatnonzero(np.isin(snap.codigos['CLIENTE'], clientes) & np.isin(snap.codigos['LOJA'], lojas))
+    tipos = classificar(snap.metricas['RESERVAS'][idx], snap.metricas['VENDAS'][idx], snap.metricas['PERDAS'][idx])
+    return [
+        {"DATA": d, "HORA": h, "VENDEDOR": v, "EVENTO": NOMES_EVENTOS[int(t)]}
+        for d, h, v, t in zip(snap.valores('DATA', idx), snap.valores('HORA', idx), snap.valores('VENDEDOR', idx), tipos)
+    ]
+
+
+def funil_atualizado(gsheets) -> FunilClientes:
+    """Funil do processo com as linhas novas do relatorio já processadas."""
+    funil = cache.obter_ou_carregar(('funil',), FunilClientes)
+    funil.atualizar(gsheets.get_snapshot_relatorio())
+    return funil
@@ -1,86 +1,229 @@
 ﻿import gspread
 from gspread.exceptions import APIError, SpreadsheetNotFound, WorksheetNotFound
-from typing import Dict, List
+from typing import Dict, List, Optional
 import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
 import os
 import json
 import re
+import sqlite3
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import ExitStack
 from dateutil import parser
 import pytz
 from datetime import datetime, timedelta
 from zoneinfo import ZoneInfo
+import numpy as np
 import pandas as pd
 from io import StringIO
 from pydrive2.auth import GoogleAuth
 from pydrive2.drive import GoogleDrive
+from cache_compartilhado import cache
+from snapshot_relatorio import SnapshotRelatorio
+import snapshot_persistente
+import eventos
+from armazenamento import ARMAZENAMENTO, COLUNAS_RELATORIO, armazenamento_local, chave_loja, separar_lojas
+from fragmentacao import armazenamento_sheets, em_paralelo
+
+
+logger = logging.getLogger(__name__)
+
+# Sincronização de cada snapshot do relatorio (e leitura da marca para o disco) não se intercalam
+_travas_relatorio: Dict[tuple, threading.Lock] = {}
+_lock_travas = threading.Lock()
+
+
+def _trava(chave: tuple) -> threading.Lock:
+    with _lock_travas:
+        return _travas_relatorio.setdefault(chave, threading.Lock())
+
+def _indexar_vendedores(vendedores: List[Dict]) -> Dict:
+    """Roster a partir da lista de vendedores: todos, índice por loja e os sem loja (atendem em todas)."""
+    por_loja, sem_loja = {}, []
+    for vendedor in vendedores:
+        if not vendedor["LOJAS"]: sem_loja.append(vendedor)
+        for loja in vendedor["LOJAS"]:
+            por_loja.setdefault(chave_loja(loja), []).append(vendedor)
+    return {"todos": vendedores, "por_loja": por_loja, "sem_loja": sem_loja}
+
+
+class OrcamentoAPI:
+    """
+    Conta leituras e escritas na API do Sheets numa janela deslizante de 60 segundos,
+    para saber quão perto estamos da cota por minuto.
+    """
+
+    def __init__(self, limite_leitura: int, limite_escrita: int):
+        self.limites = {'leitura': limite_leitura, 'escrita': limite_escrita}
+        self._janelas = {'leitura': deque(), 'escrita': deque()}
+        self._lock = threading.Lock()
+
+    def _podar(self, janela: deque, agora: float):
+        while janela and agora - janela[0] > 60: janela.popleft()
+
+    def registrar(self, tipo: str):
+        agora = time.monotonic()
+        with self._lock:
+            janela = self._janelas[tipo]
+            self._podar(janela, agora)
+            janela.append(agora)
+
+    def uso(self, tipo: str) -> int:
+        with self._lock:
+            janela = self._janelas[tipo]
+            self._podar(janela, time.monotonic())
+            return len(janela)
+
+    def fracao(self, tipo: str) -> float:
+        return self.uso(tipo) / self.limites[tipo] if self.limites[tipo] else 0.0
+
+
+# Cota do Sheets por minuto para a conta de serviço (padrão do Google: 60 leituras e 60 escritas)
+COTA_LEITURA_MIN = int(os.environ.get("SHEETS_COTA_LEITURA_MIN", 60))
+COTA_ESCRITA_MIN = int(os.environ.get("SHEETS_COTA_ESCRITA_MIN", 60))
+# Acima desta fração da cota, leituras não críticas passam a vir do cache
+LIMIAR_ECONOMIA = float(os.environ.get("SHEETS_LIMIAR_ECONOMIA", 0.8))
+# Fração da cota que uma única sessão pode consumir antes de entrar em economia sozinha
+FRACAO_SESSAO = float(os.environ.get("SHEETS_FRACAO_SESSAO", 0.25))
+
+orcamento_processo = OrcamentoAPI(COTA_LEITURA_MIN, COTA_ESCRITA_MIN)
+
+
+def credenciais_servico() -> Dict:
+    """Credenciais da conta de serviço: variáveis de ambiente (Heroku) ou st.secrets."""
+    if 'GCP_PROJECT_ID' in os.environ:
+        return {
+            "type": "service_account",
+            "project_id": os.environ["GCP_PROJECT_ID"],
+            "private_key_id": os.environ["GCP_PRIVATE_KEY_ID"],
+            "private_key": os.environ["GCP_PRIVATE_KEY"].replace("\\n", "\n"),
+            "client_email": os.environ["GCP_CLIENT_EMAIL"],
+            "client_id": os.environ["GCP_CLIENT_ID"],
+            "auth_uri": "https://accounts.google.com/o/oauth2/auth",
+            "token_uri": "https://oauth2.googleapis.com/token",
+            "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
+            "client_x509_cert_url": os.environ["GCP_CLIENT_X509_CERT_URL"],
+            "universe_domain": "googleapis.com"
+        }
+    return st.secrets["gcp_service_account"]
+
+def abrir_planilha(nome: str = "fluxo de loja"):
+    """Abre a planilha do app e devolve (client, planilha)."""
+    client = gspread.service_account_from_dict(credenciais_servico())
+    orcamento_processo.registrar('leitura')
+    return client, client.open(nome)
+
+def abrir_gsheets() -> "GooglePlanilha":
+    """GooglePlanilha para scripts e tarefas no armazenamento configurado (sem st.session_state)."""
+    if ARMAZENAMENTO == "sqlite": return GooglePlanilha(armazenamento=armazenamento_local())
+    client, planilha = abrir_planilha()
+    return GooglePlanilha(planilha=planilha, cliente=client)
 
 
 class GooglePlanilha:
     """
-    Classe para integração com Google Sheets e Drive.
+    Operações do app sobre os dados da loja (atendimentos, vendedores, reservas).
+    Onde os dados ficam é decidido pelo armazenamento: Google Sheets ou SQLite local.
     """
 
-    COLUNAS_RELATORIO = [
-        'LOJA', 'DATA', 'HORA', 'VENDEDOR', 'CLIENTE', 'ATENDIMENTOS', 'RECEITAS',
-        'PERDAS', 'VENDAS', 'RESERVAS', 'PESQUISAS', 'EXAME DE VISTA', 'GOOGLE'
+    COLUNAS_RELATORIO = COLUNAS_RELATORIO
+    # Campo de `dados` -> coluna do relatorio, na ordem da aba
+    MAPEAMENTO_RELATORIO = [
+        ('loja', 'LOJA'), ('data', 'DATA'), ('hora', 'HORA'),
+        ('vendedor', 'VENDEDOR'), ('cliente', 'CLIENTE'),
+        ('atendimento', 'ATENDIMENTOS'), ('receita', 'RECEITAS'),
+        ('perda', 'PERDAS'), ('venda', 'VENDAS'), ('reserva', 'RESERVAS'),
+        ('pesquisa', 'PESQUISAS'), ('consulta', 'EXAME DE VISTA'),
+        ('google', 'GOOGLE') # Mapeamento da coluna M renomeado
     ]
 
-    def __init__(self):
-        if 'gsheets_client' not in st.session_state:
+    # Colunas que o saldo de reservas usa (ver ler_colunas_relatorio)
+    COLUNAS_RESERVAS = ['LOJA', 'DATA', 'VENDEDOR', 'CLIENTE', 'RESERVAS']
+
+    # Tempo de vida (segundos) dos dados no cache compartilhado
+    TTL_VENDEDORES = 60
+    TTL_RELATORIO = 300
+
+    def __init__(self, planilha=None, armazenamento=None, cliente=None):
+        """
+        Sem argumentos usa o armazenamento configurado (FLUXO_ARMAZENAMENTO); no Sheets,
+        a conexão guardada na sessão do Streamlit (ou cria uma). Tarefas em segundo plano
+        e scripts passam `planilha` aberta por `abrir_planilha()` (com o `cliente`, que abre
+        as planilhas dos fragmentos) ou um `armazenamento` pronto, sem depender de st.session_state.
+        """
+        self.orcamento_sessao = OrcamentoAPI(
+            max(1, int(COTA_LEITURA_MIN * FRACAO_SESSAO)), max(1, int(COTA_ESCRITA_MIN * FRACAO_SESSAO))
+        )
+        self.armazenamento = armazenamento
+        if armazenamento is not None: pass
+        elif planilha is not None:
+            self.armazenamento = armazenamento_sheets(planilha, self._contar, cliente)
+        elif ARMAZENAMENTO == "sqlite":
+            self.armazenamento = armazenamento_local()
+        elif 'gsheets_client' not in st.session_state:
             self._criar_conexao()
         else:
-            self.client = st.session_state.gsheets_client
-            self.planilha = st.session_state.planilha_atendimento
-            self.aba_vendedores = self._get_worksheet("vendedor")
-            self.aba_relatorio = self._get_worksheet("relatorio")
+            self.armazenamento = armazenamento_sheets(st.session_state.planilha_atendimento, self._contar,
+                                                      st.session_state.gsheets_client)
 
     def _criar_conexao(self):
         try:
-            if 'GCP_PROJECT_ID' in os.environ:
-                credenciais = {
-                    "type": "service_account",
-                    "project_id": os.environ["GCP_PROJECT_ID"],
-                    "private_key_id": os.environ["GCP_PRIVATE_KEY_ID"],
-                    "private_key": os.environ["GCP_PRIVATE_KEY"].replace("\\n", "\n"),
-                    "client_email": os.environ["GCP_CLIENT_EMAIL"],
-                    "client_id": os.environ["GCP_CLIENT_ID"],
-                    "auth_uri": "https://accounts.google.com/o/oauth2/auth",
-                    "token_uri": "https://oauth2.googleapis.com/token",
-                    "auth_provider_x509_cert_url": "https://www.googleapis.com/oauth2/v1/certs",
-                    "client_x509_cert_url": os.environ["GCP_CLIENT_X509_CERT_URL"],
-                    "universe_domain": "googleapis.com"
-                }
-            else:
-                credenciais = st.secrets["gcp_service_account"]
-
-            client = gspread.service_account_from_dict(credenciais)
+            client, planilha = abrir_planilha()
             st.session_state.gsheets_client = client
-            planilha = client.open("fluxo de loja")
             st.session_state.planilha_atendimento = planilha
-            self.planilha = planilha
-            self.aba_vendedores = self._get_worksheet("vendedor")
-            self.aba_relatorio = self._get_worksheet("relatorio")
-            self._verificar_estrutura()
+            self.armazenamento = armazenamento_sheets(planilha, self._contar, client)
+            self.armazenamento.verificar_estrutura()
         except Exception as e:
             st.error(f"❌ Falha ao conectar: {e}")
 
-    def _get_worksheet(self, name: str):
-        try: return self.planilha.worksheet(name)
-        except: return None
+    @property
+    def conectado(self) -> bool:
+        return self.armazenamento is not None and self.armazenamento.disponivel
+
+    # --- Orçamento de cota ---
 
-    def _verificar_estrutura(self):
-        if not self.aba_relatorio: return
+    def _contar(self, tipo: str, quantidade: int = 1):
+        for _ in range(quantidade):
+            orcamento_processo.registrar(tipo)
+            self.orcamento_sessao.registrar(tipo)
+
+    def em_economia(self, tipo: str = 'leitura') -> bool:
+        """True quando o processo ou esta sessão passou do limiar da cota por minuto (só no Sheets)."""
+        if self.armazenamento is not None and not self.armazenamento.usa_cota: return False
+        return (orcamento_processo.fracao(tipo) >= LIMIAR_ECONOMIA
+                or self.orcamento_sessao.fracao(tipo) >= 1.0)
+
+    def resumo_orcamento(self) -> Dict:
+        return {
+            tipo: {
+                'processo': orcamento_processo.uso(tipo), 'limite': orcamento_processo.limites[tipo],
+                'sessao': self.orcamento_sessao.uso(tipo), 'limite_sessao': self.orcamento_sessao.limites[tipo],
+            }
+            for tipo in ('leitura', 'escrita')
+        }
+
+    def _ler_nao_critico(self, chave, carregar, ttl):
+        """
+        Leitura que pode ser servida do cache vencido: relatórios e lista de vendedores.
+        Em economia de cota (ou se o Google recusar por cota), devolve o último valor
+        conhecido e mostra há quanto tempo ele foi carregado.
+        """
+        if self.em_economia():
+            valor = cache.obter(chave)
+            if valor is not None:
+                _selo_dados_antigos(cache.idade(chave))
+                return valor
         try:
-            cabecalhos = [c.strip() for c in self.aba_relatorio.row_values(1)]
-            # Ajuste para renomear se for GOOGLE1
-            if "GOOGLE1" in cabecalhos:
-                idx = cabecalhos.index("GOOGLE1")
-                self.aba_relatorio.update_cell(1, idx + 1, "GOOGLE")
-                cabecalhos[idx] = "GOOGLE"
-            
-            if len(cabecalhos) < len(self.COLUNAS_RELATORIO) or cabecalhos[:len(self.COLUNAS_RELATORIO)] != self.COLUNAS_RELATORIO:
-                self.aba_relatorio.update("A1", [self.COLUNAS_RELATORIO])
-        except: pass
+            return cache.obter_ou_carregar(chave, carregar, ttl)
+        except APIError as e:
+            valor = cache.obter(chave)
+            if getattr(e, 'code', None) != 429 or valor is None: raise
+            logger.warning("Cota do Sheets esgotada; servindo %s do cache", chave)
+            _selo_dados_antigos(cache.idade(chave))
+            return valor
 
     def registrar_atendimento(self, dados: Dict) -> bool:
         """Registra novo atendimento na planilha."""
@@ -90,100 +233,378 @@ class GooglePlanilha:
                     st.error(f"❌ {campo.upper()} é obrigatório.")
                     return False
 
-            fuso = ZoneInfo("America/Sao_Paulo")
-            agora = datetime.now(fuso)
-            dados['hora'] = dados.get('hora') or agora.strftime("%H:%M:%S")
-            dados['data'] = dados.get('data') or agora.strftime("%d/%m/%Y")
-
-            mapeamento = [
-                ('loja', 'LOJA'), ('data', 'DATA'), ('hora', 'HORA'),
-                ('vendedor', 'VENDEDOR'), ('cliente', 'CLIENTE'),
-                ('atendimento', 'ATENDIMENTOS'), ('receita', 'RECEITAS'),
-                ('perda', 'PERDAS'), ('venda', 'VENDAS'), ('reserva', 'RESERVAS'),
-                ('pesquisa', 'PESQUISAS'), ('consulta', 'EXAME DE VISTA'),
-                ('google', 'GOOGLE') # Mapeamento da coluna M renomeado
-            ]
-            
-            valores = [str(dados.get(campo, '')).strip() for campo, _ in mapeamento]
-            self.aba_relatorio.append_row(valores, value_input_option='USER_ENTERED')
+            # Gravação crítica: nunca é adiada pela economia de cota
+            linhas = [self.linha_relatorio(dados)]
+            self.acrescentar_linhas_relatorio(linhas)
+            eventos.barramento.publicar(eventos.ATENDIMENTOS, {"linhas": linhas})
             return True
         except Exception as e:
             st.error(f"❌ Falha ao salvar: {e}")
             return False
 
+    def registrar_atendimentos(self, atendimentos: List[Dict]) -> int:
+        """
+        Vários atendimentos (mesmos campos de `registrar_atendimento`) numa única gravação.
+        Erros da API são propagados: ou entram todos, ou nenhum.
+        """
+        for i, dados in enumerate(atendimentos, start=1):
+            faltando = [campo.upper() for campo in ('loja', 'vendedor', 'cliente') if not dados.get(campo)]
+            if faltando: raise ValueError(f"Atendimento {i}: {', '.join(faltando)} obrigatório")
+        agora = datetime.now(ZoneInfo("America/Sao_Paulo"))
+        linhas = [self.linha_relatorio(dados, agora) for dados in atendimentos]
+        self.acrescentar_linhas_relatorio(linhas)
+        eventos.barramento.publicar(eventos.ATENDIMENTOS, {"linhas": linhas})
+        return len(atendimentos)
+
+    @classmethod
+    def linha_relatorio(cls, dados: Dict, agora: datetime = None) -> List[str]:
+        """Linha do relatorio para um atendimento; data e hora vazias ficam com o momento atual."""
+        agora = agora or datetime.now(ZoneInfo("America/Sao_Paulo"))
+        dados['hora'] = dados.get('hora') or agora.strftime("%H:%M:%S")
+        dados['data'] = dados.get('data') or agora.strftime("%d/%m/%Y")
+        return [str(dados.get(campo, '')).strip() for campo, _ in cls.MAPEAMENTO_RELATORIO]
+
+    def acrescentar_linhas_relatorio(self, linhas: List[List[str]]):
+        """
+        Grava várias linhas (na ordem de COLUNAS_RELATORIO) com um único append_rows.
+        Erros da API são propagados para quem chamou.
+        """
+        if not linhas: return
+        grupos = {}
+        if self.fragmentado:
+            for linha in linhas: grupos.setdefault(self.armazenamento.fragmento_da_loja(linha[0]), []).append(linha)
+        chaves = sorted(('relatorio', 'fragmento', nome) for nome in grupos) or [('relatorio',)]
+        # Uma sincronização entre a gravação e o acréscimo local traria as linhas novas e o
+        # acréscimo as duplicaria no snapshot: as duas coisas acontecem com o snapshot travado
+        with ExitStack() as travas:
+            for chave in chaves: travas.enter_context(_trava(chave))
+            posicoes = self.armazenamento.acrescentar_relatorio(linhas) or {}
+            self._atualizar_cache_relatorio(linhas, grupos, posicoes)
+
+    def _atualizar_cache_relatorio(self, linhas: List[List[str]], grupos: Dict[str, List[List[str]]],
+                                   posicoes: Dict[str, Optional[int]]):
+        if not grupos:
+            self._acrescentar_no_snapshot(('relatorio',), self.armazenamento, linhas, posicoes.get(""))
+        else:
+            for nome, grupo in grupos.items():
+                self._acrescentar_no_snapshot(('relatorio', 'fragmento', nome), self.armazenamento.fragmento(nome),
+                                              grupo, posicoes.get(nome))
+            with _trava(('relatorio',)):   # geral, fragmentos e o quanto o geral já tem de cada um andam juntos
+                geral, consumido = cache.obter(('relatorio',)), cache.obter(('relatorio', 'consumido'))
+                if geral is not None and consumido is not None:
+                    for nome in grupos:
+                        parte = cache.obter(('relatorio', 'fragmento', nome))
+                        if parte is None or nome not in consumido: continue
+                        edicao, linhas_ja = consumido[nome]
+                        # Fragmento editado: o geral é remontado na próxima junção
+                        if edicao != parte.edicao or linhas_ja > len(parte): continue
+                        geral = geral.com_snapshot(parte, linhas_ja)
+                        consumido = {**consumido, nome: (edicao, len(parte))}
+                    cache.atualizar(('relatorio',), lambda _: geral)
+                    cache.atualizar(('relatorio', 'consumido'), lambda _: consumido)
+        for loja in {str(l[0]).strip().upper() for l in linhas}:
+            cache.remover_prefixo(('hoje', loja))
+            cache.remover_prefixo(('reservas', loja))
+        cache.remover_prefixo(('reservas', ''))
+
+    def _acrescentar_no_snapshot(self, chave: tuple, armazenamento, linhas: List[List[str]], posicao: Optional[int]):
+        # Com a trava de `chave`. Se as linhas caíram logo depois do fim do snapshot, acrescenta
+        # sem baixar nada; se outra gravação caiu antes delas (outro processo, importação,
+        # alguém na planilha) ou não dá para saber onde caíram, sincroniza: as de fora entram
+        # antes e a posição de cada linha do snapshot continua sendo a da aba
+        snap = cache.obter(chave)
+        if snap is None: return   # a primeira leitura traz tudo
+        if posicao == len(snap):
+            cache.atualizar(chave, lambda atual: atual.com_linhas(linhas))
+            return
+        logger.info("Gravação caiu na linha %s com o snapshot em %s; sincronizando", posicao, len(snap))
+        try: self._sincronizar_relatorio_travado(chave, armazenamento)
+        except Exception as e:
+            # A gravação já foi feita: a próxima sincronização traz as linhas
+            logger.warning("Sincronização depois da gravação falhou: %s", e)
+
+    def _ler_vendedores(self) -> Dict:
+        """
+        Vendedores do armazenamento indexados por loja. Vendedor sem loja cadastrada
+        aparece em todas as lojas.
+        """
+        if not self.conectado: return {"todos": [], "por_loja": {}, "sem_loja": []}
+        atual = cache.obter(('vendedores',))
+        if atual is None:
+            # Processo recém-iniciado: a lista salva em disco serve até o TTL vencer
+            salvos = snapshot_persistente.vendedores_salvos(self.armazenamento)
+            if salvos is not None: return _indexar_vendedores(salvos)
+        vendedores = self.armazenamento.ler_vendedores(so_se_mudou=atual is not None)
+        if vendedores is None: return atual
+        return _indexar_vendedores(vendedores)
+
+    def _roster(self) -> Dict:
+        # Cache curto e compartilhado; é invalidado a cada mudança de status/cadastro
+        try: return self._ler_nao_critico(('vendedores',), self._ler_vendedores, self.TTL_VENDEDORES)
+        except: return {"todos": [], "por_loja": {}, "sem_loja": []}
+
     def get_vendedores_por_loja(self, loja: str = None) -> List[Dict]:
-        try:
-            # Não usa mais cache para permitir ver mudanças de status
-            dados = self.aba_vendedores.get_all_values() if self.aba_vendedores else []
-            if not dados: return []
-            
-            vendedores = []
-            for i, linha in enumerate(dados):
-                if not linha: continue
-                nome = linha[0].strip()
-                if not nome or nome.upper() == "VENDEDOR": continue
-                
-                status = "ATIVO"
-                if len(linha) > 1:
-                    status = linha[1].strip().upper() or "ATIVO"
-                
-                vendedores.append({"VENDEDOR": nome, "STATUS": status, "row": i + 1})
-            
-            # Por padrão, as telas de atendimento só vêem ATIVOS
-            return [v for v in vendedores if v["STATUS"] == "ATIVO"]
-        except: return []
+        """Vendedores ATIVOS da loja (sem loja informada: todos os ativos da empresa)."""
+        roster = self._roster()
+        if loja:
+            vendedores = roster["por_loja"].get(chave_loja(loja), []) + roster["sem_loja"]
+            vendedores.sort(key=lambda v: v["row"])
+        else:
+            vendedores = roster["todos"]
+        # Por padrão, as telas de atendimento só vêem ATIVOS
+        return [v for v in vendedores if v["STATUS"] == "ATIVO"]
 
     def get_todos_vendedores(self) -> List[Dict]:
-        try:
-            dados = self.aba_vendedores.get_all_values() if self.aba_vendedores else []
-            if not dados: return []
-            
-            vendedores = []
-            for i, linha in enumerate(dados):
-                if not linha: continue
-                nome = linha[0].strip()
-                if not nome or nome.upper() == "VENDEDOR": continue
-                
-                status = "ATIVO"
-                if len(linha) > 1:
-                    status = linha[1].strip().upper() or "ATIVO"
-                
-                vendedores.append({"VENDEDOR": nome, "STATUS": status, "row": i + 1})
-            return vendedores
-        except: return []
-
-    def adicionar_vendedor(self, nome: str) -> bool:
-        try:
-            if not self.aba_vendedores: return False
-            self.aba_vendedores.append_row([nome.upper(), "ATIVO"])
-            if 'vendedores_cache' in st.session_state: del st.session_state.vendedores_cache
-            return True
-        except: return False
+        return self._roster()["todos"]
+
+    @property
+    def fragmentado(self) -> bool:
+        """Relatorio dividido por loja em mais de uma aba/planilha (ver fragmentacao)."""
+        return self.armazenamento is not None and len(self.armazenamento.nomes_fragmentos()) > 1
+
+    def get_snapshot_relatorio(self, loja: str = None) -> SnapshotRelatorio:
+        """
+        Snapshot colunar do relatorio, único por processo e compartilhado entre sessões.
+        Com o relatorio fragmentado, `loja` traz só o fragmento dela (as outras lojas podem
+        vir junto se dividem o fragmento: filtre por loja); sem `loja`, todos os fragmentos.
+        """
+        if not self.fragmentado:
+            return self._ler_nao_critico(('relatorio',), self._sincronizar_relatorio, self.TTL_RELATORIO)
+        if loja: return self.get_snapshot_fragmento(self.armazenamento.fragmento_da_loja(loja))
+        return self._ler_nao_critico(('relatorio',), self._juntar_fragmentos, self.TTL_RELATORIO)
+
+    def get_snapshot_fragmento(self, nome: str) -> SnapshotRelatorio:
+        """Snapshot só do fragmento `nome` (ver nomes_fragmentos); sem fragmentação, o relatorio inteiro."""
+        if not self.fragmentado: return self.get_snapshot_relatorio()
+        return self._ler_nao_critico(('relatorio', 'fragmento', nome), lambda: self._sincronizar_fragmento(nome), self.TTL_RELATORIO)
+
+    def _sincronizar_relatorio(self, chave: tuple = ('relatorio',), armazenamento=None) -> SnapshotRelatorio:
+        """
+        Traz para o snapshot só o que mudou no relatorio desde a última vez (no Sheets,
+        por blocos: ver sincronizacao_blocos). Na primeira vez do processo parte do snapshot
+        salvo em disco (ver snapshot_persistente) ou, sem ele, lê tudo.
+        """
+        with _trava(chave):
+            return self._sincronizar_relatorio_travado(chave, armazenamento or self.armazenamento)
+
+    def _sincronizar_relatorio_travado(self, chave: tuple, armazenamento) -> SnapshotRelatorio:
+        atual = cache.obter(chave)
+        if atual is None and armazenamento is self.armazenamento:
+            atual = snapshot_persistente.restaurar(armazenamento)
+            if atual is not None: cache.definir(chave, atual)
+        alteracoes = armazenamento.sincronizar_relatorio(None if atual is None else len(atual))
+        if not alteracoes.mudou: return atual
+
+        cabecalho = alteracoes.cabecalho or self.COLUNAS_RELATORIO
+        if alteracoes.completo is not None:
+            snap = SnapshotRelatorio.de_linhas(alteracoes.completo)
+            if atual is not None: snap.edicao = atual.edicao + (1 if alteracoes.recarga else 0)
+            logger.info("Snapshot do relatorio carregado: %s", snap.resumo_memoria())
+            cache.definir(chave, snap)
+        else:
+            # Índice 0 é o cabeçalho: no snapshot a linha i da aba é a i - 1
+            blocos = {max(0, i - 1): (linhas[1:] if i == 0 else linhas) for i, linhas in alteracoes.blocos.items()}
+
+            def aplicar(snap):
+                if alteracoes.so_acrescimo:
+                    (inicio, linhas), = blocos.items()
+                    return snap.com_linhas(linhas[max(0, len(snap) - inicio):], cabecalho)   # as gravadas aqui já estão
+                return snap.com_blocos(blocos, alteracoes.total - 1, cabecalho)
+            cache.atualizar(chave, aplicar)
+        cache.remover_prefixo(('hoje',))
+        cache.remover_prefixo(('reservas',))
+        return cache.obter(chave)
+
+    def _sincronizar_fragmento(self, nome: str) -> SnapshotRelatorio:
+        fragmento = self.armazenamento.fragmento(nome)
+        if not fragmento.disponivel:   # rota para uma aba que ainda não existe: nada gravado nela
+            return SnapshotRelatorio.de_linhas([self.COLUNAS_RELATORIO])
+        return self._sincronizar_relatorio(('relatorio', 'fragmento', nome), fragmento)
+
+    def _juntar_fragmentos(self, forcar: bool = False) -> SnapshotRelatorio:
+        """
+        Snapshot de todas as lojas. Os fragmentos são sincronizados em paralelo (os que
+        estão dentro do TTL vêm do cache, a não ser com `forcar`) e o geral recebe só as
+        linhas que cada um ganhou desde a última junção. Se algum fragmento foi editado ou
+        encolheu, o geral é remontado com `edicao` nova, como numa edição da aba única.
+        """
+        nomes = self.armazenamento.nomes_fragmentos()
+
+        def sincronizar(nome):
+            chave = ('relatorio', 'fragmento', nome)
+            if not forcar: return cache.obter_ou_carregar(chave, lambda: self._sincronizar_fragmento(nome), self.TTL_RELATORIO)
+            snap = self._sincronizar_fragmento(nome)
+            cache.definir(chave, snap)   # renova o TTL mesmo sem mudanças
+            return snap
+        em_paralelo(sincronizar, nomes)
+
+        with _trava(('relatorio',)):
+            atual, consumido = cache.obter(('relatorio',)), cache.obter(('relatorio', 'consumido')) or {}
+            partes = {nome: cache.obter(('relatorio', 'fragmento', nome)) for nome in nomes}
+            remontar = atual is None or set(consumido) != set(nomes) or any(
+                consumido[n][0] != p.edicao or consumido[n][1] > len(p) for n, p in partes.items())
+            snap = SnapshotRelatorio.de_linhas([self.COLUNAS_RELATORIO]) if remontar else atual
+            for nome, parte in partes.items():
+                snap = snap.com_snapshot(parte, 0 if remontar else consumido[nome][1])
+            if remontar and atual is not None: snap.edicao = atual.edicao + 1
+            if snap is not atual:
+                cache.definir(('relatorio',), snap)
+                cache.definir(('relatorio', 'consumido'), {n: (p.edicao, len(p)) for n, p in partes.items()})
+        return snap
+
+    def salvar_snapshot(self) -> bool:
+        """Grava em disco o snapshot, a marca de sincronização e os vendedores (se mudaram)."""
+        if self.fragmentado: return False   # cada fragmento tem a sua marca; o arquivo é de uma aba só
+        with _trava(('relatorio',)):   # snapshot e marca do mesmo instante
+            snap, marca = cache.obter(('relatorio',)), self.armazenamento.marca_relatorio()
+        roster = cache.obter(('vendedores',))
+        return snapshot_persistente.salvar(snap, self.armazenamento, marca, roster["todos"] if roster else None)
+
+    def _chave_snapshot(self, loja: str = None) -> tuple:
+        if self.fragmentado and loja: return ('relatorio', 'fragmento', self.armazenamento.fragmento_da_loja(loja))
+        return ('relatorio',)
+
+    def _relatorio_da_loja(self, loja: str = None):
+        # Armazenamento do fragmento da loja (sem fragmentação, o próprio)
+        return self.armazenamento.fragmento(self.armazenamento.fragmento_da_loja(loja)) if loja else self.armazenamento
+
+    def snapshot_com_colunas(self, colunas: List[str] = None, loja: str = None) -> SnapshotRelatorio:
+        """
+        Snapshot que tem pelo menos `colunas`. Com o snapshot do processo já carregado (mesmo
+        vencido) é ele, sincronizado; num processo que ainda não o tem, um snapshot só com
+        essas colunas (as outras ficam vazias), que não ocupa o lugar do completo no cache.
+        """
+        if colunas is None or cache.obter(self._chave_snapshot(loja)) is not None:
+            return self.get_snapshot_relatorio(loja)
+        return SnapshotRelatorio.de_linhas(self._relatorio_da_loja(loja).ler_colunas_relatorio(colunas), colunas)
+
+    def ler_colunas_relatorio(self, colunas: List[str], inicio: int = 0, fim: int = None, loja: str = None) -> List[Dict]:
+        """
+        Registros (como `get_all_records`) só com `colunas`, das linhas [inicio, fim) do relatorio
+        (0 é a primeira depois do cabeçalho; com o relatorio fragmentado e `loja`, do fragmento dela).
+        Sem o snapshot no processo, baixa só as faixas dessas colunas num único batch_get.
+        """
+        if cache.obter(self._chave_snapshot(loja)) is not None:
+            snap = self.get_snapshot_relatorio(loja)
+            return snap.registros(np.arange(inicio, len(snap) if fim is None else min(fim, len(snap))), colunas)
+        snap = SnapshotRelatorio.de_linhas(self._relatorio_da_loja(loja).ler_colunas_relatorio(colunas, inicio, fim), colunas)
+        return snap.registros(np.arange(len(snap)), colunas)
+
+    def get_registros_hoje(self, loja: str, dia=None, colunas: List[str] = None) -> List[Dict]:
+        """Registros da loja na data informada (padrão: hoje em São Paulo), só com `colunas` se informadas."""
+        loja = str(loja).strip().upper()
+        dia = dia or datetime.now(ZoneInfo("America/Sao_Paulo")).date()
+
+        def carregar():
+            snap = self.snapshot_com_colunas(colunas and list(dict.fromkeys(['LOJA', 'DATA', *colunas])), loja)
+            return snap.registros(snap.filtrar(loja=loja, dia=dia), colunas)
+        return self._ler_nao_critico(('hoje', loja, dia) + ((tuple(colunas),) if colunas else ()), carregar, self.TTL_RELATORIO)
+
+    def get_reservas_ativas(self, loja: str) -> List[Dict]:
+        """Saldo de reservas por vendedor/cliente da loja (somente saldo > 0)."""
+        loja = str(loja).strip().upper()
+
+        def carregar():
+            snap = self.snapshot_com_colunas(self.COLUNAS_RESERVAS, loja or None)
+            idx = snap.filtrar(loja=loja or None)
+            idx = idx[snap.metricas['RESERVAS'][idx] != 0]
+            if not len(idx): return []
+            df = pd.DataFrame({
+                'v': snap.codigos['VENDEDOR'][idx], 'c': snap.codigos['CLIENTE'][idx],
+                'RESERVAS': snap.metricas['RESERVAS'][idx].astype(int), 'd': snap.data[idx],
+            }).groupby(['v', 'c'], sort=False).agg({'RESERVAS': 'sum', 'd': 'max'}).reset_index()
+            df = df[df['RESERVAS'] > 0]
+            return [
+                {'VENDEDOR': snap.categorias['VENDEDOR'][v], 'CLIENTE': snap.categorias['CLIENTE'][c],
+                 'RESERVAS': int(r), 'DATA': datetime.fromordinal(int(d)).strftime("%d/%m/%Y") if d > 0 else ''}
+                for v, c, r, d in df[['v', 'c', 'RESERVAS', 'd']].itertuples(index=False)
+            ]
+        return self._ler_nao_critico(('reservas', loja), carregar, self.TTL_RELATORIO)
+
+    def recarregar_cache(self) -> bool:
+        """
+        Recarrega vendedores e o snapshot do relatorio no cache compartilhado, fora do
+        caminho das telas (usado pelo agendador). Não faz nada em economia de cota.
+        """
+        if self.em_economia(): return False
+        cache.definir(('vendedores',), self._ler_vendedores())
+        if self.fragmentado: cache.definir(('relatorio',), self._juntar_fragmentos(forcar=True))
+        else: cache.definir(('relatorio',), self._sincronizar_relatorio())   # renova o TTL mesmo sem mudanças
+        return True
+
+    def _aplicar_no_roster(self, alteracoes: Dict[int, Dict], novos: List[Dict]):
+        # Atualiza o roster em cache com o que acabou de ser gravado, sem reler a aba
+        def aplicar(roster):
+            vendedores = [dict(v, **alteracoes.get(v["row"], {})) for v in roster["todos"]]
+            return _indexar_vendedores(vendedores + novos)
+        cache.atualizar(('vendedores',), aplicar)
+
+    def adicionar_vendedor(self, nome: str, lojas: List[str] = None) -> bool:
+        return self.salvar_vendedores_em_lote({}, [{"VENDEDOR": nome, "STATUS": "ATIVO", "LOJAS": lojas or []}])
 
     def atualizar_status_vendedor(self, row: int, novo_status: str) -> bool:
+        vendedor = next((v for v in self.get_todos_vendedores() if v["row"] == row), None)
+        if vendedor is None: return False
+        return self.salvar_vendedores_em_lote({row: {"STATUS": novo_status, "LOJAS": vendedor["LOJAS"]}}, [])
+
+    def atualizar_lojas_vendedor(self, row: int, lojas: List[str]) -> bool:
+        """Grava as lojas em que o vendedor atende."""
+        vendedor = next((v for v in self.get_todos_vendedores() if v["row"] == row), None)
+        if vendedor is None: return False
+        return self.salvar_vendedores_em_lote({row: {"STATUS": vendedor["STATUS"], "LOJAS": lojas}}, [])
+
+    def salvar_vendedores_em_lote(self, alteracoes: Dict[int, Dict], novos: List[Dict]) -> bool:
+        """
+        Grava várias mudanças do cadastro de uma vez: `alteracoes` (row -> {"STATUS", "LOJAS"})
+        e `novos` ({"VENDEDOR", "STATUS", "LOJAS"}), cada grupo numa única chamada.
+        """
+        if not self.conectado:
+            st.error("❌ Sem conexão com o cadastro de vendedores.")
+            return False
         try:
-            if not self.aba_vendedores: return False
-            self.aba_vendedores.update_cell(row, 2, novo_status.upper())
-            if 'vendedores_cache' in st.session_state: del st.session_state.vendedores_cache
+            alteracoes = {
+                row: {"STATUS": a["STATUS"].upper(), "LOJAS": separar_lojas(", ".join(a["LOJAS"]))}
+                for row, a in alteracoes.items()
+            }
+            if alteracoes:
+                self.armazenamento.atualizar_vendedores(alteracoes)
+                self._aplicar_no_roster(alteracoes, [])
+
+            if novos:
+                novos = [{"VENDEDOR": n["VENDEDOR"].strip().upper(), "STATUS": n.get("STATUS", "ATIVO").upper(),
+                          "LOJAS": separar_lojas(", ".join(n.get("LOJAS") or []))} for n in novos]
+                primeira = self.armazenamento.inserir_vendedores(novos)
+                if primeira is None: cache.remover(('vendedores',))  # sem saber as linhas, relê na próxima
+                else:
+                    novos = [dict(n, row=primeira + i) for i, n in enumerate(novos)]
+                    self._aplicar_no_roster({}, novos)
+            if alteracoes or novos:
+                eventos.barramento.publicar(eventos.VENDEDORES, {
+                    "alterados": [dict(a, row=row) for row, a in alteracoes.items()], "novos": novos})
             return True
-        except: return False
+        except sqlite3.IntegrityError as e:
+            # vendedores.nome é UNIQUE no SQLite
+            logger.warning("Vendedor duplicado no cadastro: %s", e)
+            st.error("❌ Já existe um vendedor com esse nome.")
+            return False
+        except Exception as e:
+            logger.exception("Falha ao salvar o cadastro de vendedores")
+            st.error(f"❌ Falha ao salvar vendedores: {e}")
+            return False
 
     def limpar_reservas_antigas(self, minutos=1) -> int:
-        aba_reservas = self._get_worksheet("reservas")
-        if not aba_reservas: return 0
-        try:
-            dados = aba_reservas.get_all_values()
-            if len(dados) < 2: return 0
-            agora = datetime.now(ZoneInfo("America/Sao_Paulo"))
-            count = 0
-            for i in range(len(dados)-1, 0, -1):
-                linha = dados[i]
-                if len(linha) > 5 and linha[5].strip().upper() == "PENDENTE":
-                    try:
-                        criacao = parser.parse(linha[0], dayfirst=True).replace(tzinfo=ZoneInfo("America/Sao_Paulo"))
-                        if (agora - criacao).total_seconds() > minutos * 60:
-                            aba_reservas.delete_rows(i + 1)
-                            count += 1
-                    except: continue
-            return count
-        except: return 0
+        if not self.conectado: return 0
+        # Limpeza é manutenção: cede a cota de escrita aos atendimentos
+        removidas = self.armazenamento.remover_reservas_pendentes(minutos, lambda: not self.em_economia('escrita'))
+        if removidas: eventos.barramento.publicar(eventos.RESERVAS_LIMPAS, {"quantidade": removidas, "minutos": minutos})
+        return removidas
+
+
+def _selo_dados_antigos(idade: float):
+    """Aviso discreto de que a tela está usando dados em cache (só na thread do script)."""
+    if idade is None or get_script_run_ctx() is None: return
+    # Um aviso por rerun (rerun_n é incrementado no topo do app.py)
+    rerun = st.session_state.get('rerun_n')
+    if rerun is not None and st.session_state.get('_selo_cache_rerun') == rerun: return
+    st.session_state['_selo_cache_rerun'] = rerun
+    st.caption(f"🕒 dados de {int(idade)} segundos atrás — economizando a cota do Google")
@@ -0,0 +1,193 @@
+"""
+Importação em lote de registros históricos (CSV/XLSX) para a aba relatorio.
+
+O arquivo precisa ter as colunas de GooglePlanilha.COLUNAS_RELATORIO (maiúsculas ou
+minúsculas, em qualquer ordem). As linhas são gravadas em blocos com append_rows,
+respeitando a cota de escrita, e o progresso fica salvo num checkpoint: se a importação
+for interrompida, rodar o mesmo comando continua de onde parou.
+
+Uso:
+    python importar_historico.py loja09_2024.csv --lote 500
+    python importar_historico.py loja09_2024.xlsx --dry-run
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from datetime import datetime
+from typing import List, Tuple
+
+import pandas as pd
+from gspread.exceptions import APIError
+
+from google_planilha import GooglePlanilha, abrir_gsheets, orcamento_processo, LIMIAR_ECONOMIA
+
+OBRIGATORIAS = ['LOJA', 'DATA', 'VENDEDOR', 'CLIENTE']
+METRICAS = GooglePlanilha.COLUNAS_RELATORIO[5:]
+
+
+def ler_arquivo(caminho: str) -> pd.DataFrame:
+    if caminho.lower().endswith((".xlsx", ".xls")):
+        df = pd.read_excel(caminho, dtype=str).fillna("")
+    else:
+        try:
+            df = pd.read_csv(caminho, dtype=str, keep_default_na=False, sep=None, engine="python", encoding="utf-8-sig")
+        except UnicodeDecodeError:
+            df = pd.read_csv(caminho, dtype=str, keep_default_na=False, sep=None, engine="python", encoding="latin-1")
+    df.columns = [("GOOGLE" if str(c).strip().upper() == "GOOGLE1" else str(c).strip().upper()) for c in df.columns]
+    return df
+
+
+def _normalizar_data(valor: str) -> str:
+    valor = str(valor).strip()
+    for formato in ("%d/%m/%Y", "%Y-%m-%d %H:%M:%S", "%Y-%m-%d", "%d-%m-%Y", "%d/%m/%y"):
+        try: return datetime.strptime(valor, formato).strftime("%d/%m/%Y")
+        except ValueError: continue
+    raise ValueError(f"data inválida '{valor}'")
+
+
+def _normalizar_hora(valor: str) -> str:
+    valor = str(valor).strip()
+    if not valor: return ""
+    for formato in ("%H:%M:%S", "%H:%M", "%Y-%m-%d %H:%M:%S"):
+        try: return datetime.strptime(valor, formato).strftime("%H:%M:%S")
+        except ValueError: continue
+    raise ValueError(f"hora inválida '{valor}'")
+
+
+def _normalizar_metrica(valor: str) -> str:
+    valor = str(valor).strip()
+    if valor == "": return ""
+    try: numero = float(valor.replace(",", "."))
+    except ValueError: raise ValueError(f"valor numérico inválido '{valor}'")
+    if numero != int(numero): raise ValueError(f"valor numérico inválido '{valor}'")
+    return str(int(numero))
+
+
+def validar(df: pd.DataFrame) -> Tuple[List[List[str]], List[str]]:
+    """Converte o DataFrame em linhas do relatorio. Devolve (linhas válidas, erros)."""
+    faltando = [c for c in GooglePlanilha.COLUNAS_RELATORIO if c not in df.columns and c != 'HORA']
+    if faltando:
+        return [], [f"Colunas ausentes: {', '.join(faltando)}"]
+
+    linhas, erros = [], []
+    for numero, registro in enumerate(df.to_dict("records"), start=2):  # linha 1 é o cabeçalho
+        try:
+            for campo in OBRIGATORIAS:
+                if not str(registro.get(campo, "")).strip(): raise ValueError(f"{campo} é obrigatório")
+            linhas.append([
+                str(registro['LOJA']).strip().upper(),
+                _normalizar_data(registro['DATA']),
+                _normalizar_hora(registro.get('HORA', "")),
+                str(registro['VENDEDOR']).strip().upper(),
+                str(registro['CLIENTE']).strip().upper(),
+                *[_normalizar_metrica(registro.get(m, "")) for m in METRICAS],
+            ])
+        except ValueError as e:
+            erros.append(f"linha {numero}: {e}")
+    return linhas, erros
+
+
+# --- Checkpoint ---
+
+def _hash_arquivo(caminho: str) -> str:
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1 << 20), b""): h.update(bloco)
+    return h.hexdigest()
+
+
+def ler_checkpoint(caminho: str, hash_arquivo: str) -> int:
+    if not os.path.exists(caminho): return 0
+    with open(caminho, "r", encoding="utf-8") as f:
+        dados = json.load(f)
+    if dados.get("sha256") != hash_arquivo:
+        raise SystemExit(f"❌ O checkpoint {caminho} é de outra versão do arquivo. Apague-o para recomeçar.")
+    return int(dados.get("linhas_enviadas", 0))
+
+
+def gravar_checkpoint(caminho: str, arquivo: str, hash_arquivo: str, enviadas: int, total: int):
+    temporario = caminho + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump({"arquivo": os.path.abspath(arquivo), "sha256": hash_arquivo, "linhas_enviadas": enviadas,
+                   "total": total, "atualizado_em": datetime.now().isoformat(timespec="seconds")}, f, indent=2)
+    os.replace(temporario, caminho)
+
+
+# --- Envio ---
+
+def _aguardar_cota():
+    while orcamento_processo.fracao('escrita') >= LIMIAR_ECONOMIA:
+        time.sleep(1)
+
+
+def enviar(gsheets: GooglePlanilha, linhas: List[List[str]], inicio: int, lote: int, ao_gravar) -> int:
+    enviadas = inicio
+    t0 = time.perf_counter()
+    tentativas = 0
+    while enviadas < len(linhas):
+        bloco = linhas[enviadas:enviadas + lote]
+        _aguardar_cota()
+        try:
+            gsheets.acrescentar_linhas_relatorio(bloco)
+        except APIError as e:
+            if getattr(e, 'code', None) != 429 or tentativas >= 6: raise
+            tentativas += 1
+            espera = min(60, 2 ** tentativas)
+            print(f"⏳ Cota do Google atingida; nova tentativa em {espera}s")
+            time.sleep(espera)
+            continue
+        tentativas = 0
+        enviadas += len(bloco)
+        ao_gravar(enviadas)
+        decorrido = time.perf_counter() - t0
+        taxa = (enviadas - inicio) / decorrido if decorrido else 0.0
+        print(f"✅ {enviadas}/{len(linhas)} linhas ({taxa:.0f} linhas/s)")
+    return enviadas - inicio
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Importa registros históricos para a aba relatorio.")
+    ap.add_argument("arquivo", help="Arquivo .csv ou .xlsx")
+    ap.add_argument("--lote", type=int, default=500, help="Linhas por append_rows")
+    ap.add_argument("--checkpoint", help="Arquivo de checkpoint (padrão: <arquivo>.checkpoint.json)")
+    ap.add_argument("--dry-run", action="store_true", help="Só valida e mostra o que seria gravado")
+    ap.add_argument("--ignorar-invalidas", action="store_true", help="Importa as linhas válidas mesmo havendo erros")
+    args = ap.parse_args(argv)
+
+    t0 = time.perf_counter()
+    linhas, erros = validar(ler_arquivo(args.arquivo))
+    print(f"📄 {len(linhas)} linhas válidas, {len(erros)} com erro ({time.perf_counter() - t0:.1f}s de leitura)")
+    for erro in erros[:20]: print(f"   ⚠️ {erro}")
+    if len(erros) > 20: print(f"   ... e mais {len(erros) - 20} erros")
+    if erros and (not args.ignorar_invalidas or not linhas):
+        return 1
+
+    hash_arquivo = _hash_arquivo(args.arquivo)
+    checkpoint = args.checkpoint or args.arquivo + ".checkpoint.json"
+    inicio = ler_checkpoint(checkpoint, hash_arquivo)
+    if inicio: print(f"↪️ Retomando a partir da linha {inicio + 1} (checkpoint {checkpoint})")
+
+    if args.dry_run:
+        blocos = -(-(len(linhas) - inicio) // args.lote)
+        print(f"🔎 Dry-run: {len(linhas) - inicio} linhas seriam gravadas em {blocos} chamadas append_rows")
+        for linha in linhas[inicio:inicio + 5]: print("   ", linha)
+        return 0
+
+    gsheets = abrir_gsheets()
+    if not gsheets.conectado:
+        print("❌ Aba relatorio não encontrada.")
+        return 1
+
+    t0 = time.perf_counter()
+    gravadas = enviar(gsheets, linhas, inicio, args.lote,
+                      lambda n: gravar_checkpoint(checkpoint, args.arquivo, hash_arquivo, n, len(linhas)))
+    duracao = time.perf_counter() - t0
+    print(f"🏁 {gravadas} linhas gravadas em {duracao:.1f}s ({gravadas / duracao if duracao else 0:.0f} linhas/s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
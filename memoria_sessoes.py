@@ -0,0 +1,176 @@
+import os
+import sys
+import time
+import types
+import logging
+from collections import deque
+from typing import Dict, List
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+PROFUNDIDADE_MAXIMA = 4
+# Só mexemos em sessões paradas há pelo menos isso (quem está sem rerun é conferido à parte)
+OCIOSO_MINIMO_S = 30
+PDF_OCIOSO_MIN = int(os.environ.get("DESCARTE_PDF_OCIOSO_MIN", 10))
+PDF_APOS_DOWNLOAD_S = int(os.environ.get("DESCARTE_PDF_APOS_DOWNLOAD_S", 120))
+CONEXAO_OCIOSA_MIN = int(os.environ.get("DESCARTE_CONEXAO_OCIOSA_MIN", 60))
+
+_NAO_PERCORRER = (type, types.ModuleType, types.FunctionType, types.MethodType, types.BuiltinFunctionType)
+
+
+def tamanho_aproximado(obj, vistos: set = None, profundidade: int = 0) -> int:
+    """Bytes aproximados de um objeto e do que ele referencia (até PROFUNDIDADE_MAXIMA níveis)."""
+    vistos = set() if vistos is None else vistos
+    if id(obj) in vistos: return 0
+    vistos.add(id(obj))
+
+    if isinstance(obj, (str, bytes, bytearray)): return sys.getsizeof(obj)
+    if isinstance(obj, (pd.DataFrame, pd.Series)): return int(np.sum(obj.memory_usage(deep=True)))
+    if isinstance(obj, np.ndarray): return int(obj.nbytes)
+    tamanho = sys.getsizeof(obj, 0)
+    if profundidade >= PROFUNDIDADE_MAXIMA or isinstance(obj, _NAO_PERCORRER): return tamanho
+
+    proximo = profundidade + 1
+    if isinstance(obj, dict):
+        for k, v in obj.items():
+            tamanho += tamanho_aproximado(k, vistos, proximo) + tamanho_aproximado(v, vistos, proximo)
+    elif isinstance(obj, (list, tuple, set, frozenset, deque)):
+        for item in obj: tamanho += tamanho_aproximado(item, vistos, proximo)
+    elif hasattr(obj, "__dict__"):
+        tamanho += tamanho_aproximado(vars(obj), vistos, proximo)
+    return tamanho
+
+
+# --- Sessões do servidor ---
+
+def _sessoes():
+    """SessionInfo de todas as sessões do processo (vazio fora de um servidor Streamlit)."""
+    try:
+        from streamlit.runtime import Runtime
+        if not Runtime.exists(): return []
+        return list(Runtime.instance()._session_mgr.list_sessions())
+    except Exception as e:
+        logger.debug("Sessões indisponíveis: %s", e)
+        return []
+
+
+def _script_rodando(sessao) -> bool:
+    """
+    Há um rerun em andamento (ou saindo). O AppSession guarda o ScriptRunner até ele
+    terminar; enquanto isso o script mexe no session_state e não podemos apagar nada.
+    """
+    return getattr(sessao, "_scriptrunner", None) is not None
+
+
+def _ocioso(estado: Dict, agora: float) -> float:
+    ultima = estado.get("ultima_atividade")
+    return agora - ultima if ultima else 0.0
+
+
+def levantamento() -> List[Dict]:
+    """Por sessão: usuário, loja, tempo ocioso e tamanho aproximado de cada chave do session_state."""
+    agora = time.time()
+    resultado = []
+    for info in _sessoes():
+        try: estado = info.session.session_state.filtered_state
+        except Exception: continue
+        vistos = set()
+        chaves = {k: tamanho_aproximado(v, vistos) for k, v in estado.items()}
+        resultado.append({
+            "sessao": info.session.id,
+            "ativa": info.is_active(),
+            "usuario": estado.get("nome_atendente") or "—",
+            "loja": estado.get("loja") or "—",
+            "ocioso_s": _ocioso(estado, agora),
+            "chaves": chaves,
+            "total": sum(chaves.values()),
+        })
+    return resultado
+
+
+def totais_por_chave(sessoes: List[Dict]) -> pd.DataFrame:
+    linhas = {}
+    for s in sessoes:
+        for chave, tamanho in s["chaves"].items():
+            atual = linhas.setdefault(chave, {"CHAVE": chave, "SESSÕES": 0, "TOTAL KB": 0.0, "MAIOR KB": 0.0})
+            atual["SESSÕES"] += 1
+            atual["TOTAL KB"] += tamanho / 1024
+            atual["MAIOR KB"] = max(atual["MAIOR KB"], tamanho / 1024)
+    df = pd.DataFrame(list(linhas.values()), columns=["CHAVE", "SESSÕES", "TOTAL KB", "MAIOR KB"])
+    return df.sort_values("TOTAL KB", ascending=False).round(1)
+
+
+# --- Políticas de descarte ---
+
+class PoliticaDescarte:
+    """Descarta `chaves` de sessões ociosas há `ocioso_s` ou baixadas há `apos_download_s`."""
+
+    def __init__(self, nome: str, chaves: List[str], ocioso_s: float, apos_download_s: float = None,
+                 depois=None, manter=None):
+        self.nome = nome
+        self.chaves = chaves
+        self.ocioso_s = ocioso_s
+        self.apos_download_s = apos_download_s
+        self.depois = depois     # ajustes no estado após descartar (ex.: flags da tela)
+        self.manter = manter     # condição para não descartar (ex.: tarefa ainda rodando)
+
+    def vencida(self, estado: Dict, ocioso: float, agora: float) -> bool:
+        if ocioso >= self.ocioso_s: return True
+        baixado = (estado.get("baixado_em") or {}).get(self.chaves[0])
+        return bool(self.apos_download_s and baixado and agora - baixado >= self.apos_download_s)
+
+
+def _pdf_descartado(estado):
+    estado["pdf_gerado"] = False
+
+POLITICAS = [
+    PoliticaDescarte("PDF do encaminhamento", ["pdf_bytes"], PDF_OCIOSO_MIN * 60, PDF_APOS_DOWNLOAD_S,
+                     depois=_pdf_descartado),
+    # Recriadas sob demanda por garantir_conexao_gsheets quando o atendente voltar
+    PoliticaDescarte("Conexão com a planilha", ["gsheets", "gsheets_client", "planilha_atendimento"],
+                     CONEXAO_OCIOSA_MIN * 60),
+    PoliticaDescarte("Aquecimento concluído", ["aquecimento"], 5 * 60,
+                     manter=lambda estado: getattr(estado.get("aquecimento"), "ativo", False)),
+]
+
+
+def aplicar_politicas(politicas: List[PoliticaDescarte] = None) -> Dict[str, int]:
+    """
+    Aplica as políticas a todas as sessões paradas. Retorna quantas chaves cada uma descartou.
+
+    Roda na thread do agendador, sem a trava do script: sessões com rerun em andamento
+    ficam para a próxima rodada. Um rerun ainda pode começar logo depois da conferência,
+    então `depois` vem antes da remoção (ex.: pdf_gerado cai antes de pdf_bytes sumir) e
+    o script nunca vê uma flag apontando para uma chave que já foi embora.
+    """
+    politicas = POLITICAS if politicas is None else politicas
+    agora = time.time()
+    descartes = {p.nome: 0 for p in politicas}
+    for info in _sessoes():
+        try:
+            if _script_rodando(info.session): continue
+            estado = info.session.session_state
+            visivel = estado.filtered_state
+        except Exception: continue
+        ocioso = _ocioso(visivel, agora)
+        if ocioso < OCIOSO_MINIMO_S: continue
+        for p in politicas:
+            presentes = [k for k in p.chaves if k in visivel]
+            if not presentes or not p.vencida(visivel, ocioso, agora): continue
+            if p.manter and p.manter(visivel): continue
+            try:
+                if p.depois: p.depois(estado)
+                for k in presentes: del estado[k]
+                descartes[p.nome] += len(presentes)
+            except Exception as e:
+                logger.warning("Falha ao descartar %s da sessão %s: %s", presentes, info.session.id, e)
+    return descartes
+
+
+def marcar_download(chave: str):
+    """on_click de st.download_button: registra quando o arquivo foi baixado."""
+    import streamlit as st
+    st.session_state.baixado_em = {**st.session_state.get("baixado_em", {}), chave: time.time()}
@@ -0,0 +1,54 @@
+import os
+import math
+from typing import Hashable, List
+import streamlit as st
+import pandas as pd
+
+# Linhas por página nas tabelas de relatório (só a página visível vai para o navegador)
+TAMANHO_PAGINA = int(os.environ.get("RELATORIO_PAGINA_LINHAS", 50))
+TAMANHOS = sorted({25, 50, 100, 200, TAMANHO_PAGINA})
+SEM_ORDEM = "—"
+
+
+def _chave_ordenacao(serie: pd.Series) -> pd.Series:
+    # Datas dd/mm/aaaa ordenam como data; o resto na ordem natural
+    if serie.dtype == object:
+        datas = pd.to_datetime(serie, format="%d/%m/%Y", errors="coerce")
+        if datas.notna().any(): return datas
+    return serie
+
+
+def ordenar(df: pd.DataFrame, coluna: str = None, decrescente: bool = False) -> pd.DataFrame:
+    if not coluna or coluna not in df.columns: return df
+    return df.sort_values(coluna, ascending=not decrescente, key=_chave_ordenacao, kind="stable")
+
+
+def fatiar(df: pd.DataFrame, pagina: int, tamanho: int) -> pd.DataFrame:
+    inicio = (pagina - 1) * tamanho
+    return df.iloc[inicio:inicio + tamanho]
+
+
+@st.fragment
+def tabela_paginada(df: pd.DataFrame, chave: str, filtro: Hashable = None, ordenaveis: List[str] = None):
+    """
+    Mostra `df` em páginas, ordenando e fatiando no servidor. Trocar página, ordem ou
+    tamanho só reexecuta este fragmento; mudar `filtro` (o que a tela usou para montar
+    `df`) volta para a primeira página. Totais devem ser calculados pela tela sobre o `df` inteiro.
+    """
+    c1, c2, c3, c4 = st.columns([3, 2, 2, 2])
+    coluna = c1.selectbox("Ordenar por", [SEM_ORDEM] + list(ordenaveis or df.columns), key=f"{chave}_ordem")
+    decrescente = c2.selectbox("Sentido", ["Crescente", "Decrescente"], key=f"{chave}_sentido") == "Decrescente"
+    tamanho = c3.selectbox("Linhas por página", TAMANHOS, index=TAMANHOS.index(TAMANHO_PAGINA), key=f"{chave}_tamanho")
+    paginas = max(1, math.ceil(len(df) / tamanho))
+
+    chave_pagina = f"{chave}_pagina"
+    assinatura = (coluna, decrescente, tamanho, filtro, len(df))
+    if st.session_state.get(f"{chave}_assinatura") != assinatura:
+        st.session_state[f"{chave}_assinatura"] = assinatura
+        st.session_state[chave_pagina] = 1
+    pagina = c4.number_input("Página", min_value=1, max_value=paginas, step=1, key=chave_pagina)
+
+    visivel = fatiar(ordenar(df, None if coluna == SEM_ORDEM else coluna, decrescente), pagina, tamanho)
+    st.dataframe(visivel, use_container_width=True, hide_index=True)
+    inicio = (pagina - 1) * tamanho
+    st.caption(f"Linhas {inicio + 1 if len(df) else 0}–{inicio + len(visivel)} de {len(df)} · página {pagina} de {paginas}")
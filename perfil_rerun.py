@@ -0,0 +1,125 @@
+import os
+import time
+import heapq
+import pstats
+import cProfile
+import logging
+import threading
+import itertools
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+PASTA_PERFIS = os.environ.get("PERFIL_PASTA", os.path.join("dados", "perfis"))
+PERFIS_MAXIMOS = int(os.environ.get("PERFIL_MAXIMOS", 20))
+FUNCOES_POR_PERFIL = 40
+
+
+# No Python 3.12+ só um cProfile pode estar ativo por processo (um segundo enable() levanta
+# ValueError) e ele mede todas as threads. Um rerun por vez é perfilado; os que chegam
+# enquanto outro está sendo medido rodam sem perfil.
+_lock_perfil = threading.Lock()
+
+
+class PerfiladorReruns:
+    """
+    Quando ativo, roda cada rerun sob cProfile e guarda só os PERFIS_MAXIMOS mais lentos
+    (em memória o resumo das funções; em disco o .prof completo para snakeviz/pstats).
+
+    O perfil é do processo, não da sessão: no Python 3.12+ ele inclui o que as outras
+    sessões executaram durante aquele rerun.
+    """
+
+    def __init__(self, pasta: str = PASTA_PERFIS, maximo: int = PERFIS_MAXIMOS):
+        self.pasta = pasta
+        self.maximo = maximo
+        self.ativo = os.environ.get("PERFIL_RERUNS", "0") == "1"
+        self._perfis = []            # heap (duração, sequência, registro): o mais rápido no topo
+        self._sequencia = itertools.count()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def perfilar(self, tela: str, loja: str = "", usuario: str = ""):
+        if not self.ativo:
+            yield
+            return
+        if not _lock_perfil.acquire(blocking=False):
+            yield   # outro rerun já está sendo perfilado
+            return
+        perfil = cProfile.Profile()
+        try:
+            perfil.enable()
+        except ValueError:
+            # Outro perfilador ativo no processo (fora deste módulo)
+            _lock_perfil.release()
+            yield
+            return
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            # st.rerun() e st.stop() saem por exceção: o rerun conta mesmo assim
+            perfil.disable()
+            _lock_perfil.release()
+            self._guardar(perfil, time.perf_counter() - inicio, tela, loja, usuario)
+
+    def _guardar(self, perfil: cProfile.Profile, duracao: float, tela: str, loja: str, usuario: str):
+        with self._lock:
+            if len(self._perfis) >= self.maximo and duracao <= self._perfis[0][0]: return
+        try:
+            stats = pstats.Stats(perfil)
+            registro = {
+                "quando": datetime.now(), "tela": tela, "loja": loja, "usuario": usuario,
+                "duracao": duracao, "funcoes": _funcoes_mais_caras(stats), "arquivo": None,
+            }
+            os.makedirs(self.pasta, exist_ok=True)
+            registro["arquivo"] = os.path.join(
+                self.pasta, f"{registro['quando']:%Y%m%d_%H%M%S_%f}_{tela}_{duracao * 1000:.0f}ms.prof"
+            )
+            stats.dump_stats(registro["arquivo"])
+        except Exception as e:
+            logger.warning("Não foi possível gravar o perfil do rerun: %s", e)
+
+        with self._lock:
+            heapq.heappush(self._perfis, (duracao, next(self._sequencia), registro))
+            while len(self._perfis) > self.maximo:
+                _, _, descartado = heapq.heappop(self._perfis)
+                try:
+                    if descartado["arquivo"]: os.remove(descartado["arquivo"])
+                except OSError: pass
+
+    def perfis(self) -> List[Dict]:
+        """Perfis guardados, do mais lento para o mais rápido."""
+        with self._lock:
+            return [r for _, _, r in sorted(self._perfis, key=lambda p: -p[0])]
+
+    def limpar(self):
+        with self._lock:
+            perfis, self._perfis = self._perfis, []
+        for _, _, r in perfis:
+            try:
+                if r["arquivo"]: os.remove(r["arquivo"])
+            except OSError: pass
+
+
+def _funcoes_mais_caras(stats: pstats.Stats) -> List[Dict]:
+    linhas = []
+    for (arquivo, linha, nome), (_, chamadas, proprio, acumulado, _) in stats.stats.items():
+        linhas.append({
+            "FUNÇÃO": nome, "ARQUIVO": f"{_encurtar(arquivo)}:{linha}", "CHAMADAS": chamadas,
+            "PRÓPRIO (ms)": round(proprio * 1000, 1), "ACUMULADO (ms)": round(acumulado * 1000, 1),
+        })
+    linhas.sort(key=lambda l: -l["ACUMULADO (ms)"])
+    return linhas[:FUNCOES_POR_PERFIL]
+
+
+def _encurtar(arquivo: str) -> str:
+    # site-packages/streamlit/... fica mais legível que o caminho absoluto
+    for marcador in ("site-packages" + os.sep, "lib" + os.sep + "python"):
+        if marcador in arquivo: return arquivo.split(marcador, 1)[1]
+    return os.path.basename(arquivo) if os.path.isabs(arquivo) else arquivo
+
+
+perfilador = PerfiladorReruns()
@@ -0,0 +1,239 @@
+import threading
+import time
+import random
+from collections import Counter, deque
+from typing import Dict, List
+from gspread.exceptions import APIError, WorksheetNotFound
+from gspread.utils import a1_range_to_grid_range, a1_to_rowcol, rowcol_to_a1, numericise
+
+
+class _RespostaFalsa:
+    """Imita o `requests.Response` que o gspread espera dentro de um APIError."""
+
+    def __init__(self, codigo: int, mensagem: str, status: str):
+        self.status_code = codigo
+        self.text = mensagem
+        self._erro = {"error": {"code": codigo, "message": mensagem, "status": status}}
+
+    def json(self):
+        return self._erro
+
+
+class ServidorFalso:
+    """
+    Substituto local do Google Sheets para testes de carga e ferramentas offline.
+
+    Guarda as planilhas em memória e simula a latência de rede e a cota por minuto
+    da API (estourou a cota -> APIError 429, como o gspread real).
+    """
+
+    def __init__(self, latencia: float = 0.15, variacao: float = 0.05,
+                 cota_leitura_min: int = 300, cota_escrita_min: int = 300):
+        self.latencia = latencia
+        self.variacao = variacao
+        self.cota_leitura_min = cota_leitura_min
+        self.cota_escrita_min = cota_escrita_min
+        self.planilhas: Dict[str, "PlanilhaFalsa"] = {}
+        self.chamadas = Counter()
+        self.recusadas = 0
+        self._janela = {"leitura": deque(), "escrita": deque()}
+        self._lock = threading.Lock()
+
+    def chamar(self, tipo: str, metodo: str, contador: Counter = None):
+        """Conta a chamada, aplica a cota do minuto corrente e espera a latência simulada."""
+        agora = time.monotonic()
+        cota = self.cota_leitura_min if tipo == "leitura" else self.cota_escrita_min
+        with self._lock:
+            janela = self._janela[tipo]
+            while janela and agora - janela[0] > 60: janela.popleft()
+            if len(janela) >= cota:
+                self.recusadas += 1
+                raise APIError(_RespostaFalsa(429, f"Quota exceeded ({tipo})", "RESOURCE_EXHAUSTED"))
+            janela.append(agora)
+            self.chamadas[metodo] += 1
+            if contador is not None: contador[metodo] += 1
+        if self.latencia > 0:
+            time.sleep(max(0.0, random.gauss(self.latencia, self.variacao)))
+
+    def criar_planilha(self, nome: str, abas: Dict[str, List[List[str]]] = None) -> "PlanilhaFalsa":
+        planilha = PlanilhaFalsa(self, nome)
+        for titulo, linhas in (abas or {}).items():
+            planilha.add_worksheet(titulo, rows=max(len(linhas), 1000), cols=26, _linhas=linhas)
+        self.planilhas[nome] = planilha
+        return planilha
+
+    def cliente(self) -> "ClienteFalso":
+        """Cliente novo com contador próprio (um por sessão simulada), compartilhando dados e cota."""
+        return ClienteFalso(self)
+
+
+class ClienteFalso:
+    def __init__(self, servidor: ServidorFalso):
+        self.servidor = servidor
+        self.chamadas = Counter()
+
+    def open(self, nome: str):
+        self.servidor.chamar("leitura", "open", self.chamadas)
+        return _VistaPlanilha(self.servidor.planilhas[nome], self)
+
+    def open_by_key(self, chave: str):
+        self.servidor.chamar("leitura", "open_by_key", self.chamadas)
+        for planilha in self.servidor.planilhas.values():
+            if planilha.id == chave: return _VistaPlanilha(planilha, self)
+        raise KeyError(chave)
+
+
+class PlanilhaFalsa:
+    def __init__(self, servidor: ServidorFalso, titulo: str):
+        self.servidor = servidor
+        self.title = titulo
+        self.id = f"falsa-{len(servidor.planilhas) + 1}"
+        self.abas: Dict[str, "AbaFalsa"] = {}
+
+    def add_worksheet(self, title: str, rows: int = 1000, cols: int = 26, _linhas=None):
+        aba = AbaFalsa(self, title, [list(map(str, l)) for l in (_linhas or [])], rows, cols)
+        self.abas[title] = aba
+        return aba
+
+
+class _VistaPlanilha:
+    """Planilha vista por um cliente: as chamadas são contadas no contador desse cliente."""
+
+    def __init__(self, planilha: PlanilhaFalsa, cliente: ClienteFalso):
+        self._planilha = planilha
+        self._cliente = cliente
+        self.title = planilha.title
+        self.id = planilha.id
+
+    def worksheet(self, titulo: str):
+        self._cliente.servidor.chamar("leitura", "worksheet", self._cliente.chamadas)
+        if titulo not in self._planilha.abas: raise WorksheetNotFound(titulo)
+        return _VistaAba(self._planilha.abas[titulo], self._cliente)
+
+    def worksheets(self):
+        self._cliente.servidor.chamar("leitura", "worksheets", self._cliente.chamadas)
+        return [_VistaAba(a, self._cliente) for a in self._planilha.abas.values()]
+
+    def add_worksheet(self, title: str, rows: int = 1000, cols: int = 26, **kwargs):
+        self._cliente.servidor.chamar("escrita", "add_worksheet", self._cliente.chamadas)
+        return _VistaAba(self._planilha.add_worksheet(title, rows, cols), self._cliente)
+
+
+class AbaFalsa:
+    def __init__(self, planilha: PlanilhaFalsa, titulo: str, linhas: List[List[str]], rows: int, cols: int):
+        self.planilha = planilha
+        self.title = titulo
+        self.linhas = linhas
+        self.row_count = max(rows, len(linhas))
+        self.col_count = cols
+        self.lock = threading.Lock()
+
+    def intervalo(self, a1: str) -> List[List[str]]:
+        grade = a1_range_to_grid_range(a1)
+        r0, r1 = grade.get("startRowIndex", 0), grade.get("endRowIndex", len(self.linhas))
+        c0, c1 = grade.get("startColumnIndex", 0), grade.get("endColumnIndex", self.col_count)
+        saida = [[(l[c] if c < len(l) else "") for c in range(c0, c1)] for l in self.linhas[r0:r1]]
+        # Como a API real: remove células vazias à direita e linhas vazias no fim
+        saida = [_aparar(l) for l in saida]
+        while saida and not saida[-1]: saida.pop()
+        return saida
+
+    def escrever(self, linha: int, coluna: int, valores: List[List]):
+        for i, vals in enumerate(valores):
+            idx = linha - 1 + i
+            while len(self.linhas) <= idx: self.linhas.append([])
+            atual = self.linhas[idx]
+            for j, v in enumerate(vals):
+                c = coluna - 1 + j
+                while len(atual) <= c: atual.append("")
+                atual[c] = str(v)
+        self.row_count = max(self.row_count, len(self.linhas))
+
+
+def _aparar(linha: List[str]) -> List[str]:
+    linha = list(linha)
+    while linha and linha[-1] == "": linha.pop()
+    return linha
+
+
+class _VistaAba:
+    """Subconjunto da API `gspread.Worksheet` usado pelo app."""
+
+    def __init__(self, aba: AbaFalsa, cliente: ClienteFalso):
+        self._aba = aba
+        self._cliente = cliente
+        self.title = aba.title
+
+    @property
+    def row_count(self):
+        return self._aba.row_count
+
+    def _chamar(self, tipo: str, metodo: str):
+        self._cliente.servidor.chamar(tipo, metodo, self._cliente.chamadas)
+
+    # --- Leituras ---
+
+    def get_all_values(self, **kwargs):
+        self._chamar("leitura", "get_all_values")
+        with self._aba.lock: return [_aparar(l) for l in self._aba.linhas]
+
+    def get_all_records(self, **kwargs):
+        self._chamar("leitura", "get_all_records")
+        with self._aba.lock: linhas = [list(l) for l in self._aba.linhas]
+        if not linhas: return []
+        cab = linhas[0]
+        return [{k: numericise(l[i] if i < len(l) else "") for i, k in enumerate(cab)} for l in linhas[1:]]
+
+    def row_values(self, linha: int, **kwargs):
+        self._chamar("leitura", "row_values")
+        with self._aba.lock:
+            return _aparar(self._aba.linhas[linha - 1]) if linha <= len(self._aba.linhas) else []
+
+    def col_values(self, coluna: int, **kwargs):
+        self._chamar("leitura", "col_values")
+        with self._aba.lock: valores = [l[coluna - 1] if coluna <= len(l) else "" for l in self._aba.linhas]
+        return _aparar(valores)
+
+    def get(self, a1: str = None, **kwargs):
+        self._chamar("leitura", "get")
+        with self._aba.lock: return self._aba.intervalo(a1 or "A1:Z")
+
+    def batch_get(self, intervalos: List[str], **kwargs):
+        self._chamar("leitura", "batch_get")
+        with self._aba.lock: return [self._aba.intervalo(a1) for a1 in intervalos]
+
+    # --- Escritas ---
+
+    def append_row(self, valores: List, **kwargs):
+        return self.append_rows([valores], **kwargs)
+
+    def append_rows(self, valores: List[List], **kwargs):
+        self._chamar("escrita", "append_rows")
+        with self._aba.lock:
+            inicio = len(self._aba.linhas) + 1
+            self._aba.escrever(inicio, 1, valores)
+        # Mesmo formato de resposta da API (usado para saber em que linhas os dados caíram)
+        fim = rowcol_to_a1(inicio + len(valores) - 1, max((len(v) for v in valores), default=1))
+        return {"updates": {"updatedRange": f"'{self.title}'!A{inicio}:{fim}", "updatedRows": len(valores)}}
+
+    def update(self, a1, valores=None, **kwargs):
+        # Aceita update("A1", [[...]]) e update([[...]], "A1") como o gspread 6
+        if not isinstance(a1, str): a1, valores = valores, a1
+        self._chamar("escrita", "update")
+        linha, coluna = a1_to_rowcol(a1.split(":")[0])
+        with self._aba.lock: self._aba.escrever(linha, coluna, valores)
+
+    def update_cell(self, linha: int, coluna: int, valor):
+        self._chamar("escrita", "update_cell")
+        with self._aba.lock: self._aba.escrever(linha, coluna, [[valor]])
+
+    def batch_update(self, dados: List[Dict], **kwargs):
+        self._chamar("escrita", "batch_update")
+        with self._aba.lock:
+            for item in dados:
+                linha, coluna = a1_to_rowcol(item["range"].split(":")[0])
+                self._aba.escrever(linha, coluna, item["values"])
+
+    def delete_rows(self, inicio: int, fim: int = None):
+        self._chamar("escrita", "delete_rows")
+        with self._aba.lock: del self._aba.linhas[inicio - 1:(fim or inicio)]
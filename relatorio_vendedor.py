@@ -0,0 +1,103 @@
+import io
+from datetime import date
+from typing import Dict, List
+
+import pandas as pd
+
+# Lógica do relatório por vendedor, sem Streamlit: usada pela tela e pelo lote diário
+
+COLUNAS_DESEJADAS = {
+    "DATA": ["data", "dt"],
+    "LOJA": ["loja", "unidade", "filial"],
+    "CLIENTE": ["cliente", "nome"],
+    "RECEITA": ["receita", "faturamento"],
+    "VENDA": ["venda", "pedidos"],
+    "PERDA": ["perda", "cancelamentos"],
+    "RESERVA": ["reserva", "agendamento"],
+    "GOOGLE": ["google"],
+}
+# Ordem solicitada: Google após Reserva
+ORDEM = ["DATA", "LOJA", "CLIENTE", "RECEITA", "VENDA", "PERDA", "RESERVA", "GOOGLE"]
+COLUNAS_NUMERICAS = ["RECEITA", "VENDA", "PERDA", "RESERVA", "GOOGLE"]
+RESUMO = {"Receitas": "RECEITA", "Vendas": "VENDA", "Perdas": "PERDA", "Reservas": "RESERVA", "Google": "GOOGLE"}
+# Colunas do relatorio que o relatório usa (o resto nem é lido: ver GooglePlanilha.ler_colunas_relatorio)
+COLUNAS_RELATORIO_VENDEDOR = ["LOJA", "DATA", "VENDEDOR", "CLIENTE", "RECEITAS", "VENDAS", "PERDAS", "RESERVAS", "GOOGLE"]
+
+
+def filtrar_vendedor(registros: List[Dict], vendedor: str) -> List[Dict]:
+    col_vend = None
+    for k in (registros[0].keys() if registros else []):
+        if k.strip().lower() in ['vendedor', 'vendedora', 'funcionário', 'vend']: col_vend = k
+    return [
+        r for r in registros
+        if str(r.get(col_vend, "")).strip().lower() == str(vendedor).strip().lower()
+    ]
+
+
+def montar_tabela(registros: List[Dict]) -> pd.DataFrame:
+    """Tabela do relatório (colunas de ORDEM, métricas numéricas) a partir dos registros do vendedor."""
+    df = pd.DataFrame(registros)
+
+    colunas_finais = {}
+    for nome, palavras in COLUNAS_DESEJADAS.items():
+        for col in df.columns:
+            if any(p in col.lower() for p in palavras):
+                colunas_finais[col] = nome
+                break
+
+    if colunas_finais:
+        df = df[list(colunas_finais.keys())].rename(columns=colunas_finais)
+
+    df = df[[c for c in ORDEM if c in df.columns]].copy()
+
+    for col in COLUNAS_NUMERICAS:
+        if col in df.columns:
+            df[col] = df[col].astype(str).str.strip().replace(
+                ["", "nan", "None", "NaN", "null", "–", "-", " ", "R$", "R$ "], "0"
+            )
+            df[col] = df[col].str.replace(r"[^\d.,-]", "", regex=True).str.replace(",", ".", regex=False)
+            df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0)
+    return df
+
+
+def resumo(df: pd.DataFrame) -> Dict[str, int]:
+    return {rotulo: int(df[col].sum()) if col in df.columns else 0 for rotulo, col in RESUMO.items()}
+
+
+def excel_bytes(df: pd.DataFrame) -> bytes:
+    buffer = io.BytesIO()
+    df.to_excel(buffer, index=False, engine="openpyxl")
+    return buffer.getvalue()
+
+
+def pdf_bytes(df: pd.DataFrame, loja: str, vendedor: str, dia: date) -> bytes:
+    from fpdf import FPDF
+    pdf = FPDF(orientation='L', unit='mm', format='A4')
+    pdf.add_page()
+
+    pdf.set_font("Arial", 'B', 16)
+    pdf.cell(0, 12, f"RELATÓRIO DO VENDEDOR - {dia.strftime('%d/%m/%Y')}", ln=True, align='C')
+    pdf.set_font("Arial", '', 11)
+    pdf.cell(0, 7, f"Loja: {loja}    Vendedor: {vendedor}", ln=True, align='C')
+    pdf.ln(4)
+
+    pdf.set_font("Arial", 'B', 11)
+    pdf.set_fill_color(240, 240, 240)
+    pdf.cell(0, 8, " RESUMO", ln=True, fill=True)
+    pdf.set_font("Arial", '', 11)
+    pdf.cell(0, 7, "    ".join(f"{k}: {v}" for k, v in resumo(df).items()), ln=True)
+    pdf.ln(4)
+
+    colunas = list(df.columns)
+    if colunas:
+        largura = (pdf.w - pdf.l_margin - pdf.r_margin) / len(colunas)
+        pdf.set_font("Arial", 'B', 9)
+        for col in colunas: pdf.cell(largura, 7, col, border=1, fill=True, align='C')
+        pdf.ln()
+        pdf.set_font("Arial", '', 9)
+        for linha in df.itertuples(index=False):
+            for col, valor in zip(colunas, linha):
+                texto = str(int(valor)) if col in COLUNAS_NUMERICAS else str(valor)
+                pdf.cell(largura, 6, texto[:40], border=1, align='C' if col in COLUNAS_NUMERICAS else 'L')
+            pdf.ln()
+    return bytes(pdf.output())
@@ -0,0 +1,117 @@
+"""
+Relatórios de fim de dia de todas as lojas e vendedores, sem abrir o Streamlit.
+
+Lê o relatorio uma única vez, separa os registros do dia por loja e distribui a montagem
+e a geração dos arquivos (Excel/PDF, a mesma lógica da tela de relatório por vendedor)
+entre processos. Os arquivos ficam em <saida>/<AAAA-MM-DD>/<LOJA>/.
+
+Uso:
+    python relatorios_diarios.py                      # hoje, todas as lojas, Excel e PDF
+    python relatorios_diarios.py --data 18/10/2026 --lojas "LOJA 01,LOJA 02" --formatos xlsx
+"""
+import argparse
+import os
+import sys
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime, date
+from typing import Dict, List
+from zoneinfo import ZoneInfo
+
+import pandas as pd
+
+from relatorio_vendedor import COLUNAS_RELATORIO_VENDEDOR, filtrar_vendedor, montar_tabela, resumo, excel_bytes, pdf_bytes
+
+PASTA_SAIDA = os.environ.get("FLUXO_RELATORIOS_DIR", "relatorios")
+
+
+def _nome_arquivo(texto: str) -> str:
+    return "".join(c if c.isalnum() or c in "-_" else "_" for c in str(texto).strip())
+
+
+def gerar_loja(loja: str, registros: List[Dict], vendedores: List[str], dia: date,
+               pasta: str, formatos: List[str]) -> Dict:
+    """Gera os arquivos de uma loja (um por vendedor + o resumo da loja). Roda num processo do pool."""
+    destino = os.path.join(pasta, _nome_arquivo(loja))
+    os.makedirs(destino, exist_ok=True)
+    sufixo = dia.strftime('%d%m%Y')
+    arquivos, linhas_resumo = [], []
+
+    for vendedor in vendedores:
+        dados = filtrar_vendedor(registros, vendedor)
+        if not dados: continue
+        df = montar_tabela(dados)
+        linhas_resumo.append({"VENDEDOR": vendedor, "REGISTROS": len(df), **resumo(df)})
+        base = os.path.join(destino, f"Relatorio_{_nome_arquivo(vendedor)}_{sufixo}")
+        if "xlsx" in formatos:
+            with open(base + ".xlsx", "wb") as f: f.write(excel_bytes(df))
+            arquivos.append(base + ".xlsx")
+        if "pdf" in formatos:
+            with open(base + ".pdf", "wb") as f: f.write(pdf_bytes(df, loja, vendedor, dia))
+            arquivos.append(base + ".pdf")
+
+    if linhas_resumo:
+        caminho = os.path.join(destino, f"Resumo_{_nome_arquivo(loja)}_{sufixo}.xlsx")
+        with open(caminho, "wb") as f: f.write(excel_bytes(pd.DataFrame(linhas_resumo)))
+        arquivos.append(caminho)
+    return {"loja": loja, "vendedores": len(linhas_resumo), "registros": len(registros), "arquivos": arquivos}
+
+
+def carregar_dia(gsheets, dia: date, lojas: List[str] = None):
+    """Uma leitura do relatorio (só as colunas do relatório): registros do dia por loja e vendedores de cada loja."""
+    snap = gsheets.snapshot_com_colunas(COLUNAS_RELATORIO_VENDEDOR)
+    por_loja = defaultdict(list)
+    for r in snap.registros(snap.filtrar(dia=dia), COLUNAS_RELATORIO_VENDEDOR):
+        por_loja[str(r.get('LOJA', '')).strip().upper()].append(r)
+    if lojas: por_loja = {l: por_loja.get(l, []) for l in lojas}
+
+    vendedores = {}
+    for loja, registros in por_loja.items():
+        # Quem está no cadastro da loja e quem registrou algo no dia (ex.: vendedor emprestado)
+        nomes = [v['VENDEDOR'] for v in gsheets.get_vendedores_por_loja(loja)]
+        nomes += sorted({str(r.get('VENDEDOR', '')).strip().upper() for r in registros} - set(nomes) - {""})
+        vendedores[loja] = nomes
+    return por_loja, vendedores
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Gera os relatórios de fim de dia por loja e vendedor.")
+    ap.add_argument("--data", help="Dia no formato dd/mm/aaaa (padrão: hoje em São Paulo)")
+    ap.add_argument("--lojas", help="Lojas separadas por vírgula (padrão: todas com registros no dia)")
+    ap.add_argument("--formatos", default="xlsx,pdf", help="xlsx, pdf ou ambos")
+    ap.add_argument("--saida", default=PASTA_SAIDA, help="Pasta base dos relatórios")
+    ap.add_argument("--processos", type=int, default=os.cpu_count(), help="Tamanho do pool de processos")
+    args = ap.parse_args(argv)
+
+    dia = (datetime.strptime(args.data, "%d/%m/%Y").date() if args.data
+           else datetime.now(ZoneInfo("America/Sao_Paulo")).date())
+    lojas = [l.strip().upper() for l in args.lojas.split(",")] if args.lojas else None
+    formatos = [f.strip().lower() for f in args.formatos.split(",")]
+
+    from google_planilha import abrir_gsheets
+    t0 = time.perf_counter()
+    gsheets = abrir_gsheets()
+    por_loja, vendedores = carregar_dia(gsheets, dia, lojas)
+    print(f"📥 {sum(len(r) for r in por_loja.values())} registros de {len(por_loja)} lojas "
+          f"em {time.perf_counter() - t0:.1f}s")
+    if not por_loja:
+        print(f"📭 Nenhum registro em {dia.strftime('%d/%m/%Y')}.")
+        return 0
+
+    pasta = os.path.join(args.saida, dia.isoformat())
+    t1 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=max(1, min(args.processos or 1, len(por_loja)))) as pool:
+        futuros = [pool.submit(gerar_loja, loja, registros, vendedores[loja], dia, pasta, formatos)
+                   for loja, registros in sorted(por_loja.items())]
+        resultados = [f.result() for f in futuros]
+
+    for r in resultados:
+        print(f"✅ {r['loja']}: {r['vendedores']} vendedores, {r['registros']} registros, {len(r['arquivos'])} arquivos")
+    print(f"🏁 {sum(len(r['arquivos']) for r in resultados)} arquivos em {pasta} "
+          f"({time.perf_counter() - t1:.1f}s de geração)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+"""
+Sincronização por blocos das abas relatorio e vendedor.
+
+A aba é dividida em blocos fixos de BLOCO_LINHAS linhas e guardamos um hash de cada
+linha (8 bytes). Cada sondagem é um único `batch_get` com:
+  - o bloco da cauda inteiro (onde caem as linhas novas);
+  - os blocos mais recentes e alguns outros em rodízio, inteiros;
+  - linhas avulsas sorteadas no resto da aba.
+Só os blocos cujo hash mudou (ou cuja amostra não confere) são baixados de novo e
+aplicados na cópia local; assim correções feitas à mão na planilha aparecem sem
+baixar tudo, e o rodízio garante que toda a aba seja conferida de tempos em tempos.
+"""
+import os
+import random
+import hashlib
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+BLOCO_LINHAS = int(os.environ.get("SINC_BLOCO_LINHAS", 500))
+BLOCOS_RODIZIO = int(os.environ.get("SINC_BLOCOS_RODIZIO", 6))      # blocos inteiros conferidos por sondagem
+LINHAS_AMOSTRADAS = int(os.environ.get("SINC_LINHAS_AMOSTRADAS", 60))
+BLOCOS_RECENTES = 2   # antes da cauda, sempre conferidos: é onde os gerentes mais corrigem
+
+
+def hash_linha(linha: List) -> int:
+    celulas = [str(c) for c in linha]
+    while celulas and celulas[-1] == "": celulas.pop()   # a API omite células vazias à direita
+    return int.from_bytes(hashlib.blake2b("\x1f".join(celulas).encode("utf-8"), digest_size=8).digest(), "little")
+
+
+@dataclass
+class Alteracoes:
+    """Resultado de uma sondagem. Índices contam a partir da linha 1 da aba (índice 0)."""
+    total: int
+    completo: Optional[List[List[str]]] = None          # aba inteira (primeira carga ou linhas deslocadas)
+    blocos: Dict[int, List[List[str]]] = field(default_factory=dict)   # início -> linhas que substituem
+    so_acrescimo: bool = True                            # nada mudou antes do fim conhecido
+    leituras: int = 0
+    cabecalho: Optional[List[str]] = None
+    recarga: bool = False                                # `completo` porque linhas já conhecidas mudaram
+
+    @property
+    def mudou(self) -> bool:
+        return self.completo is not None or bool(self.blocos)
+
+
+class SincronizadorBlocos:
+    """Hashes por linha de uma aba e a sondagem que descobre quais blocos mudaram."""
+
+    def __init__(self, ultima_coluna: str, bloco: int = BLOCO_LINHAS, manter_linhas: bool = False):
+        self.ultima_coluna = ultima_coluna
+        self.bloco = bloco
+        self.manter_linhas = manter_linhas   # guarda as linhas também (abas pequenas, como vendedor)
+        self.linhas: List[List[str]] = []
+        self.cabecalho: List[str] = []
+        self._hashes = np.zeros(0, dtype=np.uint64)
+        self._rodizio = 0
+        self._lock = threading.RLock()
+        self.estatisticas = {"sondagens": 0, "cargas_completas": 0, "blocos_baixados": 0, "blocos_alterados": 0}
+
+    def __len__(self):
+        return len(self._hashes)
+
+    def _faixa(self, inicio: int, fim: int = None) -> str:
+        return f"A{inicio + 1}:{self.ultima_coluna}{fim if fim else ''}"
+
+    def esquecer_a_partir(self, inicio: int):
+        """Descarta os hashes a partir de `inicio`: essas linhas voltam como acréscimo na próxima sondagem."""
+        with self._lock:
+            self._hashes = self._hashes[:inicio]
+            if self.manter_linhas: self.linhas = self.linhas[:inicio]
+
+    def estado(self) -> Dict:
+        """Hashes e cabeçalho atuais: a marca para retomar a sincronização depois de reiniciar."""
+        with self._lock:
+            return {"hashes": self._hashes.copy(), "cabecalho": list(self.cabecalho)}
+
+    def restaurar(self, hashes: np.ndarray, cabecalho: List[str]):
+        """Retoma de uma marca salva (`estado`): a próxima sondagem traz só o que mudou desde ela."""
+        with self._lock:
+            self._hashes = np.asarray(hashes, dtype=np.uint64)
+            self.cabecalho = list(cabecalho)
+            if self.manter_linhas: self.linhas = [[] for _ in range(len(self._hashes))]
+
+    def carregar(self, aba) -> Alteracoes:
+        with self._lock:
+            valores = aba.get_all_values()
+            self._hashes = np.array([hash_linha(l) for l in valores], dtype=np.uint64)
+            if self.manter_linhas: self.linhas = [list(l) for l in valores]
+            self.cabecalho = list(valores[0]) if valores else []
+            self.estatisticas["cargas_completas"] += 1
+            return Alteracoes(total=len(valores), completo=valores, so_acrescimo=False, leituras=1,
+                              cabecalho=self.cabecalho)
+
+    def _escolher_blocos(self, completos: int) -> List[int]:
+        recentes = list(range(max(0, completos - BLOCOS_RECENTES), completos))
+        demais = completos - len(recentes)
+        rodizio = []
+        for _ in range(min(BLOCOS_RODIZIO, demais)):
+            rodizio.append(self._rodizio % demais)
+            self._rodizio += 1
+        return sorted(set(rodizio + recentes))
+
+    def sincronizar(self, aba) -> Alteracoes:
+        """Sonda a aba e devolve só o que mudou desde a última sondagem (1 ou 2 leituras)."""
+        with self._lock:
+            n = len(self._hashes)
+            if n == 0: return self.carregar(aba)
+            self.estatisticas["sondagens"] += 1
+
+            cauda = ((n - 1) // self.bloco) * self.bloco
+            conferidos = self._escolher_blocos(cauda // self.bloco)
+            inteiros = {b * self.bloco for b in conferidos}
+            amostras = sorted(i for i in random.sample(range(cauda), min(LINHAS_AMOSTRADAS, cauda))
+                              if i - i % self.bloco not in inteiros)
+
+            faixas = ([self._faixa(cauda)] + [self._faixa(b * self.bloco, (b + 1) * self.bloco) for b in conferidos]
+                      + [self._faixa(i, i + 1) for i in amostras])
+            respostas = aba.batch_get(faixas)
+            leituras = 1
+
+            linhas_cauda = [list(l) for l in respostas[0]]
+            total = cauda + len(linhas_cauda)
+            hashes_cauda = [hash_linha(l) for l in linhas_cauda]
+            antigos = self._hashes[cauda:n].tolist()
+            cauda_igual = hashes_cauda[:len(antigos)] == antigos
+            if total != n and not cauda_igual:
+                # Linhas inseridas ou apagadas no meio: as posições mudaram, então baixa tudo
+                logger.info("Linhas deslocadas na aba (%s -> %s); recarregando por completo", n, total)
+                alteracoes = self.carregar(aba)
+                alteracoes.leituras += leituras
+                alteracoes.recarga = True
+                return alteracoes
+
+            alterados = {}
+            for b, resposta in zip(conferidos, respostas[1:1 + len(conferidos)]):
+                self._comparar_bloco(b * self.bloco, resposta, alterados)
+            suspeitos = sorted({
+                i - i % self.bloco for i, resposta in zip(amostras, respostas[1 + len(conferidos):])
+                if hash_linha(resposta[0] if resposta else []) != int(self._hashes[i])
+            })
+            if suspeitos:
+                leituras += 1
+                for inicio, resposta in zip(suspeitos, aba.batch_get([self._faixa(i, i + self.bloco) for i in suspeitos])):
+                    self._comparar_bloco(inicio, resposta, alterados)
+            self.estatisticas["blocos_baixados"] += len(conferidos) + len(suspeitos) + 1
+
+            if 0 in alterados and hash_linha(alterados[0][0]) != int(self._hashes[0]):
+                # Cabeçalho mudou: a posição das colunas pode ter mudado junto
+                alteracoes = self.carregar(aba)
+                alteracoes.leituras += leituras
+                alteracoes.recarga = True
+                return alteracoes
+
+            so_acrescimo = not alterados and cauda_igual
+            if not cauda_igual: alterados[cauda] = linhas_cauda
+            elif total > n: alterados[n] = linhas_cauda[n - cauda:]
+            self.estatisticas["blocos_alterados"] += len(alterados) - (1 if so_acrescimo and alterados else 0)
+            self._aplicar(alterados, total)
+            return Alteracoes(total=total, blocos=alterados, so_acrescimo=so_acrescimo, leituras=leituras,
+                              cabecalho=self.cabecalho)
+
+    def _comparar_bloco(self, inicio: int, resposta, alterados: Dict[int, List[List[str]]]):
+        linhas = [list(l) for l in resposta]
+        fim = min(inicio + self.bloco, len(self._hashes))
+        linhas += [[] for _ in range(fim - inicio - len(linhas))]   # linhas vazias no fim não voltam da API
+        if [hash_linha(l) for l in linhas] != self._hashes[inicio:fim].tolist():
+            alterados[inicio] = linhas
+
+    def _aplicar(self, alterados: Dict[int, List[List[str]]], total: int):
+        hashes = np.zeros(total, dtype=np.uint64)
+        hashes[:min(total, len(self._hashes))] = self._hashes[:total]
+        if self.manter_linhas:
+            self.linhas = (self.linhas + [[] for _ in range(total - len(self.linhas))])[:total]
+        for inicio, linhas in alterados.items():
+            hashes[inicio:inicio + len(linhas)] = [hash_linha(l) for l in linhas]
+            if self.manter_linhas: self.linhas[inicio:inicio + len(linhas)] = linhas
+        self._hashes = hashes
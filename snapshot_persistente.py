@@ -0,0 +1,164 @@
+"""
+Snapshot do relatorio salvo em disco para o processo reiniciar sem reler a planilha inteira.
+
+O arquivo é Arrow IPC (formato de arquivo, um único lote): LOJA, VENDEDOR e CLIENTE vão
+como colunas de dicionário com os mesmos códigos do snapshot, DATA/HORA/métricas como
+inteiros e, no Sheets, o hash de cada linha (a marca de sincronização por blocos).
+Na volta o arquivo é mapeado em memória e os arrays são usados sem cópia; depois disso a
+sincronização normal traz só o que mudou desde que ele foi salvo.
+
+Os vendedores (lista pequena) vão junto, nos metadados do arquivo.
+"""
+import os
+import json
+import time
+import logging
+import threading
+from typing import Dict, Optional
+import numpy as np
+
+from snapshot_relatorio import COLUNAS_CATEGORICAS, COLUNAS_METRICAS, SnapshotRelatorio
+
+try:
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+except ImportError:
+    pa = None
+
+logger = logging.getLogger(__name__)
+
+# Vazio desativa. No Heroku o disco do dyno é apagado ao reiniciar: aponte para um volume persistente.
+ARQUIVO_SNAPSHOT = os.environ.get("FLUXO_SNAPSHOT_ARQUIVO", os.path.join("dados", "snapshot_relatorio.arrow"))
+# Arquivo mais velho que isso é ignorado (a sondagem por blocos levaria muito para achar edições antigas)
+IDADE_MAXIMA_H = float(os.environ.get("FLUXO_SNAPSHOT_IDADE_MAX_H", 24))
+FORMATO = "1"
+
+_lock = threading.Lock()
+_aberto = False               # o arquivo só é lido na primeira carga do processo
+_pendentes = {}               # o que ele ainda tem a entregar: 'relatorio' e 'vendedores'
+_ultima_assinatura = None
+
+
+def ativo() -> bool:
+    return pa is not None and bool(ARQUIVO_SNAPSHOT)
+
+
+def _assinatura(snap, marca, vendedores):
+    return (id(snap), snap.edicao, len(snap), None if marca is None else len(marca["hashes"]), id(vendedores))
+
+
+def salvar(snap: SnapshotRelatorio, armazenamento, marca: Optional[Dict] = None,
+           vendedores: Optional[list] = None, caminho: str = None) -> bool:
+    """Grava snapshot, marca de sincronização e vendedores. Retorna False se nada mudou desde a última vez."""
+    global _ultima_assinatura
+    caminho = caminho or ARQUIVO_SNAPSHOT
+    if not ativo() or snap is None: return False
+    with _lock:
+        assinatura = _assinatura(snap, marca, vendedores)
+        if assinatura == _ultima_assinatura: return False
+
+        colunas = {
+            col: pa.DictionaryArray.from_arrays(pa.array(snap.codigos[col]), pa.array(snap.categorias[col], pa.string()))
+            for col in COLUNAS_CATEGORICAS
+        }
+        colunas['DATA'], colunas['HORA'] = pa.array(snap.data), pa.array(snap.hora)
+        colunas.update({col: pa.array(snap.metricas[col]) for col in COLUNAS_METRICAS})
+        meta = {
+            "formato": FORMATO, "origem": armazenamento.identificador, "edicao": str(snap.edicao),
+            "salvo_em": str(time.time()), "vendedores": json.dumps(vendedores, ensure_ascii=False),
+        }
+        if marca is not None:
+            # hashes[0] é o cabeçalho; linhas locais ainda não sondadas ficam de fora da marca
+            hashes = np.zeros(len(snap), dtype=np.uint64)
+            conhecidas = min(len(marca["hashes"]) - 1, len(snap))
+            hashes[:conhecidas] = marca["hashes"][1:1 + conhecidas]
+            colunas['_HASH'] = pa.array(hashes)
+            meta.update(linhas_marca=str(conhecidas), hash_cabecalho=str(int(marca["hashes"][0])),
+                        cabecalho=json.dumps(marca["cabecalho"], ensure_ascii=False))
+
+        tabela = pa.table(colunas).replace_schema_metadata(meta)
+        pasta = os.path.dirname(caminho)
+        if pasta: os.makedirs(pasta, exist_ok=True)
+        temporario = caminho + ".tmp"
+        with pa.OSFile(temporario, "wb") as arquivo, ipc.new_file(arquivo, tabela.schema) as escritor:
+            escritor.write_table(tabela)
+        os.replace(temporario, caminho)   # quem ainda mapeia o arquivo antigo continua lendo o antigo
+        _ultima_assinatura = assinatura
+    return True
+
+
+def _ler(caminho: str, origem: str):
+    tabela = ipc.open_file(pa.memory_map(caminho)).read_all()
+    meta = {k.decode(): v.decode() for k, v in (tabela.schema.metadata or {}).items()}
+    if meta.get("formato") != FORMATO or meta.get("origem") != origem:
+        logger.info("Snapshot em disco é de outra origem/formato (%s); ignorado", meta.get("origem"))
+        return None
+    if time.time() - float(meta.get("salvo_em", 0)) > IDADE_MAXIMA_H * 3600:
+        logger.info("Snapshot em disco com mais de %sh; ignorado", IDADE_MAXIMA_H)
+        return None
+    if tabela.num_rows == 0: return None
+
+    def numpy(coluna):
+        return tabela.column(coluna).chunk(0).to_numpy(zero_copy_only=True)
+
+    categorias, codigos = {}, {}
+    for col in COLUNAS_CATEGORICAS:
+        dicionario = tabela.column(col).chunk(0)
+        categorias[col] = dicionario.dictionary.to_pylist()
+        codigos[col] = dicionario.indices.to_numpy(zero_copy_only=True)
+    snap = SnapshotRelatorio(categorias, codigos, numpy('DATA'), numpy('HORA'),
+                             {col: numpy(col) for col in COLUNAS_METRICAS}, edicao=int(meta["edicao"]))
+
+    marca = None
+    if '_HASH' in tabela.column_names:
+        conhecidas = int(meta["linhas_marca"])
+        marca = {
+            "hashes": np.concatenate([np.array([int(meta["hash_cabecalho"])], dtype=np.uint64), numpy('_HASH')[:conhecidas]]),
+            "cabecalho": json.loads(meta["cabecalho"]),
+        }
+    return snap, marca, json.loads(meta.get("vendedores") or "null")
+
+
+def _abrir(armazenamento, caminho: str) -> Dict:
+    """Lê o arquivo uma única vez por processo; relatorio e vendedores são entregues uma vez cada."""
+    global _aberto
+    if _aberto: return _pendentes
+    _aberto = True
+    if not ativo() or not os.path.exists(caminho): return _pendentes
+    try:
+        lido = _ler(caminho, armazenamento.identificador)
+    except Exception as e:
+        logger.warning("Snapshot em disco ilegível (%s); lendo tudo", e)
+        lido = None
+    if lido is not None:
+        _pendentes['relatorio'] = lido[:2]
+        if lido[2] is not None: _pendentes['vendedores'] = lido[2]
+    return _pendentes
+
+
+def restaurar(armazenamento, caminho: str = None) -> Optional[SnapshotRelatorio]:
+    """
+    Primeira carga do processo: devolve o snapshot salvo (e repõe a marca de sincronização
+    no armazenamento) ou None para seguir com a leitura completa.
+    """
+    with _lock:
+        snap, marca = _abrir(armazenamento, caminho or ARQUIVO_SNAPSHOT).pop('relatorio', (None, None))
+        if snap is None: return None
+        if marca is not None: armazenamento.restaurar_marca_relatorio(marca)
+    logger.info("Snapshot do relatorio restaurado do disco: %s", snap.resumo_memoria())
+    return snap
+
+
+def vendedores_salvos(armazenamento, caminho: str = None) -> Optional[list]:
+    """Lista de vendedores que veio no arquivo (entregue uma única vez, na primeira leitura do processo)."""
+    with _lock:
+        return _abrir(armazenamento, caminho or ARQUIVO_SNAPSHOT).pop('vendedores', None)
+
+
+def esquecer():
+    """Volta ao estado de processo recém-iniciado (o próximo carregamento tenta o disco de novo)."""
+    global _aberto, _ultima_assinatura
+    with _lock:
+        _aberto = False
+        _pendentes.clear()
+        _ultima_assinatura = None
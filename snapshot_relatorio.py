@@ -0,0 +1,259 @@
+import sys
+from datetime import date, datetime
+from typing import Dict, List
+import numpy as np
+import pandas as pd
+
+
+COLUNAS_CATEGORICAS = ('LOJA', 'VENDEDOR', 'CLIENTE')
+COLUNAS_METRICAS = (
+    'ATENDIMENTOS', 'RECEITAS', 'PERDAS', 'VENDAS', 'RESERVAS',
+    'PESQUISAS', 'EXAME DE VISTA', 'GOOGLE'
+)
+
+
+def _tipo_codigo(qtd_categorias: int):
+    return np.uint16 if qtd_categorias < np.iinfo(np.uint16).max else np.int32
+
+def _data_ordinal(valor) -> int:
+    """dd/mm/aaaa -> dia ordinal (0 quando inválida)."""
+    try: return datetime.strptime(str(valor).strip(), "%d/%m/%Y").toordinal()
+    except ValueError: return 0
+
+def _hora_segundos(valor) -> int:
+    """HH:MM[:SS] -> segundos desde meia-noite (-1 quando inválida)."""
+    partes = str(valor).strip().split(":")
+    try:
+        h, m = int(partes[0]), int(partes[1])
+        s = int(partes[2]) if len(partes) > 2 else 0
+        return h * 3600 + m * 60 + s
+    except (ValueError, IndexError):
+        return -1
+
+def _metrica(valor) -> int:
+    try: return int(float(str(valor).strip().replace(",", ".") or 0))
+    except ValueError: return 0
+
+def _converter(funcao, valores: List) -> List[int]:
+    # Poucos valores distintos (datas, horas, 0/1/-1): converte cada um uma única vez
+    memo = {}
+    return [memo[v] if v in memo else memo.setdefault(v, funcao(v)) for v in valores]
+
+
+class SnapshotRelatorio:
+    """
+    Cópia colunar e somente-leitura da aba relatorio, compartilhada por todas as sessões.
+
+    LOJA, VENDEDOR e CLIENTE ficam como códigos inteiros apontando para listas de
+    categorias; DATA vira dia ordinal, HORA vira segundos e as métricas ficam em int8.
+    Nunca é alterado depois de criado: novas linhas geram um novo snapshot (`com_linhas`).
+    `edicao` aumenta quando linhas já existentes mudam (`com_blocos`); quem mantém somas
+    incrementais (cubo, funil) recomeça ao ver uma edição diferente da que processou.
+    """
+
+    def __init__(self, categorias: Dict[str, List[str]], codigos: Dict[str, np.ndarray],
+                 data: np.ndarray, hora: np.ndarray, metricas: Dict[str, np.ndarray], edicao: int = 0):
+        self.categorias = categorias
+        self.codigos = codigos
+        self.data = data
+        self.hora = hora
+        self.metricas = metricas
+        self.edicao = edicao
+        for arr in [data, hora, *codigos.values(), *metricas.values()]:
+            arr.setflags(write=False)
+        self._indices_categoria = {col: {v: i for i, v in enumerate(cats)} for col, cats in categorias.items()}
+
+    # --- Construção ---
+
+    @classmethod
+    def vazio(cls) -> "SnapshotRelatorio":
+        return cls.de_linhas([])
+
+    @classmethod
+    def de_linhas(cls, linhas: List[List[str]], cabecalho: List[str] = None) -> "SnapshotRelatorio":
+        """
+        Cria o snapshot a partir de `get_all_values()`.
+        Sem `cabecalho`, a primeira linha é tratada como cabeçalho.
+        """
+        if cabecalho is None:
+            cabecalho, linhas = (linhas[0], linhas[1:]) if linhas else ([], [])
+        posicoes = {}
+        for i, nome in enumerate(cabecalho):
+            nome = str(nome).strip().upper()
+            posicoes.setdefault("GOOGLE" if nome == "GOOGLE1" else nome, i)
+
+        def coluna(nome):
+            i = posicoes.get(nome)
+            if i is None: return [""] * len(linhas)
+            return [linha[i] if i < len(linha) else "" for linha in linhas]
+
+        def convertida(funcao, nome, tipo):
+            # Coluna que não veio (leitura só de algumas colunas): o valor de célula vazia, sem percorrer as linhas
+            if nome not in posicoes: return np.full(len(linhas), funcao(""), dtype=tipo)
+            return np.array(_converter(funcao, coluna(nome)), dtype=tipo)
+
+        categorias, codigos = {}, {}
+        for col in COLUNAS_CATEGORICAS:
+            if col not in posicoes:
+                categorias[col] = [""] if linhas else []
+                codigos[col] = np.zeros(len(linhas), dtype=_tipo_codigo(1))
+                continue
+            indice = {}
+            valores = [indice.setdefault(str(v).strip(), len(indice)) for v in coluna(col)]
+            categorias[col] = list(indice)
+            codigos[col] = np.array(valores, dtype=_tipo_codigo(len(indice)))
+
+        data = convertida(_data_ordinal, 'DATA', np.int32)
+        hora = convertida(_hora_segundos, 'HORA', np.int32)
+        metricas = {
+            col: np.clip(convertida(_metrica, col, np.int64), -128, 127).astype(np.int8)
+            for col in COLUNAS_METRICAS
+        }
+        return cls(categorias, codigos, data, hora, metricas)
+
+    def _remapear(self, categorias_novas: Dict[str, List[str]], codigos: Dict[str, np.ndarray]):
+        """Categorias deste snapshot estendidas com `categorias_novas`, e `codigos` (que apontam para elas) traduzidos."""
+        categorias, codigos_novos = {}, {}
+        for col in COLUNAS_CATEGORICAS:
+            cats = list(self.categorias[col])
+            indice = dict(self._indices_categoria[col])
+            remap = np.array([indice.setdefault(v, len(indice)) for v in categorias_novas[col]], dtype=np.int64)
+            cats.extend(list(indice)[len(cats):])
+            tipo = _tipo_codigo(len(cats))
+            codigos_novos[col] = remap[codigos[col]].astype(tipo) if len(remap) else np.array([], dtype=tipo)
+            categorias[col] = cats
+        return categorias, codigos_novos
+
+    def com_linhas(self, linhas: List[List[str]], cabecalho: List[str] = None) -> "SnapshotRelatorio":
+        """Novo snapshot com as linhas acrescentadas (o atual continua válido para quem o lê)."""
+        if not linhas: return self
+        from google_planilha import GooglePlanilha
+        return self.com_snapshot(SnapshotRelatorio.de_linhas(linhas, cabecalho or GooglePlanilha.COLUNAS_RELATORIO))
+
+    def com_snapshot(self, outro: "SnapshotRelatorio", inicio: int = 0) -> "SnapshotRelatorio":
+        """Novo snapshot com as linhas de `outro` a partir de `inicio` acrescentadas (categorias traduzidas)."""
+        if inicio >= len(outro): return self
+        categorias, codigos_novos = self._remapear(outro.categorias, {col: outro.codigos[col][inicio:] for col in COLUNAS_CATEGORICAS})
+        codigos = {
+            col: np.concatenate([self.codigos[col].astype(codigos_novos[col].dtype), codigos_novos[col]])
+            for col in COLUNAS_CATEGORICAS
+        }
+        return SnapshotRelatorio(
+            categorias, codigos,
+            np.concatenate([self.data, outro.data[inicio:]]),
+            np.concatenate([self.hora, outro.hora[inicio:]]),
+            {col: np.concatenate([self.metricas[col], outro.metricas[col][inicio:]]) for col in COLUNAS_METRICAS},
+            self.edicao,
+        )
+
+    def com_blocos(self, blocos: Dict[int, List[List[str]]], total: int,
+                   cabecalho: List[str] = None) -> "SnapshotRelatorio":
+        """
+        Novo snapshot com `total` linhas em que cada bloco {início: linhas} substitui as
+        linhas a partir daquele índice (linhas além do fim atual são acréscimos).
+        Categorias que deixaram de ser usadas continuam na lista, sem efeito nas consultas.
+        """
+        from google_planilha import GooglePlanilha
+        inicios = sorted(blocos)
+        linhas = [l for i in inicios for l in blocos[i]]
+        novo = SnapshotRelatorio.de_linhas(linhas, cabecalho or GooglePlanilha.COLUNAS_RELATORIO)
+        categorias, codigos_novos = self._remapear(novo.categorias, novo.codigos)
+        posicoes = np.concatenate([np.arange(i, i + len(blocos[i])) for i in inicios]) if inicios else np.array([], dtype=np.int64)
+        dentro = posicoes < total
+
+        def montar(atual: np.ndarray, valores: np.ndarray, tipo) -> np.ndarray:
+            saida = np.zeros(total, dtype=tipo)
+            saida[:min(total, len(atual))] = atual[:total]
+            saida[posicoes[dentro]] = valores[dentro]
+            return saida
+
+        codigos = {col: montar(self.codigos[col], codigos_novos[col], codigos_novos[col].dtype) for col in COLUNAS_CATEGORICAS}
+        return SnapshotRelatorio(
+            categorias, codigos,
+            montar(self.data, novo.data, np.int32), montar(self.hora, novo.hora, np.int32),
+            {col: montar(self.metricas[col], novo.metricas[col], np.int8) for col in COLUNAS_METRICAS},
+            self.edicao + 1,
+        )
+
+    # --- Consulta ---
+
+    def __len__(self):
+        return len(self.data)
+
+    def filtrar(self, loja: str = None, vendedor: str = None, dia: date = None) -> np.ndarray:
+        """Índices das linhas que atendem aos filtros informados."""
+        mascara = np.ones(len(self), dtype=bool)
+        for coluna, valor in (('LOJA', loja), ('VENDEDOR', vendedor)):
+            if not valor: continue
+            alvo = str(valor).strip().upper()
+            cods = [i for i, v in enumerate(self.categorias[coluna]) if v.upper() == alvo]
+            mascara &= np.isin(self.codigos[coluna], cods)
+        if dia is not None:
+            mascara &= self.data == dia.toordinal()
+        return np.flatnonzero(mascara)
+
+    def valores(self, coluna: str, indices: np.ndarray = None) -> np.ndarray:
+        """Coluna decodificada (strings para categorias, inteiros para métricas)."""
+        sel = slice(None) if indices is None else indices
+        if coluna in COLUNAS_CATEGORICAS:
+            return np.asarray(self.categorias[coluna], dtype=object)[self.codigos[coluna][sel]]
+        if coluna == 'DATA':
+            return np.array([_formatar_data(d) for d in self.data[sel]], dtype=object)
+        if coluna == 'HORA':
+            return np.array([_formatar_hora(h) for h in self.hora[sel]], dtype=object)
+        return self.metricas[coluna][sel]
+
+    def registros(self, indices: np.ndarray, colunas: List[str] = None) -> List[Dict]:
+        """
+        Linhas selecionadas no mesmo formato de `get_all_records()` (use só para recortes pequenos).
+        `colunas` limita os campos montados aos que a tela usa.
+        """
+        from google_planilha import GooglePlanilha
+        colunas = {col: self.valores(col, indices) for col in colunas or GooglePlanilha.COLUNAS_RELATORIO}
+        return [
+            {col: (v.item() if hasattr(v, 'item') else v) for col, v in zip(colunas, linha)}
+            for linha in zip(*colunas.values())
+        ]
+
+    def para_dataframe(self, colunas: List[str] = None, indices: np.ndarray = None) -> pd.DataFrame:
+        """DataFrame das linhas selecionadas; categorias viram `pd.Categorical` sem copiar as strings."""
+        from google_planilha import GooglePlanilha
+        sel = slice(None) if indices is None else indices
+        dados = {}
+        for col in colunas or GooglePlanilha.COLUNAS_RELATORIO:
+            if col in COLUNAS_CATEGORICAS:
+                dados[col] = pd.Categorical.from_codes(
+                    self.codigos[col][sel].astype(np.int32), categories=pd.Index(self.categorias[col], dtype=object)
+                ) if self.categorias[col] else pd.Categorical([])
+            else:
+                dados[col] = self.valores(col, indices)
+        return pd.DataFrame(dados)
+
+    # --- Memória ---
+
+    def memoria_bytes(self) -> int:
+        total = self.data.nbytes + self.hora.nbytes
+        total += sum(a.nbytes for a in self.codigos.values())
+        total += sum(a.nbytes for a in self.metricas.values())
+        total += sum(sys.getsizeof(v) for cats in self.categorias.values() for v in cats)
+        return total
+
+    def resumo_memoria(self) -> Dict:
+        """Uso de memória do snapshot e a projeção por milhão de linhas."""
+        linhas = len(self)
+        total = self.memoria_bytes()
+        return {
+            'linhas': linhas,
+            'bytes': total,
+            'mb_por_milhao_linhas': round(total / linhas * 1_000_000 / 2**20, 1) if linhas else 0.0,
+            'categorias': {col: len(cats) for col, cats in self.categorias.items()},
+        }
+
+
+def _formatar_data(ordinal) -> str:
+    return date.fromordinal(int(ordinal)).strftime("%d/%m/%Y") if ordinal > 0 else ""
+
+def _formatar_hora(segundos) -> str:
+    if segundos < 0: return ""
+    segundos = int(segundos)
+    return f"{segundos // 3600:02d}:{segundos % 3600 // 60:02d}:{segundos % 60:02d}"
@@ -13,8 +13,10 @@ def tela_atendimento_principal():
         ("🔍 Atendimento sem Receita", "pesquisa"),
         ("📅 Exame de Vista", "consulta"),
         ("🌐 GOOGLE", "google_registro"),  # Novo botão
+        ("🧾 Lançamento em Lote", "lancamento_lote"),
         ("📊 Relatório por Vendedor", "relatorio_vendedor"),
-        ("📋 Relatório de Reservas", "relatorio_reservas")
+        ("📋 Relatório de Reservas", "relatorio_reservas"),
+        ("📈 Histórico e Tendências", "historico")
     ]
 
     # Exibe os botões em colunas
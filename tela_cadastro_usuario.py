@@ -1,27 +1,20 @@
 import streamlit as st
-import json
 import bcrypt
-import os
+from cadastro_usuarios import cadastro
 
 def mostrar():
     st.title("👥 GERENCIAMENTO DE ACESSOS")
     
-    # Carregar usuários existentes
+    # Carregar acessos existentes
     try:
-        if os.path.exists("usuarios.json"):
-            with open("usuarios.json", "r", encoding="utf-8") as f:
-                dados = json.load(f)
-                usuarios_list = dados.get("usuarios", [])
-        else:
-            usuarios_list = []
+        usuarios_nomes = cadastro().listar('usuario')
+        lojas_nomes = cadastro().listar('loja')
     except Exception as e:
         st.error(f"❌ Erro ao carregar usuários: {e}")
-        usuarios_list = []
+        usuarios_nomes, lojas_nomes = [], []
 
     # --- 1. SEÇÃO: ALTERAR SENHA (Apenas para nomes, não para LOJA) ---
     st.subheader("🔑 Alterar Senha de Administradores/Vendedores")
-    # Filtra apenas usuários que não começam com LOJA
-    usuarios_nomes = [u['nome'] for u in usuarios_list if not u['nome'].upper().startswith("LOJA")]
     
     if usuarios_nomes:
         col_u, col_p = st.columns([1, 1])
@@ -30,15 +23,13 @@ def mostrar():
         
         if st.button("🔄 ATUALIZAR SENHA", use_container_width=True):
             if nova_p:
-                for u in usuarios_list:
-                    if u['nome'] == u_sel:
-                        u['senha_hash'] = bcrypt.hashpw(nova_p.encode(), bcrypt.gensalt()).decode()
-                        break
                 try:
-                    with open("usuarios.json", "w", encoding="utf-8") as f:
-                        json.dump({"usuarios": usuarios_list}, f, indent=4)
-                    st.success(f"✅ Senha de {u_sel} atualizada com sucesso!")
-                    st.rerun()
+                    senha_hash = bcrypt.hashpw(nova_p.encode(), bcrypt.gensalt()).decode()
+                    if cadastro().alterar_senha(u_sel, senha_hash):
+                        st.success(f"✅ Senha de {u_sel} atualizada com sucesso!")
+                        st.rerun()
+                    else:
+                        st.error(f"❌ Usuário {u_sel} não encontrado.")
                 except Exception as e:
                     st.error(f"❌ Erro ao salvar: {e}")
             else:
@@ -73,24 +64,19 @@ def mostrar():
         if not nova_loja_nome or not nova_senha:
             st.warning("⚠️ Preencha o nome/número e a senha!")
         else:
-            if any(u['nome'].upper() == nova_loja_nome.upper() for u in usuarios_list):
+            if cadastro().existe(nova_loja_nome):
                 st.error(f"❌ O acesso '{nova_loja_nome}' já está cadastrado!")
             else:
                 # Gerar hash da senha
                 senha_hash = bcrypt.hashpw(nova_senha.encode(), bcrypt.gensalt()).decode()
                 
-                # Adicionar novo usuário
-                usuarios_list.append({
-                    "nome": nova_loja_nome.upper(),
-                    "senha_hash": senha_hash
-                })
-                
-                # Salvar no arquivo
+                # Inserção atômica: se outro admin cadastrou o mesmo nome agora, o banco recusa
                 try:
-                    with open("usuarios.json", "w", encoding="utf-8") as f:
-                        json.dump({"usuarios": usuarios_list}, f, indent=4)
-                    st.success(f"✅ {nova_loja_nome} cadastrado com sucesso!")
-                    st.rerun()
+                    if cadastro().inserir(nova_loja_nome, senha_hash):
+                        st.success(f"✅ {nova_loja_nome} cadastrado com sucesso!")
+                        st.rerun()
+                    else:
+                        st.error(f"❌ O acesso '{nova_loja_nome}' já está cadastrado!")
                 except Exception as e:
                     st.error(f"❌ Erro ao salvar: {e}")
 
@@ -100,18 +86,14 @@ def mostrar():
     with st.expander("📋 Ver Lista de Acessos Cadastrados"):
         col_list1, col_list2 = st.columns(2)
         
-        # Separar usuários de lojas para melhor visualização
-        adm_users = [u['nome'] for u in usuarios_list if not u['nome'].upper().startswith("LOJA")]
-        loja_users = [u['nome'] for u in usuarios_list if u['nome'].upper().startswith("LOJA")]
-        
         with col_list1:
             st.markdown("**👤 Usuários/Vendedores**")
-            for u in sorted(adm_users):
+            for u in usuarios_nomes:
                 st.text(f"• {u}")
                 
         with col_list2:
             st.markdown("**🏪 Lojas**")
-            for u in sorted(loja_users):
+            for u in lojas_nomes:
                 st.text(f"• {u}")
 
     if st.button("↩️ VOLTAR", use_container_width=True):
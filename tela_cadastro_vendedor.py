@@ -1,5 +1,7 @@
 import streamlit as st
+import pandas as pd
 from google_planilha import GooglePlanilha
+from selecionar_loja import listar_lojas
 
 def mostrar():
     st.title("👨‍💼 GERENCIAMENTO DE VENDEDORES")
@@ -11,6 +13,14 @@ def mostrar():
     # Seção para cadastrar novo vendedor
     st.subheader("➕ Cadastrar Novo Vendedor")
     novo_nome = st.text_input("Nome do Vendedor").upper().strip()
+    try: lojas_disponiveis = listar_lojas()
+    except: lojas_disponiveis = []
+    loja_atual = st.session_state.get('loja')
+    novas_lojas = st.multiselect(
+        "Lojas em que atende", lojas_disponiveis,
+        default=[loja_atual] if loja_atual in lojas_disponiveis else [],
+        key="lojas_novo_vendedor"
+    )
     
     if st.button("💾 SALVAR VENDEDOR", use_container_width=True):
         if not novo_nome:
@@ -20,43 +30,79 @@ def mostrar():
             if any(v['VENDEDOR'] == novo_nome for v in todos):
                 st.error("❌ Vendedor já cadastrado!")
             else:
-                if gsheets.adicionar_vendedor(novo_nome):
+                # Se falhar, o motivo já aparece na tela
+                if gsheets.adicionar_vendedor(novo_nome, novas_lojas):
                     st.success(f"✅ Vendedor {novo_nome} cadastrado com sucesso!")
                     st.rerun()
-                else:
-                    st.error("❌ Erro ao salvar no Google Sheets.")
 
     st.divider()
 
-    # Seção para listar vendedores cadastrados
+    # Seção para listar e editar vendedores cadastrados
     st.subheader("📋 Vendedores Cadastrados")
     vendedores = gsheets.get_todos_vendedores()
-    
-    if not vendedores:
-        st.info("Nenhum vendedor cadastrado.")
-    else:
-        # Cabeçalho da tabela
-        col1, col2, col3 = st.columns([3, 2, 2])
-        col1.markdown("**Nome**")
-        col2.markdown("**Status**")
-        col3.markdown("**Ação**")
-        
-        for v in vendedores:
-            c1, c2, c3 = st.columns([3, 2, 2])
-            c1.text(v['VENDEDOR'])
-            
-            status_cor = "green" if v['STATUS'] == "ATIVO" else "red"
-            c2.markdown(f"<span style='color:{status_cor}'>**{v['STATUS']}**</span>", unsafe_allow_html=True)
-            
-            novo_status = "INATIVO" if v['STATUS'] == "ATIVO" else "ATIVO"
-            btn_label = "🔴 DESATIVAR" if v['STATUS'] == "ATIVO" else "🟢 ATIVAR"
-            
-            if c3.button(btn_label, key=f"btn_status_{v['row']}", use_container_width=True):
-                if gsheets.atualizar_status_vendedor(v['row'], novo_status):
-                    st.rerun()
-                else:
-                    st.error("❌ Erro ao atualizar status.")
+    st.caption("Altere status e lojas direto na tabela e inclua vendedores na última linha. "
+               "Tudo é gravado de uma vez ao clicar em SALVAR.")
+
+    tabela = pd.DataFrame(
+        [{"VENDEDOR": v['VENDEDOR'], "STATUS": v['STATUS'], "LOJAS": v['LOJAS'], "row": v['row']} for v in vendedores],
+        columns=["VENDEDOR", "STATUS", "LOJAS", "row"]
+    )
+    opcoes_lojas = sorted(set(lojas_disponiveis) | {l for v in vendedores for l in v['LOJAS']})
+    editada = st.data_editor(
+        tabela,
+        num_rows="add",
+        hide_index=True,
+        use_container_width=True,
+        column_order=["VENDEDOR", "STATUS", "LOJAS"],
+        column_config={
+            "VENDEDOR": st.column_config.TextColumn("Nome", required=True),
+            "STATUS": st.column_config.SelectboxColumn("Status", options=["ATIVO", "INATIVO"], default="ATIVO", required=True),
+            "LOJAS": st.column_config.MultiselectColumn("Lojas (vazio = todas)", options=opcoes_lojas),
+        },
+        key=f"editor_vendedores_{st.session_state.get('versao_editor_vendedores', 0)}"
+    )
+
+    alteracoes, novos, erros = comparar_edicao(vendedores, editada)
+    for erro in erros: st.warning(f"⚠️ {erro}")
+    if alteracoes or novos:
+        st.info(f"✏️ {len(alteracoes)} vendedor(es) alterado(s) e {len(novos)} novo(s) para salvar.")
+
+    if st.button("💾 SALVAR ALTERAÇÕES", use_container_width=True, disabled=bool(erros) or not (alteracoes or novos)):
+        if gsheets.salvar_vendedores_em_lote(alteracoes, novos):
+            st.session_state.versao_editor_vendedores = st.session_state.get('versao_editor_vendedores', 0) + 1
+            st.success("✅ Alterações salvas!")
+            st.rerun()
 
     if st.button("↩️ VOLTAR", use_container_width=True):
         st.session_state.etapa = 'atendimento'
         st.rerun()
+
+
+def _celula(valor):
+    # Linhas incluídas no editor chegam com NaN/None nas células em branco
+    if valor is None or (isinstance(valor, float) and pd.isna(valor)): return None
+    return valor
+
+def comparar_edicao(vendedores, editada):
+    """Diferenças entre o roster e a tabela editada: (alterações por linha, novos, erros)."""
+    originais = {v['row']: v for v in vendedores}
+    existentes = {v['VENDEDOR'] for v in vendedores}
+    alteracoes, novos, erros = {}, [], []
+    for r in editada.to_dict("records"):
+        nome = str(_celula(r.get("VENDEDOR")) or "").upper().strip()
+        status = _celula(r.get("STATUS")) or "ATIVO"
+        lojas = list(_celula(r.get("LOJAS")) or [])
+        if _celula(r.get("row")) is None:
+            if not nome: continue
+            if nome in existentes or any(n["VENDEDOR"] == nome for n in novos):
+                erros.append(f"{nome} já está cadastrado.")
+            else:
+                novos.append({"VENDEDOR": nome, "STATUS": status, "LOJAS": lojas})
+            continue
+        original = originais.get(int(r["row"]))
+        if original is None: continue
+        if nome != original['VENDEDOR']:
+            erros.append(f"{original['VENDEDOR']}: o nome não pode ser alterado (o histórico usa esse nome).")
+        elif status != original['STATUS'] or lojas != original['LOJAS']:
+            alteracoes[original['row']] = {"STATUS": status, "LOJAS": lojas}
+    return alteracoes, novos, erros
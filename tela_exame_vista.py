@@ -3,6 +3,10 @@ from fpdf import FPDF
 import io
 from datetime import datetime
 from google_planilha import GooglePlanilha
+from memoria_sessoes import marcar_download
+from formulario_atendimento import botao_voltar, ir_para
+
+CHAVES_ENCAMINHAMENTO = ('enc_cliente', 'enc_telefone', 'enc_nascimento', 'enc_vendedor', 'enc_tipo', 'pdf_gerado', 'pdf_bytes', 'baixado_em')
 
 def mostrar():
     """Tela de encaminhamento para exame oftalmológico."""
@@ -11,103 +15,102 @@ def mostrar():
     # Inicializa campos no session_state
     _inicializar_session_state()
 
-    # Layout em colunas para os dados do paciente
-    col_a, col_b = st.columns(2)
-    
-    with col_a:
-        cliente_input = st.text_input(
-            "Nome do Paciente",
-            value=st.session_state.enc_cliente,
-            key="enc_cliente_input"
-        ).strip().upper()
-        st.session_state.enc_cliente = cliente_input
-
-        telefone_input = st.text_input(
-            "Telefone",
-            value=st.session_state.enc_telefone,
-            placeholder="(00) 00000-0000",
-            key="enc_telefone_input"
-        )
-        st.session_state.enc_telefone = telefone_input
-
-    with col_b:
-        nascimento_input = st.text_input(
-            "Data de Nascimento",
-            value=st.session_state.enc_nascimento,
-            placeholder="DD/MM/AAAA",
-            key="enc_nascimento_input"
-        )
-        st.session_state.enc_nascimento = nascimento_input
-
-        tipo_selecionado = st.radio(
-            "Tipo de Atendimento",
-            options=["PARTICULAR", "PLANO"],
-            index=0 if st.session_state.enc_tipo == "PARTICULAR" else 1,
-            horizontal=True
-        )
-        st.session_state.enc_tipo = tipo_selecionado
-
     # Carrega vendedores
     vendedores = _carregar_vendedores()
     if not vendedores:
         st.warning("⚠️ Carregando vendedores...")
         vendedores = ["NENHUM"]
 
-    # Seleciona vendedor
-    idx_vend = 0
-    if st.session_state.enc_vendedor in vendedores:
-        idx_vend = vendedores.index(st.session_state.enc_vendedor)
-
-    st.session_state.enc_vendedor = st.selectbox(
-        "Vendedor que encaminhou",
-        options=vendedores,
-        index=idx_vend,
-        key="sel_vendedor_enc"
-    )
+    _encaminhamento(vendedores)
 
     st.markdown("---")
+    botao_voltar("↩️ Voltar", limpar=('subtela',))
+
+
+@st.fragment
+def _encaminhamento(vendedores):
+    # Gerar e baixar o PDF só reexecutam este trecho; os campos só são lidos no envio do formulário
+    with st.form("form_encaminhamento"):
+        # Layout em colunas para os dados do paciente
+        col_a, col_b = st.columns(2)
+
+        with col_a:
+            cliente_input = st.text_input(
+                "Nome do Paciente",
+                value=st.session_state.enc_cliente,
+                key="enc_cliente_input"
+            )
+            telefone_input = st.text_input(
+                "Telefone",
+                value=st.session_state.enc_telefone,
+                placeholder="(00) 00000-0000",
+                key="enc_telefone_input"
+            )
+
+        with col_b:
+            nascimento_input = st.text_input(
+                "Data de Nascimento",
+                value=st.session_state.enc_nascimento,
+                placeholder="DD/MM/AAAA",
+                key="enc_nascimento_input"
+            )
+            tipo_selecionado = st.radio(
+                "Tipo de Atendimento",
+                options=["PARTICULAR", "PLANO"],
+                index=0 if st.session_state.enc_tipo == "PARTICULAR" else 1,
+                horizontal=True
+            )
+
+        # Seleciona vendedor
+        idx_vend = 0
+        if st.session_state.enc_vendedor in vendedores:
+            idx_vend = vendedores.index(st.session_state.enc_vendedor)
+        vendedor = st.selectbox(
+            "Vendedor que encaminhou",
+            options=vendedores,
+            index=idx_vend,
+            key="sel_vendedor_enc"
+        )
+        gerar = st.form_submit_button("🖨️ GERAR ENCAMINHAMENTO", use_container_width=True, type="primary")
 
-    # Botões: Gerar PDF e Voltar
-    c1, c2 = st.columns(2)
-
-    with c1:
-        if st.button("🖨️ GERAR ENCAMINHAMENTO", use_container_width=True, type="primary"):
-            if not st.session_state.enc_cliente:
-                st.error("⚠️ O nome do paciente é obrigatório.")
-            else:
-                with st.spinner("Gerando documento..."):
-                    pdf_bytes = gerar_pdf_bytes()
-                    if pdf_bytes:
-                        st.session_state.pdf_bytes = pdf_bytes
-                        st.session_state.pdf_gerado = True
-                        st.success("✅ Documento pronto!")
-                    else:
-                        st.error("❌ Erro ao gerar o arquivo PDF.")
-
-    with c2:
-        if st.button("↩️ Voltar", use_container_width=True):
-            st.session_state.etapa = 'atendimento'
-            st.session_state.subtela = ''
-            st.rerun()
+    if gerar:
+        st.session_state.enc_cliente = cliente_input.strip().upper()
+        st.session_state.enc_telefone = telefone_input
+        st.session_state.enc_nascimento = nascimento_input
+        st.session_state.enc_tipo = tipo_selecionado
+        st.session_state.enc_vendedor = vendedor
+        if not st.session_state.enc_cliente:
+            st.error("⚠️ O nome do paciente é obrigatório.")
+        else:
+            with st.spinner("Gerando documento..."):
+                pdf_bytes = gerar_pdf_bytes()
+                if pdf_bytes:
+                    st.session_state.pdf_bytes = pdf_bytes
+                    st.session_state.pdf_gerado = True
+                    st.success("✅ Documento pronto!")
+                else:
+                    st.error("❌ Erro ao gerar o arquivo PDF.")
 
     # Se o PDF foi gerado, mostra o botão de download
     if st.session_state.get('pdf_gerado') and 'pdf_bytes' in st.session_state:
         st.markdown("---")
         nome_arquivo = f"ENCAMINHAMENTO_{st.session_state.enc_cliente.replace(' ', '_')}.pdf"
-        
+
         st.download_button(
             label="📥 BAIXAR E IMPRIMIR PDF",
             data=st.session_state.pdf_bytes,
             file_name=nome_arquivo,
             mime="application/pdf",
             use_container_width=True,
-            key="btn_download_final"
+            key="btn_download_final",
+            on_click=marcar_download,
+            args=("pdf_bytes",)
         )
-        
+
+        # Dentro do fragmento o clique só reexecutaria este trecho: a troca de tela pede o app inteiro
         if st.button("✅ Concluído – Voltar à loja", use_container_width=True):
-            _limpar_dados_encaminhamento()
-            st.session_state.etapa = 'loja'
-            st.rerun()
+            ir_para('loja', CHAVES_ENCAMINHAMENTO)
+            st.rerun(scope="app")
 
 
 def _inicializar_session_state():
@@ -120,14 +123,10 @@ def _inicializar_session_state():
 def _carregar_vendedores():
     try:
         if 'gsheets' not in st.session_state: st.session_state.gsheets = GooglePlanilha()
-        vends = st.session_state.gsheets.get_vendedores_por_loja()
+        vends = st.session_state.gsheets.get_vendedores_por_loja(st.session_state.get('loja'))
         return [v['VENDEDOR'] for v in vends] if vends else []
     except: return []
 
-def _limpar_dados_encaminhamento():
-    for k in ['enc_cliente', 'enc_telefone', 'enc_nascimento', 'enc_vendedor', 'enc_tipo', 'pdf_gerado', 'pdf_bytes']:
-        if k in st.session_state: del st.session_state[k]
-
 def formatar_telefone(tel):
     tel = ''.join(filter(str.isdigit, str(tel)))
     if len(tel) == 11: return f"({tel[:2]}) {tel[2:7]}-{tel[7:]}"
@@ -177,7 +176,7 @@ def gerar_pdf_bytes():
         pdf.multi_cell(0, 5, "Este documento é um encaminhamento formal para a realização de exame oftalmológico. Favor apresentar este formulário na recepção da clínica.", align='C')
 
         # Retorna os bytes diretamente
-        return pdf.output()
+        return bytes(pdf.output())   # fpdf2 devolve bytearray, que o download_button recusa
 
     except Exception as e:
         print(f"Erro PDF: {e}")
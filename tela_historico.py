@@ -0,0 +1,95 @@
+import streamlit as st
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+from cubo_analitico import cubo_atualizado
+from funil_clientes import funil_atualizado
+from snapshot_relatorio import COLUNAS_METRICAS
+
+PERIODOS = {"Semana": "semana", "Mês": "mes", "Dia": "dia"}
+
+
+def _voltar():
+    if st.button("↩️ VOLTAR AO MENU", use_container_width=True, key="btn_voltar_historico"):
+        st.session_state.etapa = 'atendimento'
+        st.rerun()
+
+
+def mostrar():
+    st.subheader("📈 HISTÓRICO E TENDÊNCIAS")
+    st.info(f"**Loja:** {st.session_state.loja} | **Usuário:** {st.session_state.nome_atendente}")
+    st.markdown("---")
+
+    if 'gsheets' not in st.session_state:
+        from google_planilha import GooglePlanilha
+        st.session_state.gsheets = GooglePlanilha()
+    gsheets = st.session_state.gsheets
+
+    try:
+        with st.spinner("Atualizando histórico..."):
+            cubo = cubo_atualizado(gsheets)
+    except Exception as e:
+        st.error(f"❌ Erro ao carregar o histórico: {e}")
+        _voltar()
+        return
+
+    # Administradores podem comparar todas as lojas
+    loja = st.session_state.loja
+    if st.session_state.nome_atendente in ["JUSCELIO", "LEONARDO", "LETICIA"]:
+        if st.radio("Lojas", ["Loja atual", "Todas as lojas"], horizontal=True) == "Todas as lojas":
+            loja = None
+
+    col1, col2, col3 = st.columns(3)
+    periodo = PERIODOS[col1.selectbox("Agrupar por", list(PERIODOS))]
+    metrica = col2.selectbox("Métrica", COLUNAS_METRICAS)
+    vendedores = [v['VENDEDOR'] for v in gsheets.get_vendedores_por_loja(loja)]
+    vendedor = col3.selectbox("Vendedor", ["TODOS"] + vendedores)
+    vendedor = None if vendedor == "TODOS" else vendedor
+
+    hoje = datetime.now(ZoneInfo("America/Sao_Paulo")).date()
+    intervalo = st.date_input("Período", (hoje - timedelta(days=90), hoje), format="DD/MM/YYYY")
+    if len(intervalo) != 2:
+        st.info("📅 Selecione a data inicial e a final.")
+        _voltar()
+        return
+    inicio, fim = intervalo
+
+    # --- Tendência ---
+    por = ['LOJA'] if loja is None else []
+    df = cubo.agregar(periodo, por, loja=loja, vendedor=vendedor, inicio=inicio, fim=fim)
+    if df.empty:
+        st.info("📭 Nenhum registro no período.")
+    else:
+        if por:
+            grafico = df.pivot_table(index='PERIODO', columns='LOJA', values=metrica, fill_value=0)
+        else:
+            grafico = df.set_index('PERIODO')[[metrica]]
+        st.markdown(f"### {metrica} por {periodo}")
+        st.line_chart(grafico)
+
+    # --- Comparação de períodos ---
+    st.markdown("---")
+    st.markdown("### 🔁 Comparar Períodos")
+    dias = (fim - inicio).days
+    ca, cb = st.columns(2)
+    periodo_a = ca.date_input("Período A", (inicio - timedelta(days=dias + 1), inicio - timedelta(days=1)),
+                              format="DD/MM/YYYY", key="hist_periodo_a")
+    periodo_b = cb.date_input("Período B", (inicio, fim), format="DD/MM/YYYY", key="hist_periodo_b")
+    if len(periodo_a) == 2 and len(periodo_b) == 2:
+        st.dataframe(cubo.comparar_periodos(periodo_a, periodo_b, loja=loja, vendedor=vendedor),
+                     use_container_width=True, hide_index=True)
+
+    # --- Funil de reservas e perdas (histórico completo) ---
+    st.markdown("---")
+    st.markdown("### 🧭 Funil de Clientes por Vendedor")
+    st.caption("Reserva → conversão/desistência e perda → retorno, ligados pelo nome do cliente na loja.")
+    try:
+        funil = funil_atualizado(gsheets).por_vendedor(loja)
+    except Exception as e:
+        st.error(f"❌ Erro ao montar o funil: {e}")
+        funil = None
+    if funil is not None:
+        if funil.empty: st.info("📭 Nenhuma reserva ou perda registrada.")
+        else: st.dataframe(funil, use_container_width=True, hide_index=True)
+
+    st.markdown("---")
+    _voltar()
@@ -0,0 +1,95 @@
+import re
+import streamlit as st
+import pandas as pd
+from formulario_atendimento import CAMPOS_POR_TIPO, botao_voltar, vendedores_da_loja
+
+LINHAS_INICIAIS = 10
+COLUNAS = ["VENDEDOR", "CLIENTE", "TIPO", "HORA"]
+
+
+def _grade_vazia() -> pd.DataFrame:
+    return pd.DataFrame({coluna: [None] * LINHAS_INICIAIS for coluna in COLUNAS}, dtype=object)
+
+
+def validar(df: pd.DataFrame, vendedores: list, loja: str):
+    """
+    Confere todas as linhas de uma vez. Linhas totalmente vazias são ignoradas.
+    Retorna (atendimentos prontos para registrar, erros "Linha N: ..."); com erro, nada é gravado.
+    """
+    atendimentos, erros = [], []
+    for n, linha in enumerate(df.itertuples(index=False), start=1):
+        vendedor, cliente, tipo, hora = (str(v).strip() if v is not None and not pd.isna(v) else "" for v in linha)
+        if not (vendedor or cliente or tipo or hora): continue
+        cliente = re.sub(r"\s+", " ", cliente).upper()
+        problemas = []
+        if vendedor not in vendedores: problemas.append("vendedor não cadastrado na loja" if vendedor else "sem vendedor")
+        if not cliente: problemas.append("sem cliente")
+        if tipo not in CAMPOS_POR_TIPO: problemas.append("tipo inválido" if tipo else "sem tipo")
+        if hora and not re.fullmatch(r"([01]\d|2[0-3]):[0-5]\d", hora): problemas.append("hora fora do formato HH:MM")
+        if problemas:
+            erros.append(f"Linha {n}: {', '.join(problemas)}")
+            continue
+        atendimentos.append({'loja': loja, 'vendedor': vendedor, 'cliente': cliente,
+                             'hora': f"{hora}:00" if hora else "", **CAMPOS_POR_TIPO[tipo]})
+    return atendimentos, erros
+
+
+def mostrar():
+    st.subheader("🧾 LANÇAMENTO EM LOTE")
+    st.info(f"**Loja:** {st.session_state.loja} | **Usuário:** {st.session_state.nome_atendente}")
+    st.caption("Um atendimento por linha. Tudo é conferido junto e gravado de uma só vez; "
+               "sem HORA, vale o horário do envio.")
+    st.markdown("---")
+
+    try:
+        vendedores = vendedores_da_loja()
+    except Exception as e:
+        st.error(f"❌ Erro ao carregar vendedores: {e}")
+        vendedores = []
+    if not vendedores:
+        st.warning("⚠️ Nenhum vendedor encontrado.")
+        botao_voltar("↩️ Voltar")
+        return
+
+    resultado = st.session_state.pop('lote_resultado', None)
+    if resultado: st.success(resultado)
+
+    # A grade fica num formulário: editar células não reexecuta nada até o envio.
+    # Trocar a versão da chave recomeça a grade vazia depois de uma gravação.
+    versao = st.session_state.setdefault('lote_versao', 0)
+    with st.form("form_lote"):
+        df = st.data_editor(
+            _grade_vazia(),
+            key=f"grade_lote_{versao}",
+            num_rows="dynamic",
+            use_container_width=True,
+            hide_index=True,
+            column_config={
+                "VENDEDOR": st.column_config.SelectboxColumn("Vendedor", options=vendedores),
+                "CLIENTE": st.column_config.TextColumn("Cliente"),
+                "TIPO": st.column_config.SelectboxColumn("Tipo", options=list(CAMPOS_POR_TIPO)),
+                "HORA": st.column_config.TextColumn("Hora (HH:MM)", max_chars=5),
+            },
+        )
+        enviado = st.form_submit_button("💾 GRAVAR TODOS", type="primary", use_container_width=True)
+
+    if enviado:
+        atendimentos, erros = validar(df, vendedores, st.session_state.loja)
+        if erros:
+            st.error("⚠️ Nada foi gravado. Corrija as linhas abaixo:\n\n" + "\n".join(f"- {e}" for e in erros))
+        elif not atendimentos:
+            st.warning("⚠️ Preencha ao menos uma linha.")
+        else:
+            try:
+                with st.spinner(f"Gravando {len(atendimentos)} atendimentos..."):
+                    qtd = st.session_state.gsheets.registrar_atendimentos(atendimentos)
+            except Exception as e:
+                st.error(f"❌ Falha ao salvar (nenhuma linha gravada): {e}")
+            else:
+                st.session_state.lote_resultado = f"✅ {qtd} atendimentos registrados!"
+                st.session_state.lote_versao = versao + 1
+                st.session_state.pop(f"grade_lote_{versao}", None)
+                st.rerun()
+
+    st.markdown("---")
+    botao_voltar(limpar=('lote_versao',))
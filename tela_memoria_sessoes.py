@@ -0,0 +1,45 @@
+import streamlit as st
+import pandas as pd
+from memoria_sessoes import levantamento, totais_por_chave, aplicar_politicas, POLITICAS
+
+
+def mostrar():
+    st.subheader("🧠 MEMÓRIA DAS SESSÕES")
+    st.caption("Tamanho aproximado do session_state de cada aba aberta neste servidor.")
+
+    sessoes = levantamento()
+    if not sessoes:
+        st.info("📭 Nenhuma sessão encontrada (fora de um servidor Streamlit?).")
+    else:
+        total = sum(s["total"] for s in sessoes)
+        c1, c2, c3 = st.columns(3)
+        c1.metric("Sessões", len(sessoes))
+        c2.metric("Total", f"{total / 1024 / 1024:.1f} MB")
+        c3.metric("Desconectadas", sum(1 for s in sessoes if not s["ativa"]))
+
+        st.markdown("### Por chave")
+        st.dataframe(totais_por_chave(sessoes), use_container_width=True, hide_index=True)
+
+        st.markdown("### Por sessão")
+        st.dataframe(pd.DataFrame([
+            {
+                "USUÁRIO": s["usuario"], "LOJA": s["loja"], "CONECTADA": "✅" if s["ativa"] else "—",
+                "OCIOSA (min)": round(s["ocioso_s"] / 60, 1), "TOTAL KB": round(s["total"] / 1024, 1),
+                "MAIOR CHAVE": max(s["chaves"], key=s["chaves"].get) if s["chaves"] else "",
+            }
+            for s in sorted(sessoes, key=lambda s: -s["total"])
+        ]), use_container_width=True, hide_index=True)
+
+    st.markdown("### 🧹 Descarte automático")
+    for p in POLITICAS:
+        regra = f"ociosa há {p.ocioso_s // 60:.0f} min"
+        if p.apos_download_s: regra += f" ou {p.apos_download_s:.0f}s após o download"
+        st.caption(f"**{p.nome}** ({', '.join(p.chaves)}): {regra}")
+
+    if st.button("🧹 APLICAR DESCARTE AGORA", use_container_width=True, key="btn_descartar_memoria"):
+        descartes = aplicar_politicas()
+        st.success("✅ " + ", ".join(f"{nome}: {qtd}" for nome, qtd in descartes.items()))
+
+    if st.button("↩️ VOLTAR", use_container_width=True, key="btn_voltar_memoria"):
+        st.session_state.etapa = 'atendimento'
+        st.rerun()
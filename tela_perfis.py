@@ -0,0 +1,47 @@
+import os
+import streamlit as st
+import pandas as pd
+from perfil_rerun import perfilador
+
+
+def mostrar():
+    st.subheader("⏱️ PERFIS DE EXECUÇÃO")
+    st.caption(f"Com o perfil ligado, cada rerun roda sob cProfile e ficam guardados os "
+               f"{perfilador.maximo} mais lentos (de todas as lojas).")
+
+    ativo = st.toggle("Perfil dos reruns ligado", value=perfilador.ativo, key="tgl_perfil_reruns")
+    if ativo != perfilador.ativo:
+        perfilador.ativo = ativo
+        st.rerun()
+
+    perfis = perfilador.perfis()
+    if not perfis:
+        st.info("📭 Nenhum perfil guardado ainda.")
+    else:
+        st.dataframe(pd.DataFrame([
+            {"QUANDO": p["quando"].strftime("%d/%m %H:%M:%S"), "TELA": p["tela"], "LOJA": p["loja"],
+             "USUÁRIO": p["usuario"], "DURAÇÃO (ms)": round(p["duracao"] * 1000, 1)}
+            for p in perfis
+        ]), use_container_width=True, hide_index=True)
+
+        opcoes = list(range(len(perfis)))
+        i = st.selectbox(
+            "Ver funções do rerun", opcoes, key="sel_perfil",
+            format_func=lambda i: f"{perfis[i]['duracao'] * 1000:.0f} ms · {perfis[i]['tela']} · {perfis[i]['loja']} · {perfis[i]['quando']:%H:%M:%S}"
+        )
+        perfil = perfis[i]
+        st.markdown("### Funções com maior tempo acumulado")
+        st.dataframe(pd.DataFrame(perfil["funcoes"]), use_container_width=True, hide_index=True)
+
+        if perfil["arquivo"] and os.path.exists(perfil["arquivo"]):
+            with open(perfil["arquivo"], "rb") as f:
+                st.download_button("📥 Baixar .prof (snakeviz/pstats)", f.read(),
+                                   file_name=os.path.basename(perfil["arquivo"]), use_container_width=True)
+
+        if st.button("🗑️ APAGAR PERFIS", use_container_width=True, key="btn_apagar_perfis"):
+            perfilador.limpar()
+            st.rerun()
+
+    if st.button("↩️ VOLTAR", use_container_width=True, key="btn_voltar_perfis"):
+        st.session_state.etapa = 'atendimento'
+        st.rerun()
@@ -1,50 +1,33 @@
 ﻿import streamlit as st
-from datetime import datetime
-from google_planilha import GooglePlanilha
+from formulario_atendimento import botao_voltar, mostrar_aviso, avisar, registrar, valor, vendedores_da_loja
+
+def _salvar():
+    vendedor, cliente = st.session_state.vend_pesquisa, valor("cliente_pesquisa_input")
+    if not vendedor or not cliente: return avisar("⚠️ Preencha Vendedor e Cliente!")
+    dados = {
+        'loja': st.session_state.loja, 'vendedor': vendedor,
+        'cliente': cliente, 'atendimento': '1', 'pesquisa': '1',
+        'receita': '', 'venda': '', 'perda': '', 'reserva': '', 'consulta': ''
+    }
+    registrar(dados, "✅ Registro salvo!")
 
 def tela_pesquisa():
     st.subheader("🔍 PESQUISA SEM RECEITA")
     st.info(f"**Loja:** {st.session_state.loja} | **Usuário:** {st.session_state.nome_atendente}")
     st.markdown("---")
 
-    if 'gsheets' not in st.session_state: st.session_state.gsheets = GooglePlanilha()
-    gsheets = st.session_state.gsheets
-
-    vendedores_data = gsheets.get_vendedores_por_loja()
-    vendedores = [v['VENDEDOR'] for v in vendedores_data]
+    vendedores = vendedores_da_loja()
     if not vendedores:
         st.warning("⚠️ Nenhum vendedor encontrado.")
-        if st.button("↩️ Voltar"): st.session_state.etapa = 'atendimento'; st.rerun()
+        botao_voltar("↩️ Voltar")
         return
 
-    vendedor = st.selectbox("Vendedor", vendedores, index=None, placeholder="Selecione", key="vend_pesquisa")
-    cliente = st.text_input("Nome do Cliente", key="cliente_pesquisa_input").strip().upper()
-
-    st.markdown("---")
-
-    if st.button("✅ CONFIRMAR", type="primary", key="btn_registrar_pesquisa", use_container_width=True):
-        if not vendedor or not cliente: st.error("⚠️ Preencha Vendedor e Cliente!")
-        else:
-            st.session_state.tipo_registro = "PESQUISA"
-            st.session_state.cliente_pesquisa = cliente
-            st.session_state.vendedor_pesquisa = vendedor
-            st.rerun()
-
-    if 'tipo_registro' in st.session_state:
-        st.success(f"✅ **PRONTO**: {st.session_state.cliente_pesquisa}")
-        if st.button("💾 SALVAR ATENDIMENTO", type="primary", use_container_width=True):
-            dados = {
-                'loja': st.session_state.loja, 'vendedor': st.session_state.vendedor_pesquisa,
-                'cliente': st.session_state.cliente_pesquisa, 'atendimento': '1', 'pesquisa': '1',
-                'receita': '', 'venda': '', 'perda': '', 'reserva': '', 'consulta': ''
-            }
-            if gsheets.registrar_atendimento(dados):
-                st.balloons(); st.success("✅ Registro salvo!")
-                del st.session_state.tipo_registro
-                st.session_state.etapa = 'loja'
-                st.rerun()
-            else: st.error("❌ Erro ao salvar.")
+    mostrar_aviso()
+    with st.form("form_pesquisa"):
+        st.selectbox("Vendedor", vendedores, index=None, placeholder="Selecione", key="vend_pesquisa")
+        st.text_input("Nome do Cliente", key="cliente_pesquisa_input")
+        st.markdown("---")
+        st.form_submit_button("💾 SALVAR ATENDIMENTO", type="primary", key="btn_registrar_pesquisa",
+                              use_container_width=True, on_click=_salvar)
 
-    if st.button("↩️ VOLTAR", use_container_width=True):
-        if 'tipo_registro' in st.session_state: del st.session_state.tipo_registro
-        st.session_state.etapa = 'atendimento'; st.rerun()
+    botao_voltar()
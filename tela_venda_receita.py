@@ -1,62 +1,34 @@
 ﻿import streamlit as st
-from datetime import datetime
-from google_planilha import GooglePlanilha
+from formulario_atendimento import CAMPOS_POR_TIPO, botao_voltar, mostrar_aviso, avisar, registrar, valor, vendedores_da_loja
+
+TIPOS = {"VENDA": "✅ VENDA", "PERDA": "❌ PERDA", "RESERVA": "🗓️ RESERVA"}
+
+def _confirmar():
+    vendedor, cliente, tipo = st.session_state.vend_venda, valor("cliente_venda_input"), st.session_state.tipo_venda
+    if not vendedor or not cliente: return avisar("⚠️ Preencha Vendedor e Cliente!")
+    if not tipo: return avisar("⚠️ Escolha o Tipo de Registro!")
+    dados = {'loja': st.session_state.loja, 'vendedor': vendedor, 'cliente': cliente, **CAMPOS_POR_TIPO[tipo]}
+    registrar(dados, "✅ Registro salvo!")
 
 def tela_venda_receita():
     st.subheader("💊 VENDA COM RECEITA")
     st.info(f"**Loja:** {st.session_state.loja} | **Usuário:** {st.session_state.nome_atendente}")
     st.markdown("---")
 
-    if 'gsheets' not in st.session_state: st.session_state.gsheets = GooglePlanilha()
-    gsheets = st.session_state.gsheets
-
-    vendedores_data = gsheets.get_vendedores_por_loja()
-    vendedores = [v['VENDEDOR'] for v in vendedores_data]
+    vendedores = vendedores_da_loja()
     if not vendedores:
         st.warning("⚠️ Nenhum vendedor encontrado.")
-        if st.button("↩️ Voltar"): st.session_state.etapa = 'atendimento'; st.rerun()
+        botao_voltar("↩️ Voltar")
         return
 
-    vendedor = st.selectbox("Vendedor", vendedores, index=None, placeholder="Selecione", key="vend_venda")
-    cliente = st.text_input("Nome do Cliente", key="cliente_venda_input").strip().upper()
-
-    st.markdown("### 🔘 Tipo de Registro:")
-    cols = st.columns(3)
-    with cols[0]:
-        if st.button("✅ VENDA", use_container_width=True, type="primary"):
-            st.session_state.tipo_registro = "VENDA"; st.session_state.cliente_venda = cliente; st.session_state.vendedor_venda = vendedor; st.rerun()
-    with cols[1]:
-        if st.button("❌ PERDA", use_container_width=True, type="secondary"):
-            st.session_state.tipo_registro = "PERDA"; st.session_state.cliente_venda = cliente; st.session_state.vendedor_venda = vendedor; st.rerun()
-    with cols[2]:
-        if st.button("🗓️ RESERVA", use_container_width=True, type="secondary"):
-            st.session_state.tipo_registro = "RESERVA"; st.session_state.cliente_venda = cliente; st.session_state.vendedor_venda = vendedor; st.rerun()
-
-    if 'tipo_registro' in st.session_state:
-        tipo = st.session_state.tipo_registro
-        cli = st.session_state.cliente_venda
-        vend = st.session_state.vendedor_venda
-        st.markdown("---")
-        st.success(f"✅ **PRONTO**: {cli} | **Tipo:** {tipo}")
-
-        col1, col2 = st.columns(2)
-        with col1:
-            if st.button("↩️ VOLTAR", use_container_width=True):
-                del st.session_state.tipo_registro; st.session_state.etapa = 'atendimento'; st.rerun()
-        with col2:
-            if st.button("✅ CONFIRMAR", type="primary", use_container_width=True):
-                if not vend or not cli: st.error("⚠️ Preencha Vendedor e Cliente!")
-                else:
-                    dados = {
-                        'loja': st.session_state.loja, 'vendedor': vend, 'cliente': cli,
-                        'atendimento': '1', 'receita': '1',
-                        'venda': '1' if tipo == "VENDA" else '',
-                        'perda': '1' if tipo == "PERDA" else '',
-                        'reserva': '1' if tipo == "RESERVA" else '',
-                        'pesquisa': '', 'consulta': ''
-                    }
-                    if gsheets.registrar_atendimento(dados):
-                        st.balloons(); st.success("✅ Registro salvo!")
-                        del st.session_state.tipo_registro; st.session_state.etapa = 'loja'; st.rerun()
-                    else: st.error("❌ Erro ao salvar.")
-
+    mostrar_aviso()
+    # Nada aqui reexecuta a tela até o CONFIRMAR, que grava e volta à loja num único rerun
+    with st.form("form_venda_receita"):
+        st.selectbox("Vendedor", vendedores, index=None, placeholder="Selecione", key="vend_venda")
+        st.text_input("Nome do Cliente", key="cliente_venda_input")
+        st.markdown("### 🔘 Tipo de Registro:")
+        st.radio("Tipo de Registro", list(TIPOS), format_func=TIPOS.get, index=None, horizontal=True,
+                 key="tipo_venda", label_visibility="collapsed")
+        st.form_submit_button("✅ CONFIRMAR", type="primary", use_container_width=True, on_click=_confirmar)
+
+    botao_voltar()
@@ -0,0 +1,281 @@
+"""
+Teste de carga: quantos atendentes simultâneos um dyno aguenta?
+
+Executa o app.py real (via streamlit.testing) com N sessões em paralelo, cada uma
+percorrendo o fluxo login -> seleção de loja -> venda com receita -> relatório de reservas.
+Depois do login a sessão é recarregada (como um F5), retomando pelo token da URL.
+O Google Sheets é substituído pelo ServidorFalso (planilha_falsa.py), com latência e
+cota configuráveis.
+
+As chamadas à API de cada ação são as do cliente da sessão. O aquecimento que a seleção
+de loja dispara roda em segundo plano com o mesmo cliente: antes da ação seguinte a
+sessão espera ele terminar (fora do tempo medido), e as leituras dele contam para
+`selecionar_loja`, não para a ação que estivesse rodando.
+
+Uso:
+    python teste_carga.py --sessoes 1,2,4,8,16 --latencia 0.15 --linhas 20000
+"""
+import argparse
+import json
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from unittest.mock import MagicMock
+
+# As tarefas de manutenção tentariam abrir a planilha real
+os.environ.setdefault("AGENDADOR_ATIVO", "0")
+
+import bcrypt
+from streamlit.runtime import Runtime
+from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+from streamlit.runtime.media_file_manager import MediaFileManager
+from streamlit.testing.v1 import AppTest
+
+from cache_compartilhado import cache
+from google_planilha import GooglePlanilha
+from planilha_falsa import ServidorFalso
+
+APP = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+SENHA_CARGA = "carga123"
+LOJAS = [f"LOJA {i:02d}" for i in range(1, 9)]
+VENDEDORES = [f"VENDEDOR {i:02d}" for i in range(1, 13)]
+
+
+def preparar_usuarios(pasta: str, qtd_atendentes: int):
+    """usuarios.json temporário com senha conhecida (mesmo custo bcrypt da produção)."""
+    senha_hash = bcrypt.hashpw(SENHA_CARGA.encode(), bcrypt.gensalt(12)).decode()
+    usuarios = [{"nome": f"ATENDENTE{i:03d}", "senha_hash": senha_hash} for i in range(qtd_atendentes)]
+    usuarios += [{"nome": loja.replace(" ", ""), "senha_hash": senha_hash} for loja in LOJAS]
+    with open(os.path.join(pasta, "usuarios.json"), "w", encoding="utf-8") as f:
+        json.dump({"usuarios": usuarios}, f, indent=4)
+
+
+def preparar_servidor(args) -> ServidorFalso:
+    servidor = ServidorFalso(args.latencia, args.variacao, args.cota_leitura, args.cota_escrita)
+    relatorio = [GooglePlanilha.COLUNAS_RELATORIO]
+    for _ in range(args.linhas):
+        dia = f"{random.randint(1, 28):02d}/{random.randint(1, 12):02d}/2025"
+        relatorio.append([
+            random.choice(LOJAS), dia, "10:00:00", random.choice(VENDEDORES),
+            f"CLIENTE {random.randint(1, args.linhas // 3 + 1)}", "1", "1", "",
+            random.choice(["1", ""]), random.choice(["1", "-1", ""]), "", "", ""
+        ])
+    servidor.criar_planilha("fluxo de loja", {
+        "vendedor": [["VENDEDOR", "STATUS"]] + [[v, "ATIVO"] for v in VENDEDORES],
+        "relatorio": relatorio,
+    })
+    return servidor
+
+
+def _fixar_runtime():
+    """
+    O AppTest cria e descarta um Runtime global a cada execução, o que quebra sessões
+    simultâneas. Aqui todas as sessões passam a enxergar um único Runtime simulado,
+    como num servidor Streamlit de verdade.
+    """
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime.instance = classmethod(lambda cls: runtime)
+    Runtime.exists = classmethod(lambda cls: True)
+
+
+def _botao(at: AppTest, texto: str):
+    for b in at.button:
+        if texto in b.label: return b
+    raise LookupError(f"Botão '{texto}' não encontrado na tela {at.session_state['etapa']}")
+
+
+class SessaoSimulada:
+    """Um atendente percorrendo o fluxo; mede cada rerun e as chamadas à API por ação."""
+
+    def __init__(self, indice: int, servidor: ServidorFalso, timeout: float):
+        self.usuario = f"ATENDENTE{indice:03d}"
+        self.loja = LOJAS[indice % len(LOJAS)]
+        self.cliente = servidor.cliente()
+        self.timeout = timeout
+        self.at = self._nova_aba()
+        self.reruns = []
+        self.acoes = defaultdict(list)   # ação -> [(segundos, chamadas à API)]
+        self.aquecimentos = []           # disparados por esta sessão e ainda rodando
+        self.erros = Counter()
+
+    def _nova_aba(self, token: str = None) -> AppTest:
+        at = AppTest.from_file(APP, default_timeout=self.timeout)
+        at.session_state["gsheets_client"] = self.cliente
+        at.session_state["planilha_atendimento"] = self.cliente.open("fluxo de loja")
+        if token: at.query_params["sessao"] = token
+        return at
+
+    def _run(self):
+        inicio = time.perf_counter()
+        self.at.run()
+        self.reruns.append(time.perf_counter() - inicio)
+        if self.at.exception: raise RuntimeError(self.at.exception[0].message)
+
+    def _acao(self, nome: str, passos):
+        antes = sum(self.cliente.chamadas.values())
+        inicio = time.perf_counter()
+        try:
+            passos()
+        except Exception as e:
+            self.erros[f"{nome}: {type(e).__name__}"] += 1
+            return False
+        segundos = time.perf_counter() - inicio
+        self._aguardar_aquecimentos()
+        self.acoes[nome].append((segundos, sum(self.cliente.chamadas.values()) - antes))
+        return True
+
+    def _aguardar_aquecimentos(self):
+        # Inclui os cancelados: a etapa em andamento vai até o fim (ver aquecimento.py)
+        try: aquecimento = self.at.session_state["aquecimento"]
+        except KeyError: aquecimento = None
+        if aquecimento is not None and aquecimento not in self.aquecimentos: self.aquecimentos.append(aquecimento)
+        for a in self.aquecimentos: a.aguardar(self.timeout)
+        self.aquecimentos = [a for a in self.aquecimentos if a.ativo]
+
+    def executar(self, repeticoes: int):
+        def login():
+            at = self.at
+            self._run()
+            at.text_input[0].input(self.usuario)
+            at.text_input[1].input(SENHA_CARGA)
+            _botao(at, "ENTRAR").click()
+            self._run()
+            if at.session_state["etapa"] != "loja": raise RuntimeError("login recusado")
+
+        def recarregar():
+            # F5 no navegador: sessão nova, só com o token da URL (sem bcrypt)
+            token = self.at.query_params["sessao"]
+            self.at = self._nova_aba(token[0] if isinstance(token, list) else token)
+            self._run()
+            if self.at.session_state["etapa"] != "loja": raise RuntimeError("token de sessão recusado")
+
+        def selecionar_loja():
+            at = self.at
+            at.selectbox(key="loja_select").select(self.loja)
+            at.button(key="btn_confirmar_loja").click()
+            self._run()
+
+        def venda_receita():
+            at = self.at
+            at.button(key="btn_venda_receita").click()
+            self._run()
+            # Campos dentro do st.form: só o CONFIRMAR reexecuta (grava e volta à loja no mesmo rerun)
+            at.selectbox(key="vend_venda").select(random.choice(VENDEDORES))
+            at.text_input(key="cliente_venda_input").input(f"CLIENTE CARGA {random.randint(1, 10**6)}")
+            at.radio(key="tipo_venda").set_value("RESERVA")
+            _botao(at, "CONFIRMAR").click()
+            self._run()
+            if at.session_state["etapa"] != "loja": raise RuntimeError("registro não concluído")
+
+        def relatorio_reservas():
+            at = self.at
+            at.button(key="btn_relatorio_reservas").click()
+            self._run()
+            _botao(at, "VOLTAR").click()   # volta ao menu de atendimento
+            self._run()
+            _botao(at, "VOLTAR").click()   # e dali para a seleção de loja
+            self._run()
+
+        if not self._acao("login", login): return
+        if not self._acao("recarregar", recarregar): return
+        for _ in range(repeticoes):
+            if not self._acao("selecionar_loja", selecionar_loja): return
+            if not self._acao("venda_receita", venda_receita): return
+            if not self._acao("selecionar_loja", selecionar_loja): return
+            if not self._acao("relatorio_reservas", relatorio_reservas): return
+
+
+def _percentil(valores, p):
+    if not valores: return 0.0
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(round(p / 100 * (len(valores) - 1))))]
+
+
+def rodada(servidor: ServidorFalso, qtd_sessoes: int, args) -> dict:
+    cache.limpar()
+    sessoes = [SessaoSimulada(i, servidor, args.timeout) for i in range(qtd_sessoes)]
+    recusadas_antes = servidor.recusadas
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=qtd_sessoes) as pool:
+        list(pool.map(lambda s: s.executar(args.repeticoes), sessoes))
+    duracao = time.perf_counter() - inicio
+
+    reruns = [r for s in sessoes for r in s.reruns]
+    por_acao = defaultdict(list)
+    for s in sessoes:
+        for nome, medidas in s.acoes.items(): por_acao[nome].extend(medidas)
+    total_acoes = sum(len(m) for m in por_acao.values())
+    return {
+        "sessoes": qtd_sessoes,
+        "duracao_s": round(duracao, 2),
+        "acoes_por_s": round(total_acoes / duracao, 2) if duracao else 0.0,
+        "reruns": len(reruns),
+        "rerun_p50_ms": round(_percentil(reruns, 50) * 1000, 1),
+        "rerun_p99_ms": round(_percentil(reruns, 99) * 1000, 1),
+        "chamadas_por_acao": {
+            nome: round(statistics.mean(c for _, c in medidas), 2) for nome, medidas in sorted(por_acao.items())
+        },
+        "recusadas_429": servidor.recusadas - recusadas_antes,
+        "erros": dict(sum((s.erros for s in sessoes), Counter())),
+    }
+
+
+def ponto_saturacao(resultados: list, limite_p99_ms: float):
+    """Primeiro N em que o p99 passa do limite, há erros ou a vazão para de crescer (< 10%)."""
+    anterior = None
+    for r in resultados:
+        if r["rerun_p99_ms"] > limite_p99_ms or r["erros"] or r["recusadas_429"]:
+            return r["sessoes"]
+        if anterior and r["acoes_por_s"] < anterior["acoes_por_s"] * 1.10:
+            return r["sessoes"]
+        anterior = r
+    return None
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Teste de carga do Fluxo de Loja com Sheets simulado.")
+    ap.add_argument("--sessoes", default="1,2,4,8,16", help="Lista de quantidades de sessões simultâneas")
+    ap.add_argument("--repeticoes", type=int, default=3, help="Ciclos venda+relatório por sessão")
+    ap.add_argument("--linhas", type=int, default=20000, help="Linhas na aba relatorio simulada")
+    ap.add_argument("--latencia", type=float, default=0.15, help="Latência média por chamada (s)")
+    ap.add_argument("--variacao", type=float, default=0.05, help="Desvio padrão da latência (s)")
+    ap.add_argument("--cota-leitura", type=int, default=300, help="Leituras por minuto")
+    ap.add_argument("--cota-escrita", type=int, default=300, help="Escritas por minuto")
+    ap.add_argument("--limite-p99", type=float, default=2000, help="p99 de rerun aceitável (ms)")
+    ap.add_argument("--timeout", type=float, default=120, help="Timeout de cada rerun (s)")
+    ap.add_argument("--saida", help="Arquivo JSON para gravar os resultados")
+    args = ap.parse_args(argv)
+
+    niveis = [int(n) for n in args.sessoes.split(",")]
+    pasta = tempfile.mkdtemp(prefix="carga_")
+    preparar_usuarios(pasta, max(niveis))
+    servidor = preparar_servidor(args)
+    os.chdir(pasta)  # o cadastro (dados/usuarios.db) é migrado do usuarios.json do diretório corrente
+    _fixar_runtime()
+
+    resultados = []
+    for n in niveis:
+        r = rodada(servidor, n, args)
+        resultados.append(r)
+        print(f"{n:>4} sessões | {r['acoes_por_s']:>7.2f} ações/s | p50 {r['rerun_p50_ms']:>8.1f} ms | "
+              f"p99 {r['rerun_p99_ms']:>8.1f} ms | 429: {r['recusadas_429']} | erros: {r['erros'] or '-'}")
+        for nome, chamadas in r["chamadas_por_acao"].items():
+            print(f"       {nome:<20} {chamadas:>6.2f} chamadas à API por ação")
+
+    saturacao = ponto_saturacao(resultados, args.limite_p99)
+    print(f"\nPonto de saturação: {saturacao if saturacao else 'não atingido'} sessões")
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({"resultados": resultados, "saturacao": saturacao}, f, indent=2, ensure_ascii=False)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,44 @@
+import os
+import sys
+
+# Nada de disco nem de tarefas de manutenção durante os testes
+os.environ.setdefault("FLUXO_SNAPSHOT_ARQUIVO", "")
+os.environ.setdefault("FLUXO_EVENTOS_ARQUIVO", "")
+os.environ.setdefault("AGENDADOR_ATIVO", "0")
+# A planilha falsa responde na hora: a cota real deixaria a suíte em economia de leituras
+os.environ.setdefault("SHEETS_COTA_LEITURA_MIN", "100000")
+os.environ.setdefault("SHEETS_COTA_ESCRITA_MIN", "100000")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+from cache_compartilhado import cache
+from google_planilha import GooglePlanilha
+from planilha_falsa import ServidorFalso
+
+
+def linha(loja: str, cliente: str, data: str = "10/03/2025") -> list:
+    return [loja, data, "10:00:00", "ANA", cliente, "1", "1", "", "1", "", "", "", ""]
+
+
+@pytest.fixture(autouse=True)
+def cache_limpo():
+    cache._dados.clear()
+    yield
+    cache._dados.clear()
+
+
+@pytest.fixture
+def servidor():
+    srv = ServidorFalso(latencia=0, variacao=0)
+    srv.criar_planilha("fluxo de loja", {
+        "vendedor": [["VENDEDOR", "STATUS"], ["ANA", "ATIVO"]],
+        "relatorio": [GooglePlanilha.COLUNAS_RELATORIO] + [linha(f"LOJA {i % 3}", f"CLIENTE {i}") for i in range(200)],
+    })
+    return srv
+
+
+@pytest.fixture
+def gsheets(servidor):
+    cliente = servidor.cliente()
+    return GooglePlanilha(planilha=cliente.open("fluxo de loja"), cliente=cliente)
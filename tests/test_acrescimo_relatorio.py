@@ -0,0 +1,97 @@
+import threading
+
+from conftest import linha
+from google_planilha import GooglePlanilha
+
+
+def _sincronizar_durante_gravacao(gsheets, sincronizar):
+    """Depois do append_rows e antes do acréscimo local, outra thread sincroniza o snapshot."""
+    gravar = gsheets.armazenamento.acrescentar_relatorio
+    threads = []
+
+    def gravar_e_sincronizar(linhas):
+        gravar(linhas)
+        t = threading.Thread(target=sincronizar)
+        t.start()
+        t.join(timeout=0.5)   # sem a trava a sincronização termina aqui, antes do acréscimo
+        threads.append(t)
+    gsheets.armazenamento.acrescentar_relatorio = gravar_e_sincronizar
+    return threads
+
+
+def test_sincronizacao_durante_gravacao_nao_duplica_linhas(gsheets, servidor):
+    assert len(gsheets.get_snapshot_relatorio()) == 200
+    threads = _sincronizar_durante_gravacao(gsheets, gsheets._sincronizar_relatorio)
+
+    gsheets.acrescentar_linhas_relatorio([linha("LOJA 1", "NOVO A"), linha("LOJA 2", "NOVO B")])
+    for t in threads: t.join()
+
+    aba = servidor.planilhas["fluxo de loja"].abas["relatorio"].linhas
+    assert len(aba) - 1 == 202
+    snap = gsheets._sincronizar_relatorio()
+    assert len(snap) == 202
+    assert [r["CLIENTE"] for r in snap.registros([200, 201])] == ["NOVO A", "NOVO B"]
+
+
+def test_sincronizacao_de_fragmento_durante_gravacao_nao_duplica_linhas(servidor):
+    planilha = servidor.planilhas["fluxo de loja"]
+    planilha.add_worksheet("roteamento", _linhas=[["LOJA", "PLANILHA_ID", "ABA"], ["LOJA 9", "", "relatorio_loja9"]])
+    planilha.add_worksheet("relatorio_loja9", _linhas=[GooglePlanilha.COLUNAS_RELATORIO])
+    cliente = servidor.cliente()
+    gsheets = GooglePlanilha(planilha=cliente.open("fluxo de loja"), cliente=cliente)
+    assert gsheets.fragmentado
+    assert len(gsheets.get_snapshot_relatorio("LOJA 9")) == 0
+    nome = gsheets.armazenamento.fragmento_da_loja("LOJA 9")
+    threads = _sincronizar_durante_gravacao(gsheets, lambda: gsheets._sincronizar_fragmento(nome))
+
+    gsheets.acrescentar_linhas_relatorio([linha("LOJA 9", "NOVO A")])
+    for t in threads: t.join()
+
+    assert len(gsheets._sincronizar_fragmento(nome)) == 1
+    assert len(gsheets._juntar_fragmentos(forcar=True)) == 201
+
+
+def _clientes(snap):
+    return [r["CLIENTE"] for r in snap.registros(range(len(snap)))]
+
+
+def test_gravacao_de_fora_antes_da_nossa_entra_na_ordem_da_aba(gsheets, servidor):
+    assert len(gsheets.get_snapshot_relatorio()) == 200
+    aba = servidor.planilhas["fluxo de loja"].abas["relatorio"].linhas
+    aba.append(linha("LOJA 1", "MANUAL"))   # gerente, outro processo ou importar_historico
+
+    gsheets.acrescentar_linhas_relatorio([linha("LOJA 1", "APP")])
+    for _ in range(30): snap = gsheets._sincronizar_relatorio()
+
+    assert len(snap) == len(aba) - 1 == 202
+    assert _clientes(snap)[-2:] == ["MANUAL", "APP"]
+
+
+def test_gravacao_de_fora_em_fragmento(servidor):
+    planilha = servidor.planilhas["fluxo de loja"]
+    planilha.add_worksheet("roteamento", _linhas=[["LOJA", "PLANILHA_ID", "ABA"], ["LOJA 9", "", "relatorio_loja9"]])
+    planilha.add_worksheet("relatorio_loja9", _linhas=[GooglePlanilha.COLUNAS_RELATORIO, linha("LOJA 9", "A")])
+    cliente = servidor.cliente()
+    gsheets = GooglePlanilha(planilha=cliente.open("fluxo de loja"), cliente=cliente)
+    assert len(gsheets.get_snapshot_relatorio()) == 201
+    planilha.abas["relatorio_loja9"].linhas.append(linha("LOJA 9", "MANUAL"))
+
+    gsheets.acrescentar_linhas_relatorio([linha("LOJA 9", "APP")])
+
+    assert _clientes(gsheets.get_snapshot_relatorio("LOJA 9")) == ["A", "MANUAL", "APP"]
+    assert _clientes(gsheets.get_snapshot_relatorio())[-3:] == ["A", "MANUAL", "APP"]
+    assert _clientes(gsheets._juntar_fragmentos(forcar=True))[-3:] == ["A", "MANUAL", "APP"]
+
+
+def test_gravacao_de_outro_processo_no_sqlite(tmp_path):
+    from armazenamento import ArmazenamentoSQLite
+    caminho = str(tmp_path / "fluxo.db")
+    local, outro = ArmazenamentoSQLite(caminho), ArmazenamentoSQLite(caminho)
+    local.acrescentar_relatorio([linha("LOJA 1", f"CLIENTE {i}") for i in range(10)])
+    gsheets = GooglePlanilha(armazenamento=local)
+    assert len(gsheets.get_snapshot_relatorio()) == 10
+
+    outro.acrescentar_relatorio([linha("LOJA 1", "OUTRO")])
+    gsheets.acrescentar_linhas_relatorio([linha("LOJA 1", "APP")])
+
+    assert _clientes(gsheets._sincronizar_relatorio())[-2:] == ["OUTRO", "APP"]
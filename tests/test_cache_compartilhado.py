@@ -0,0 +1,31 @@
+import threading
+import time
+
+from cache_compartilhado import CacheCompartilhado
+
+
+def test_carga_unica_e_sem_locks_sobrando():
+    cache = CacheCompartilhado()
+    cargas = []
+
+    def carregar():
+        cargas.append(1)
+        time.sleep(0.05)
+        return "valor"
+
+    threads = [threading.Thread(target=cache.obter_ou_carregar, args=(("hoje", "LOJA 1", "2025-03-10"), carregar))
+               for _ in range(8)]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    assert len(cargas) == 1
+    assert cache._locks_chave == {}
+
+
+def test_lock_sai_mesmo_com_erro_na_carga():
+    cache = CacheCompartilhado()
+
+    def falhar(): raise RuntimeError("cota")
+    try: cache.obter_ou_carregar(("reservas", "LOJA 1"), falhar)
+    except RuntimeError: pass
+    assert cache.obter_ou_carregar(("reservas", "LOJA 1"), lambda: None) is None
+    assert cache._locks_chave == {}
@@ -0,0 +1,91 @@
+import pytest
+
+from conftest import linha
+from exportacao_drive import DriveLocal, exportar_incremental, ler_exportacao, ler_manifesto
+from google_planilha import GooglePlanilha
+
+
+@pytest.fixture
+def destino(tmp_path):
+    return DriveLocal(str(tmp_path / "drive"))
+
+
+def _aba(servidor, nome="relatorio"):
+    return servidor.planilhas["fluxo de loja"].abas[nome].linhas
+
+
+def test_ida_e_volta_com_celulas_da_planilha(gsheets, servidor, destino):
+    # Valores que o snapshot não guarda como estão: métrica fora do int8 e data inválida
+    _aba(servidor)[1] = ["LOJA 0", "31/02/2025", "10:00:00", "ANA", "CLIENTE X", "300", "1", "", "1", "", "", "", ""]
+    r = exportar_incremental(gsheets, destino)
+    assert r["linhas"] == 200 and len(r["arquivos"]) == 1
+
+    df = ler_exportacao(destino)
+    assert len(df) == 200
+    assert (df.loc[0, "DATA"], df.loc[0, "ATENDIMENTOS"]) == ("31/02/2025", "300")
+    assert list(df["LINHA"][:2]) == [2, 3]
+
+    gsheets.acrescentar_linhas_relatorio([linha("LOJA 1", "NOVO A"), linha("LOJA 2", "NOVO B")])
+    r = exportar_incremental(gsheets, destino)
+    assert r["linhas"] == 2
+    assert exportar_incremental(gsheets, destino)["linhas"] == 0
+
+    df = ler_exportacao(destino)
+    assert len(df) == 202
+    assert list(df["CLIENTE"][-2:]) == ["NOVO A", "NOVO B"]
+    assert list(df["LINHA"][-2:]) == [202, 203]
+    assert ler_manifesto(destino)["geracao"] == 1
+
+
+def test_arquivo_corrompido_e_recusado(gsheets, destino):
+    arquivo = exportar_incremental(gsheets, destino)["arquivos"][0]
+    dados = bytearray(destino.ler(arquivo))
+    dados[len(dados) // 2] ^= 0xFF
+    destino.gravar(arquivo, bytes(dados), "application/octet-stream")
+    with pytest.raises(ValueError, match="corrompido"):
+        ler_exportacao(destino)
+
+
+def test_aba_encolhida_comeca_geracao_nova(gsheets, servidor, destino):
+    exportar_incremental(gsheets, destino)
+    del _aba(servidor)[50:]
+    r = exportar_incremental(gsheets, destino)
+    assert r["geracao"] == 2 and r["linhas"] == 49
+    assert len(ler_exportacao(destino)) == 49
+    assert len(ler_exportacao(destino, geracao=1)) == 200
+
+
+def test_linha_exportada_editada_comeca_geracao_nova(gsheets, servidor, destino):
+    exportar_incremental(gsheets, destino)
+    _aba(servidor)[10][4] = "CLIENTE CORRIGIDO"
+    r = exportar_incremental(gsheets, destino)
+    assert r["geracao"] == 2 and r["linhas"] == 200
+    assert ler_exportacao(destino).loc[9, "CLIENTE"] == "CLIENTE CORRIGIDO"
+
+
+def test_linhas_deslocadas_em_outro_processo_comecam_geracao_nova(gsheets, servidor, destino, monkeypatch):
+    exportar_incremental(gsheets, destino)
+    # Linha apagada e outra acrescentada: mesmo tamanho, e a edição não é do mesmo processo
+    monkeypatch.setattr("exportacao_drive._PROCESSO", "outro")
+    del _aba(servidor)[5]
+    _aba(servidor).append(linha("LOJA 1", "NOVO"))
+    r = exportar_incremental(gsheets, destino)
+    assert r["geracao"] == 2 and r["linhas"] == 200
+
+
+def test_relatorio_fragmentado_exporta_por_fragmento(servidor, destino):
+    planilha = servidor.planilhas["fluxo de loja"]
+    planilha.add_worksheet("roteamento", _linhas=[["LOJA", "PLANILHA_ID", "ABA"], ["LOJA 9", "", "relatorio_loja9"]])
+    planilha.add_worksheet("relatorio_loja9", _linhas=[GooglePlanilha.COLUNAS_RELATORIO, linha("LOJA 9", "A")])
+    cliente = servidor.cliente()
+    gsheets = GooglePlanilha(planilha=cliente.open("fluxo de loja"), cliente=cliente)
+
+    assert exportar_incremental(gsheets, destino)["linhas"] == 201
+    gsheets.acrescentar_linhas_relatorio([linha("LOJA 9", "B")])
+    r = exportar_incremental(gsheets, destino)
+    assert r["linhas"] == 1 and r["arquivos"] == ["relatorio_g1_relatorio_loja9_00000003-00000003.parquet"]
+
+    df = ler_exportacao(destino)
+    loja9 = df[df["FRAGMENTO"] == "relatorio_loja9"]
+    assert list(loja9["CLIENTE"]) == ["A", "B"] and list(loja9["LINHA"]) == [2, 3]
+    assert (df["FRAGMENTO"] == "").sum() == 200
@@ -0,0 +1,38 @@
+import pytest
+
+from conftest import linha
+from google_planilha import GooglePlanilha
+
+
+@pytest.fixture
+def fragmentado(servidor):
+    """Relatorio principal com 200 linhas e o fragmento da LOJA 9 com 5."""
+    planilha = servidor.planilhas["fluxo de loja"]
+    planilha.add_worksheet("roteamento", _linhas=[["LOJA", "PLANILHA_ID", "ABA"], ["LOJA 9", "", "relatorio_loja9"]])
+    planilha.add_worksheet("relatorio_loja9", _linhas=[GooglePlanilha.COLUNAS_RELATORIO] + [linha("LOJA 9", f"L9 {i}") for i in range(5)])
+    cliente = servidor.cliente()
+    gsheets = GooglePlanilha(planilha=cliente.open("fluxo de loja"), cliente=cliente)
+    assert gsheets.fragmentado
+    return gsheets.armazenamento, cliente
+
+
+def test_janela_le_so_as_faixas_dos_fragmentos_envolvidos(fragmentado):
+    armazenamento, cliente = fragmentado
+    cliente.chamadas.clear()
+    assert [l[0] for l in armazenamento.ler_colunas_relatorio(["CLIENTE"], 198, 203)] == \
+        ["CLIENTE 198", "CLIENTE 199", "L9 0", "L9 1", "L9 2"]
+    assert cliente.chamadas["batch_get"] == 2 and cliente.chamadas["get_all_values"] == 0
+
+    cliente.chamadas.clear()
+    assert [l[0] for l in armazenamento.ler_colunas_relatorio(["CLIENTE"], 0, 3)] == ["CLIENTE 0", "CLIENTE 1", "CLIENTE 2"]
+    assert cliente.chamadas["batch_get"] == 1   # o fragmento da LOJA 9 fica fora da janela
+
+    assert [l[0] for l in armazenamento.ler_colunas_relatorio(["CLIENTE"], 203)] == ["L9 3", "L9 4"]
+
+
+def test_leitura_completa_na_ordem_dos_fragmentos(fragmentado):
+    armazenamento, _ = fragmentado
+    assert armazenamento.nomes_fragmentos() == ["", "relatorio_loja9"]
+    linhas = armazenamento.ler_colunas_relatorio(["LOJA", "CLIENTE"])
+    assert len(linhas) == armazenamento.total_relatorio() == 205
+    assert linhas[200] == ["LOJA 9", "L9 0"]
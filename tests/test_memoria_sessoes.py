@@ -0,0 +1,48 @@
+import time
+from types import SimpleNamespace
+
+import memoria_sessoes
+from memoria_sessoes import PoliticaDescarte, aplicar_politicas
+
+
+class EstadoFalso(dict):
+    """Só o que aplicar_politicas usa do SessionState do Streamlit."""
+
+    @property
+    def filtered_state(self):
+        return dict(self)
+
+
+def sessao(id_, rodando=False, **estado):
+    estado.setdefault("ultima_atividade", time.time() - 3600)
+    return SimpleNamespace(session=SimpleNamespace(
+        id=id_, session_state=EstadoFalso(estado), _scriptrunner=object() if rodando else None))
+
+
+def test_sessao_com_rerun_em_andamento_fica_para_depois(monkeypatch):
+    parada, rodando = sessao("parada", pdf_bytes=b"x"), sessao("rodando", rodando=True, pdf_bytes=b"x")
+    monkeypatch.setattr(memoria_sessoes, "_sessoes", lambda: [parada, rodando])
+    politica = PoliticaDescarte("pdf", ["pdf_bytes"], 60)
+
+    assert aplicar_politicas([politica]) == {"pdf": 1}
+    assert "pdf_bytes" not in parada.session.session_state
+    assert rodando.session.session_state["pdf_bytes"] == b"x"
+
+    rodando.session._scriptrunner = None
+    assert aplicar_politicas([politica]) == {"pdf": 1}
+    assert "pdf_bytes" not in rodando.session.session_state
+
+
+def test_ajuste_vem_antes_da_remocao(monkeypatch):
+    alvo = sessao("s", pdf_bytes=b"x", pdf_gerado=True)
+    monkeypatch.setattr(memoria_sessoes, "_sessoes", lambda: [alvo])
+    vistos = []
+
+    def depois(estado):
+        vistos.append("pdf_bytes" in estado)
+        estado["pdf_gerado"] = False
+
+    aplicar_politicas([PoliticaDescarte("pdf", ["pdf_bytes"], 60, depois=depois)])
+    assert vistos == [True]
+    assert alvo.session.session_state == {"ultima_atividade": alvo.session.session_state["ultima_atividade"],
+                                          "pdf_gerado": False}
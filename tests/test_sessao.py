@@ -0,0 +1,57 @@
+import time
+
+import pytest
+
+import cadastro_usuarios
+from autenticacao import emitir_token, revogar_token, validar_token
+from cadastro_usuarios import CadastroUsuarios
+
+
+@pytest.fixture
+def banco(tmp_path, monkeypatch):
+    monkeypatch.setenv("FLUXO_SEGREDO_SESSAO", "segredo-de-teste")
+    novo = CadastroUsuarios(str(tmp_path / "usuarios.db"))
+    novo.inserir("ANA", "hash")
+    monkeypatch.setattr(cadastro_usuarios, "_cadastro", novo)
+    return novo
+
+
+def test_token_vale_ate_sair(banco):
+    token = emitir_token("ANA")
+    assert validar_token(token) == "ANA"
+    revogar_token(token)
+    assert validar_token(token) is None
+
+
+def test_revogacao_sobrevive_a_reinicio(banco, monkeypatch):
+    token = emitir_token("ANA")
+    revogar_token(token)
+    # Outro processo (ou o mesmo depois de reiniciar) abre o banco do zero
+    monkeypatch.setattr(cadastro_usuarios, "_cadastro", CadastroUsuarios(banco.caminho))
+    assert validar_token(token) is None
+
+
+def test_troca_de_senha_derruba_sessoes(banco):
+    token = emitir_token("ANA")
+    assert banco.alterar_senha("ANA", "outro-hash")
+    assert validar_token(token) is None
+    assert validar_token(emitir_token("ANA")) == "ANA"
+
+
+def test_token_sem_sessao_no_cadastro_nao_vale(banco, monkeypatch):
+    # Assinatura válida, mas a sessão não foi aberta neste cadastro
+    monkeypatch.setattr(banco, "abrir_sessao", lambda *args: None)
+    assert validar_token(emitir_token("ANA")) is None
+
+
+def test_token_vencido_ou_adulterado(banco):
+    assert validar_token(emitir_token("ANA", validade=-1)) is None
+    token = emitir_token("ANA")
+    assert validar_token(token[:-2] + ("AA" if token[-2:] != "AA" else "BB")) is None
+
+
+def test_sessoes_vencidas_saem_da_tabela(banco):
+    banco.abrir_sessao("antiga", "ANA", time.time() - 10)
+    emitir_token("ANA")
+    ids = [l["id"] for l in banco._conexao().execute("SELECT id FROM sessoes")]
+    assert "antiga" not in ids and len(ids) == 1
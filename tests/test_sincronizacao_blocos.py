@@ -0,0 +1,101 @@
+import random
+
+import pytest
+
+import sincronizacao_blocos
+from conftest import linha
+from google_planilha import GooglePlanilha
+from planilha_falsa import ServidorFalso
+from sincronizacao_blocos import SincronizadorBlocos
+
+BLOCO = 20
+
+
+@pytest.fixture
+def aba():
+    """Aba de 500 linhas de dados (25 blocos de 20) e a lista crua de linhas do servidor."""
+    srv = ServidorFalso(latencia=0, variacao=0)
+    srv.criar_planilha("p", {"relatorio": [GooglePlanilha.COLUNAS_RELATORIO] + [linha("LOJA 1", f"C{i}") for i in range(500)]})
+    cliente = srv.cliente()
+    return cliente, cliente.open("p").worksheet("relatorio"), srv.planilhas["p"].abas["relatorio"].linhas
+
+
+def _sondar_ate_mudar(sinc, vista, vezes=100):
+    for n in range(1, vezes + 1):
+        alteracoes = sinc.sincronizar(vista)
+        if alteracoes.mudou: return n, alteracoes
+    raise AssertionError(f"edição não encontrada em {vezes} sondagens")
+
+
+def test_edicao_no_meio_baixa_so_o_bloco_dela(aba):
+    cliente, vista, linhas = aba
+    sinc = SincronizadorBlocos("M", bloco=BLOCO)
+    sinc.carregar(vista)
+    linhas[205][4] = "CORRIGIDO"
+
+    _, alteracoes = _sondar_ate_mudar(sinc, vista)
+    assert list(alteracoes.blocos) == [200]
+    assert alteracoes.blocos[200][5][4] == "CORRIGIDO"
+    assert not alteracoes.so_acrescimo and alteracoes.completo is None
+    assert alteracoes.leituras <= 2 and cliente.chamadas["get_all_values"] == 1
+    assert not sinc.sincronizar(vista).mudou
+
+
+def test_rodizio_confere_a_aba_inteira(aba, monkeypatch):
+    _, vista, linhas = aba
+    monkeypatch.setattr(sincronizacao_blocos, "LINHAS_AMOSTRADAS", 0)
+    sinc = SincronizadorBlocos("M", bloco=BLOCO)
+    sinc.carregar(vista)
+    linhas[45][4] = "CORRIGIDO"   # longe da cauda e dos blocos recentes
+
+    # 23 blocos fora da cauda e dos recentes, 6 por sondagem
+    _, alteracoes = _sondar_ate_mudar(sinc, vista, vezes=4)
+    assert list(alteracoes.blocos) == [40]
+
+
+def test_amostra_encontra_edicao_fora_do_rodizio(aba, monkeypatch):
+    _, vista, linhas = aba
+    monkeypatch.setattr(sincronizacao_blocos, "BLOCOS_RODIZIO", 0)
+    random.seed(1)
+    sinc = SincronizadorBlocos("M", bloco=BLOCO)
+    sinc.carregar(vista)
+    linhas[45][4] = "CORRIGIDO"
+
+    _, alteracoes = _sondar_ate_mudar(sinc, vista)
+    assert list(alteracoes.blocos) == [40]
+
+
+def test_linha_apagada_no_meio_recarrega_tudo(aba):
+    _, vista, linhas = aba
+    sinc = SincronizadorBlocos("M", bloco=BLOCO)
+    sinc.carregar(vista)
+    del linhas[100]
+
+    alteracoes = sinc.sincronizar(vista)
+    assert alteracoes.recarga and [l[4] for l in alteracoes.completo] == [l[4] for l in linhas]
+    assert len(sinc) == 500
+
+
+def test_aba_encolhida_recarrega_tudo(aba):
+    _, vista, linhas = aba
+    sinc = SincronizadorBlocos("M", bloco=BLOCO)
+    sinc.carregar(vista)
+    del linhas[471:]
+
+    alteracoes = sinc.sincronizar(vista)
+    assert alteracoes.recarga and alteracoes.total == 471 and len(sinc) == 471
+
+
+def test_snapshot_acompanha_edicao_e_exclusao(gsheets, servidor):
+    linhas = servidor.planilhas["fluxo de loja"].abas["relatorio"].linhas
+    snap = gsheets.get_snapshot_relatorio()
+
+    linhas[50][4] = "CORRIGIDO"
+    editado = gsheets._sincronizar_relatorio()
+    assert editado.registros([49])[0]["CLIENTE"] == "CORRIGIDO"
+    assert editado.edicao == snap.edicao + 1
+
+    del linhas[10]
+    recarregado = gsheets._sincronizar_relatorio()
+    assert [r["CLIENTE"] for r in recarregado.registros(range(len(recarregado)))] == [l[4] for l in linhas[1:]]
+    assert recarregado.edicao == editado.edicao + 1
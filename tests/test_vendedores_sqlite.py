@@ -0,0 +1,36 @@
+import logging
+
+import pytest
+
+from armazenamento import ArmazenamentoSQLite
+from google_planilha import GooglePlanilha
+
+
+@pytest.fixture
+def caminho(tmp_path):
+    return str(tmp_path / "fluxo.db")
+
+
+def test_ler_vendedores_so_se_mudou(caminho):
+    local, outro = ArmazenamentoSQLite(caminho), ArmazenamentoSQLite(caminho)
+    local.inserir_vendedores([{"VENDEDOR": "ANA", "STATUS": "ATIVO", "LOJAS": ["LOJA 1"]}])
+
+    assert [v["VENDEDOR"] for v in local.ler_vendedores(so_se_mudou=True)] == ["ANA"]
+    assert local.ler_vendedores(so_se_mudou=True) is None
+    assert len(local.ler_vendedores()) == 1   # sem a opção, sempre a lista
+
+    local.atualizar_vendedores({1: {"STATUS": "INATIVO", "LOJAS": []}})
+    assert local.ler_vendedores(so_se_mudou=True)[0]["STATUS"] == "INATIVO"
+    assert local.ler_vendedores(so_se_mudou=True) is None
+
+    outro.inserir_vendedores([{"VENDEDOR": "BIA", "STATUS": "ATIVO", "LOJAS": []}])   # outro processo
+    assert [v["VENDEDOR"] for v in local.ler_vendedores(so_se_mudou=True)] == ["ANA", "BIA"]
+
+
+def test_vendedor_duplicado_e_registrado(caminho, caplog):
+    gsheets = GooglePlanilha(armazenamento=ArmazenamentoSQLite(caminho))
+    assert gsheets.adicionar_vendedor("ANA")
+    with caplog.at_level(logging.WARNING, logger="google_planilha"):
+        assert not gsheets.adicionar_vendedor("ANA")
+    assert "duplicado" in caplog.text
+    assert [v["VENDEDOR"] for v in gsheets.get_todos_vendedores()] == ["ANA"]